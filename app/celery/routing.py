@@ -0,0 +1,94 @@
+from kombu import Queue
+
+# Booking-critical work (ticket issuance, seat release) must never wait
+# behind email campaigns or reports, so each class gets its own queue and
+# its own workers.
+BOOKINGS_QUEUE = 'bookings'
+EMAIL_QUEUE = 'email'
+REPORTS_QUEUE = 'reports'
+DEFAULT_QUEUE = 'celery'
+
+# Each queue is bound with its own routing key; sharing the default key
+# would deliver every message to every queue on the direct exchange
+TASK_QUEUES = (
+    Queue(BOOKINGS_QUEUE, routing_key=BOOKINGS_QUEUE),
+    Queue(EMAIL_QUEUE, routing_key=EMAIL_QUEUE),
+    Queue(REPORTS_QUEUE, routing_key=REPORTS_QUEUE),
+    Queue(DEFAULT_QUEUE, routing_key=DEFAULT_QUEUE),
+)
+
+TASK_ROUTES = {
+    # Booking-critical
+    'tasks.process_booking': {'queue': BOOKINGS_QUEUE},
+    'tasks.authorize_payment': {'queue': BOOKINGS_QUEUE},
+    'tasks.cancel_expired_bookings': {'queue': BOOKINGS_QUEUE},
+    'tasks.sync_event_inventory': {'queue': BOOKINGS_QUEUE},
+    'tasks.cleanup_abandoned_bookings': {'queue': BOOKINGS_QUEUE},
+    # Email
+    'tasks.send_email_notification': {'queue': EMAIL_QUEUE},
+    'tasks.send_email_batch': {'queue': EMAIL_QUEUE},
+    'tasks.dispatch_email_campaign': {'queue': EMAIL_QUEUE},
+    'tasks.send_booking_reminder': {'queue': EMAIL_QUEUE},
+    'tasks.send_event_updates': {'queue': EMAIL_QUEUE},
+    'tasks.send_event_reminders': {'queue': EMAIL_QUEUE},
+    'tasks.send_reminder_batch': {'queue': EMAIL_QUEUE},
+    'tasks.send_low_ticket_alerts': {'queue': EMAIL_QUEUE},
+    # Reporting and housekeeping
+    'tasks.generate_booking_report': {'queue': REPORTS_QUEUE},
+    'tasks.compact_daily_sales': {'queue': REPORTS_QUEUE},
+    'tasks.purge_outbox': {'queue': REPORTS_QUEUE},
+}
+
+# Per-task delivery settings. Booking and report tasks are safe to run
+# twice (idempotent or recomputing), so they are acknowledged only after
+# they finish and are redelivered if a worker dies mid-task. Email tasks
+# keep early acks: a redelivery would send the email again.
+QUEUE_TASK_OPTIONS = {
+    BOOKINGS_QUEUE: {'acks_late': True, 'reject_on_worker_lost': True},
+    EMAIL_QUEUE: {'acks_late': False},
+    REPORTS_QUEUE: {'acks_late': True, 'reject_on_worker_lost': True},
+}
+
+# Worker settings per queue, selected with CELERY_WORKER_PROFILE.
+# Booking workers fetch one message at a time so a slow task never holds
+# others back; email workers are I/O bound and can prefetch more; report
+# workers are few so reports never take over the database.
+WORKER_PROFILES = {
+    BOOKINGS_QUEUE: {'queues': [BOOKINGS_QUEUE], 'concurrency': 4, 'prefetch_multiplier': 1},
+    EMAIL_QUEUE: {'queues': [EMAIL_QUEUE], 'concurrency': 8, 'prefetch_multiplier': 4},
+    REPORTS_QUEUE: {'queues': [REPORTS_QUEUE, DEFAULT_QUEUE], 'concurrency': 1, 'prefetch_multiplier': 1},
+}
+
+
+def configure_routing(celery):
+    """Declare the queues and route every task to its queue"""
+    celery.conf.update(
+        task_queues=TASK_QUEUES,
+        task_default_queue=DEFAULT_QUEUE,
+        task_routes=TASK_ROUTES,
+        task_annotations={
+            task_name: QUEUE_TASK_OPTIONS[route['queue']]
+            for task_name, route in TASK_ROUTES.items()
+        },
+    )
+
+
+def apply_worker_profile(celery, profile):
+    """
+    Tune this worker process for one queue
+
+    Args:
+        celery (Celery): Celery app the worker runs
+        profile (str): Name of a WORKER_PROFILES entry
+
+    Returns:
+        list: Queues the worker should consume
+    """
+    if profile not in WORKER_PROFILES:
+        raise ValueError(f'Unknown worker profile: {profile}')
+    settings = WORKER_PROFILES[profile]
+    celery.conf.update(
+        worker_concurrency=settings['concurrency'],
+        worker_prefetch_multiplier=settings['prefetch_multiplier'],
+    )
+    return settings['queues']
@@ -0,0 +1,38 @@
+from celery.schedules import crontab
+
+# Celery Beat schedule
+BEAT_SCHEDULE = {
+    'send-event-reminders': {
+        'task': 'tasks.send_event_reminders',
+        'schedule': crontab(minute='*/15')  # Run every 15 minutes; only new reminders are sent
+    },
+    'cleanup-abandoned-bookings': {
+        'task': 'tasks.cleanup_abandoned_bookings',
+        'schedule': crontab(minute='*/15')  # Run every 15 minutes
+    },
+    'send-low-ticket-alerts': {
+        'task': 'tasks.send_low_ticket_alerts',
+        'schedule': crontab(hour='*/6')  # Run every 6 hours
+    },
+    'sync-event-inventory': {
+        'task': 'tasks.sync_event_inventory',
+        'schedule': crontab(minute='*')  # Run every minute
+    },
+    'cancel-expired-bookings': {
+        'task': 'tasks.cancel_expired_bookings',
+        'schedule': crontab(minute='*')  # Run every minute; only due holds are read
+    },
+    'compact-daily-sales': {
+        'task': 'tasks.compact_daily_sales',
+        'schedule': crontab(minute=5)  # Run hourly
+    },
+    'purge-outbox': {
+        'task': 'tasks.purge_outbox',
+        'schedule': crontab(minute=30)  # Run hourly
+    },
+    'generate-daily-report': {
+        'task': 'tasks.generate_booking_report',
+        'schedule': crontab(hour=0, minute=0),  # Run at midnight
+        'kwargs': {'previous_day': True}  # Yesterday's date range, resolved at run time
+    }
+}
@@ -1,24 +1,47 @@
+import logging
 from datetime import datetime, timedelta
 from app.extensions import celery
 from app.models.booking import Booking
 from app.models.event import Event
 from app.models.ticket import Ticket
 from app.services.email_service import EmailService
+from app.services.inventory_service import InventoryService
+from app.services.hold_service import HoldService
+from app.services.expiry_service import ExpiryService
+from app.services.ticket_service import TicketService
+from app.services.report_service import ReportService
+from app.services.rollup_service import SalesRollupService
+from app.services.outbox_service import OutboxService
+from app.services.payment_service import PaymentService
 from app.utils.database import db, commit_changes
+from app.utils.cache import bump_catalog_version
+from app.utils.idempotency import idempotent
+
+logger = logging.getLogger(__name__)
+
 
 @celery.task(
     name="tasks.process_booking", bind=True, max_retries=3, default_retry_delay=60
 )  # Retry after 60 seconds
+@idempotent(key=lambda self, booking_id: booking_id)
 def process_booking(self, booking_id):
     """
     Asynchronously process a booking after payment confirmation
 
     This task performs the following operations:
     1. Validates booking existence
-    2. Generates tickets for the booking
-    3. Updates booking status to confirmed
-    4. Updates event's available ticket count
-    5. Sends confirmation notification
+    2. Generates tickets if the booking has none yet
+    3. Sends confirmation notification
+
+    Tickets are normally minted by complete_payment in the same
+    transaction that confirms the booking, so this task only reads them
+    and writes nothing; minting here covers bookings confirmed without
+    tickets. Seats were already taken out of the inventory ledger when the
+    booking was created, so the event row is not touched here.
+
+    The task runs at most once per booking, and each step is safe to
+    repeat on retry: tickets are only minted if the booking has none, and
+    the confirmation email is sent once per booking.
 
     Args:
         booking_id (int): ID of the booking to process
@@ -36,38 +59,41 @@ def process_booking(self, booking_id):
         if not booking:
             return {"status": "error", "message": "Booking not found"}
 
-        # Generate individual tickets for the booking
-        for _ in range(booking.quantity):
-            ticket = Ticket(
-                event_id=booking.event_id,
-                booking_id=booking.id,
-                # Add additional ticket details as needed
-            )
-            db.session.add(ticket)
-
-        # Update booking status to confirmed
-        booking.confirm()
-
-        # Update event's available ticket count
-        event = Event.query.get(booking.event_id)
-        event.update_available_tickets(booking.quantity)
-
-        # Commit all database changes
-        commit_changes()
+        # Generate all tickets for the booking in one bulk insert, unless
+        # complete_payment or a previous attempt already committed them
+        ticket_numbers = [
+            ticket_number
+            for ticket_number, in db.session.query(Ticket.ticket_number)
+            .filter(Ticket.booking_id == booking.id)
+            .order_by(Ticket.id)
+        ]
+        if not ticket_numbers:
+            ticket_numbers = TicketService.mint_tickets(booking)
+            booking.confirm()
+            if not commit_changes():
+                raise RuntimeError(f"Could not save tickets for booking {booking.id}")
 
         # Send confirmation notification to user
+        event = booking.event
         EmailService.send_email(
             booking.user.email,
-            "Booking Confirmation",
+            "Booking Confirmation - Payment Successful",
             "mail/booking_confirmation.html",
-            {"booking": booking},
+            {
+                "booking": {
+                    **booking.to_dict(),
+                    "user": {"first_name": booking.user.first_name},
+                    "event": {**event.to_dict(), "event_date": event.event_date},
+                },
+            },
+            idempotency_key=f"booking-confirmation:{booking.id}",
         )
 
         # Return success response with booking details
         return {
             "status": "success",
             "booking_number": booking.booking_number,
-            "tickets": [ticket.ticket_number for ticket in booking.tickets],
+            "tickets": ticket_numbers,
         }
     except Exception as e:
         # Retry the task in case of failure
@@ -75,111 +101,222 @@ def process_booking(self, booking_id):
 
 
 @celery.task(name="tasks.cancel_expired_bookings")
-def cancel_expired_bookings():
+def cancel_expired_bookings(batch_size=500):
     """
-    Cancel all unpaid bookings that have exceeded the payment timeout (10 minutes)
+    Cancel all unpaid bookings whose payment hold has expired
 
     This task:
-    1. Identifies expired bookings (pending payment > 10 minutes)
-    2. Returns tickets to event inventory
-    3. Updates booking status to cancelled
-    4. Sends cancellation notifications
+    1. Pops due holds off the hold index in chunks
+    2. Cancels the still-pending bookings of a chunk in one UPDATE ... RETURNING
+    3. Returns tickets to event inventory once per affected event
+    4. Publishes the chunk's cancellation notifications as one group
+    5. Fails payments whose authorization task never finished
+
+    Args:
+        batch_size (int): Maximum number of holds to process per chunk
 
     Returns:
         dict: Summary of cancelled bookings
     """
-    # Calculate expiration threshold (10 minutes ago)
-    expiration_time = datetime.utcnow() - timedelta(minutes=10)
+    cancelled_count = 0
+    while True:
+        holds = HoldService.pop_due(batch_size)
+        if not holds:
+            break
+
+        try:
+            cancelled_count += ExpiryService.expire_bookings(holds.keys())
+        except Exception:
+            # Put the chunk back so the next sweep retries it
+            db.session.rollback()
+            HoldService.restore(holds)
+            raise
+
+    failed_payments = PaymentService.fail_stale()
+
+    return {
+        "status": "success",
+        "cancelled_bookings": cancelled_count,
+        "failed_payments": failed_payments,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@celery.task(name="tasks.cleanup_abandoned_bookings")
+def cleanup_abandoned_bookings(batch_size=500, grace_seconds=300):
+    """
+    Cancel pending bookings the hold index lost track of
 
-    # Find all expired bookings
-    expired_bookings = Booking.query.filter(
-        Booking.status == "pending",
-        Booking.payment_status == "pending",
-        Booking.created_at <= expiration_time,
-    ).all()
+    Backstop for cancel_expired_bookings: scans the bookings table for
+    bookings still pending `grace_seconds` after their hold ran out, which
+    covers bookings that were never indexed (created before the index
+    existed, or whose hold failed to be placed) and holds lost with Redis.
 
+    Args:
+        batch_size (int): Maximum number of bookings to cancel per chunk
+        grace_seconds (int): How long past its hold a booking may stay pending
+
+    Returns:
+        dict: Summary of cancelled bookings
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=HoldService.hold_seconds() + grace_seconds)
     cancelled_count = 0
-    for booking in expired_bookings:
-        try:
-            # Return tickets to event inventory
-            event = Event.query.get(booking.event_id)
-            event.update_available_tickets(booking.quantity, operation="increase")
-
-            # Update booking status to cancelled
-            booking.cancel()
-            commit_changes()
-
-            # Notify user about booking cancellation due to payment timeout
-            EmailService.send_email(
-                booking.user.email,
-                "Booking Cancelled - Payment Timeout",
-                "mail/booking_timeout_cancellation.html",
-                {
-                    "booking": booking.to_dict(),
-                    "event": event.to_dict(),
-                    "reason": "Payment not completed within 10 minutes"
-                }
+    last = None
+    while True:
+        query = db.select(Booking.id, Booking.created_at).where(
+            Booking.status == "pending",
+            Booking.payment_status == "pending",
+            Booking.created_at < cutoff,
+        )
+        if last is not None:
+            # Keyset past the previous chunk, so bookings skipped because
+            # they are locked are not picked up again in this run
+            query = query.where(
+                db.or_(
+                    Booking.created_at > last.created_at,
+                    db.and_(Booking.created_at == last.created_at, Booking.id > last.id),
+                )
             )
+        rows = db.session.execute(
+            query.order_by(Booking.created_at, Booking.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last = rows[-1]
+
+        booking_ids = [row.id for row in rows]
+        try:
+            cancelled_count += ExpiryService.expire_bookings(booking_ids)
+        except Exception:
+            db.session.rollback()
+            raise
+        HoldService.release_many(booking_ids)
+
+    if cancelled_count:
+        logger.warning(f"Cancelled {cancelled_count} abandoned booking(s) missing from the hold index")
+    return {
+        "status": "success",
+        "cancelled_bookings": cancelled_count,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
 
-            cancelled_count += 1
-        except Exception as e:
-            # Log error and continue with next booking
-            continue
+@celery.task(name="tasks.sync_event_inventory")
+def sync_event_inventory(batch_size=500):
+    """
+    Write seat counts from the inventory ledger back to the events table
+
+    Only events whose ledger changed since the last run are touched, and
+    each batch is written with a single executemany UPDATE.
+
+    Args:
+        batch_size (int): Maximum number of events to sync per batch
+
+    Returns:
+        dict: Number of events synced
+    """
+    synced_count = 0
+    while True:
+        counts = InventoryService.pop_dirty(batch_size)
+        if not counts:
+            break
+
+        db.session.execute(
+            db.update(Event),
+            [
+                {"id": event_id, "available_tickets": available}
+                for event_id, available in counts.items()
+            ],
+        )
+        commit_changes()
+        synced_count += len(counts)
+
+    if synced_count:
+        # Seat counts shown on the event pages changed
+        bump_catalog_version()
 
     return {
         "status": "success",
-        "cancelled_bookings": cancelled_count,
+        "synced_events": synced_count,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@celery.task(name="tasks.compact_daily_sales")
+def compact_daily_sales(days=2):
+    """
+    Rebuild the most recent days of the daily_event_sales rollup
+
+    Booking transitions keep the rollup current incrementally; this job
+    recomputes the last few days from the bookings table so any missed or
+    failed increments are corrected.
+
+    Args:
+        days (int): Number of days to rebuild, counting today
+
+    Returns:
+        dict: Rebuilt date range
+    """
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days - 1)
+
+    SalesRollupService.rebuild(start_date, end_date)
+    commit_changes()
+
+    return {
+        "status": "success",
+        "period": {"start": start_date.isoformat(), "end": end_date.isoformat()},
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
+@celery.task(name="tasks.purge_outbox")
+def purge_outbox(hours=24):
+    """
+    Delete outbox rows published more than `hours` ago
+
+    Args:
+        hours (int): Age after which published rows are deleted
+
+    Returns:
+        dict: Number of rows deleted
+    """
+    deleted = OutboxService.purge(datetime.utcnow() - timedelta(hours=hours))
+    commit_changes()
+    return {"status": "success", "deleted": deleted}
+
+
 @celery.task(name="tasks.generate_booking_report")
-def generate_booking_report(start_date, end_date):
+def generate_booking_report(start_date=None, end_date=None, previous_day=False):
     """
     Generate a comprehensive booking report for a specified date range
 
-    This task analyzes confirmed and paid bookings within the date range
-    and generates statistical data including total bookings, revenue,
-    and detailed booking information.
+    This task analyzes confirmed and paid bookings within the date range.
+    The statistics are computed with SQL aggregates and the detailed
+    booking rows are streamed into a JSON-lines artifact on disk; only the
+    summary and the artifact handle go into the task result.
 
     Args:
         start_date (str): ISO format start date for report period
         end_date (str): ISO format end date for report period
+        previous_day (bool): Report on yesterday instead of the given dates
 
     Returns:
-        dict: Report data including statistics and booking details
+        dict: Report statistics and the handle of the detail artifact
     """
     try:
+        if previous_day:
+            today = datetime.utcnow().date()
+            start_date = (today - timedelta(days=1)).isoformat()
+            end_date = today.isoformat()
+
         # Convert string dates to datetime objects
         start_dt = datetime.fromisoformat(start_date) if start_date else None
         end_dt = datetime.fromisoformat(end_date) if end_date else None
 
-        # Query confirmed and paid bookings
-        query = Booking.query.filter(
-            Booking.status == "confirmed", Booking.payment_status == "paid"
-        )
-
-        # Apply date filters if provided
-        if start_dt:
-            query = query.filter(Booking.created_at >= start_dt)
-        if end_dt:
-            query = query.filter(Booking.created_at <= end_dt)
-
-        bookings = query.all()
-
-        # Calculate report statistics
-        total_bookings = len(bookings)
-        total_revenue = sum(booking.total_amount for booking in bookings)
-        avg_booking_value = total_revenue / total_bookings if total_bookings > 0 else 0
-
-        # Prepare detailed report data
-        report_data = {
-            "total_bookings": total_bookings,
-            "total_revenue": total_revenue,
-            "average_booking_value": avg_booking_value,
-            "period": {"start": start_date, "end": end_date},
-            "bookings": [booking.to_dict() for booking in bookings],
-        }
+        report_data = ReportService.summarize(start_dt, end_dt)
+        report_data["period"] = {"start": start_date, "end": end_date}
+        report_data["artifact"] = ReportService.export_bookings(start_dt, end_dt)
 
         return {"status": "success", "data": report_data}
     except Exception as e:
@@ -1,10 +1,15 @@
-from app.extensions import celery, mail
-from flask import render_template, current_app
-from flask_mail import Message
+from celery import group
+from app.extensions import celery
+from flask import current_app
 import logging
 from datetime import datetime, timedelta
 from app.models.event import Event
 from app.models.booking import Booking
+from app.models.user import User
+from app.utils.database import db
+from app.services.mail_delivery_service import MailDeliveryService, mail_pool
+from app.services.campaign_service import CampaignService
+from app.services.reminder_service import ReminderService
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,28 +25,11 @@ def send_mail(recipient_email, subject, template_name, context):
             app.config['PREFERRED_URL_SCHEME'] = 'http'   # Default to http
         
         with app.app_context():
-            # Add current year to context if not present
-            if 'year' not in context:
-                context['year'] = datetime.utcnow().year
+            msg = MailDeliveryService.build_message(recipient_email, subject, template_name, context)
             
-            # Get mail sender from config
-            mail_sender = app.config.get('MAIL_DEFAULT_SENDER')
-            if not mail_sender:
-                logger.error("MAIL_DEFAULT_SENDER not configured")
-                raise Exception('Mail sender not configured')
-            
-            # Create message
-            msg = Message(
-                subject=subject,
-                recipients=[recipient_email],
-                sender=mail_sender
-            )
-            
-            # Render template with context
-            msg.html = render_template(template_name, **context)
-            
-            # Send email
-            mail.send(msg)
+            # Send email over a pooled SMTP session
+            with mail_pool.connection() as connection:
+                connection.send(msg)
             return True
     except Exception as e:
         logger.error(f"Failed to send email to {recipient_email}: {str(e)}")
@@ -69,6 +57,92 @@ def send_email_notification(self, recipient_email, subject, template_name, conte
             self.retry(countdown=60 * (self.request.retries + 1), exc=e)
         return {'status': 'error', 'message': str(e)}
 
+@celery.task(name='tasks.send_email_batch', bind=True, max_retries=3)
+def send_email_batch(self, messages, campaign_id=None, shared_context=None):
+    """Send a batch of templated emails over one pooled SMTP session"""
+    logger.info(f"Sending batch of {len(messages)} emails")
+    try:
+        result = MailDeliveryService.deliver(messages, shared_context=shared_context)
+    except Exception as e:
+        # Nothing was sent (e.g. SMTP login failed); count the batch so the
+        # campaign still reaches its total and completes
+        logger.error(f"Email batch of {len(messages)} failed: {str(e)}")
+        if campaign_id:
+            CampaignService.record(campaign_id, failed=len(messages))
+        raise
+
+    logger.info(f"Email batch completed. Sent: {result['sent']}, Failed: {len(result['failed'])}")
+
+    # Only the unsent remainder of a broken session is retried
+    will_retry = result['pending'] and self.request.retries < self.max_retries
+    if campaign_id:
+        unsent = 0 if will_retry else len(result['pending'])
+        CampaignService.record(campaign_id, sent=result['sent'], failed=len(result['failed']) + unsent)
+
+    if will_retry:
+        logger.info(f"Retrying {len(result['pending'])} emails (attempt {self.request.retries + 1})")
+        self.retry(args=(result['pending'],), countdown=60 * (self.request.retries + 1))
+
+    return {
+        'status': 'success' if not result['pending'] else 'error',
+        'sent': result['sent'],
+        'failed': len(result['failed']),
+        'unsent': len(result['pending'])
+    }
+
+def queue_email_batches(messages, campaign_id=None, shared_context=None):
+    """
+    Split an iterable of email dicts into batches of MAIL_BATCH_SIZE and queue them
+
+    Template context common to every message goes in shared_context, so it
+    is sent once per batch and the template is pre-rendered once for it.
+    """
+    batch_size = current_app.config.get('MAIL_BATCH_SIZE', 100)
+    batch = []
+    queued = 0
+    batches = 0
+    for message in messages:
+        batch.append(message)
+        if len(batch) >= batch_size:
+            send_email_batch.delay(batch, campaign_id=campaign_id, shared_context=shared_context)
+            queued += len(batch)
+            batches += 1
+            batch = []
+    if batch:
+        send_email_batch.delay(batch, campaign_id=campaign_id, shared_context=shared_context)
+        queued += len(batch)
+        batches += 1
+    return queued, batches
+
+@celery.task(name='tasks.dispatch_email_campaign')
+def dispatch_email_campaign(campaign_id, recipient_ids, subject, template_name, context, chunk_size=1000):
+    """Load a campaign's recipients in chunks and queue their email batches"""
+    logger.info(f"Dispatching campaign {campaign_id} to {len(recipient_ids)} recipients")
+    CampaignService.set_status(campaign_id, 'sending')
+
+    queued = 0
+    for start in range(0, len(recipient_ids), chunk_size):
+        chunk = recipient_ids[start:start + chunk_size]
+        users = User.query.filter(User.id.in_(chunk)).all()
+
+        # Recipients deleted since the campaign started are skipped
+        skipped = len(chunk) - len(users)
+        messages = (
+            {
+                'recipient_email': user.email,
+                'subject': subject,
+                'template_name': template_name,
+                'context': {'user': user.to_dict()}
+            }
+            for user in users
+        )
+        chunk_queued, _ = queue_email_batches(messages, campaign_id=campaign_id, shared_context=context)
+        queued += chunk_queued
+        CampaignService.record(campaign_id, queued=chunk_queued, skipped=skipped)
+
+    logger.info(f"Campaign {campaign_id} dispatched. Queued: {queued}")
+    return {'status': 'success', 'campaign_id': campaign_id, 'queued': queued}
+
 @celery.task(name='tasks.send_booking_reminder')
 def send_booking_reminder(booking_id):
     """Send booking reminder before event"""
@@ -109,102 +183,105 @@ def send_event_updates(event_id, update_message):
         if not event:
             return {'status': 'error', 'message': 'Event not found'}
 
-        # Get all confirmed bookings for the event
-        bookings = Booking.query.filter(
-            Booking.event_id == event_id,
-            Booking.status == 'confirmed'
-        ).all()
-
-        notification_count = 0
-        failed_count = 0
-        
-        for booking in bookings:
-            try:
-                # Prepare email context
-                context = {
-                    'user': booking.user,
-                    'booking': booking,
-                    'event': event,
-                    'update_message': update_message
+        # Stream only the columns the email needs, so no row lazy-loads its
+        # tickets or roles, and queue them in batches
+        rows = (
+            db.session.query(
+                Booking.id, Booking.booking_number, Booking.quantity, Booking.total_amount,
+                User.email, User.first_name, User.last_name
+            )
+            .join(User, User.id == Booking.user_id)
+            .filter(
+                Booking.event_id == event_id,
+                Booking.status == 'confirmed'
+            )
+            .order_by(Booking.id)
+            .yield_per(1000)
+        )
+        messages = (
+            {
+                'recipient_email': row.email,
+                'subject': f'Update for {event.title}',
+                'template_name': 'mail/event_update.html',
+                'context': {
+                    'user': {'email': row.email, 'first_name': row.first_name, 'last_name': row.last_name},
+                    'booking': {
+                        'id': row.id,
+                        'booking_number': row.booking_number,
+                        'quantity': row.quantity,
+                        'total_amount': row.total_amount
+                    }
                 }
-                
-                # Send update email
-                send_mail(
-                    recipient_email=booking.user.email,
-                    subject=f'Update for {event.title}',
-                    template_name='mail/event_update.html',
-                    context=context
-                )
-                
-                notification_count += 1
-                    
-            except Exception:
-                failed_count += 1
-                continue
+            }
+            for row in rows
+        )
+        queued, batches = queue_email_batches(
+            messages,
+            shared_context={'event': event.to_dict(), 'update_message': update_message}
+        )
 
         return {
             'status': 'success',
-            'notifications_sent': notification_count,
-            'notifications_failed': failed_count,
-            'total_bookings': len(bookings)
+            'notifications_queued': queued,
+            'batches': batches
         }
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
 @celery.task(name='tasks.send_event_reminders')
-def send_event_reminders():
+def send_event_reminders(claim_size=5000):
     """Send reminders for events happening soon"""
     logger.info("Starting event reminder check")
     
-    # Get events happening in the next 24 hours
-    reminder_threshold = datetime.utcnow() + timedelta(hours=24)
-    upcoming_events = Event.query.filter(
-        Event.start_time <= reminder_threshold,
-        Event.start_time > datetime.utcnow(),
-        Event.status == 'active'
-    ).all()
-    
+    # Claim due bookings in indexed chunks and fan them out as fixed-size batches
+    batch_size = current_app.config.get('MAIL_BATCH_SIZE', 100)
     reminder_count = 0
-    failed_count = 0
+    batch_count = 0
     
-    for event in upcoming_events:
-        # Get all confirmed bookings for this event
-        bookings = Booking.query.filter(
-            Booking.event_id == event.id,
-            Booking.status == 'confirmed'
-        ).all()
+    while True:
+        due = ReminderService.claim_due(window_hours=24, limit=claim_size)
+        if not due:
+            break
         
-        for booking in bookings:
-            try:
-                # Prepare reminder context
-                context = {
-                    'user': booking.user.to_dict(),
-                    'event': event.to_dict(),
-                    'booking': booking.to_dict(),
-                    'tickets': [ticket.to_dict() for ticket in booking.tickets]
-                }
-                
-                # Send reminder email
-                send_mail(
-                    recipient_email=booking.user.email,
-                    subject=f"Reminder: {event.title} starts in 24 hours!",
-                    template_name='mail/event_reminder.html',
-                    context=context
-                )
-                
-                reminder_count += 1
-                logger.info(f"Sent reminder for event {event.title} to {booking.user.email}")
-                    
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Error sending reminder: {str(e)}")
-                continue
+        batches = [
+            send_reminder_batch.s(event_id, booking_ids[start:start + batch_size])
+            for event_id, booking_ids in due.items()
+            for start in range(0, len(booking_ids), batch_size)
+        ]
+        try:
+            group(batches).apply_async()
+        except Exception:
+            # Claimed bookings that were never queued would never be reminded
+            ReminderService.release([booking_id for booking_ids in due.values() for booking_id in booking_ids])
+            raise
+        
+        reminder_count += sum(len(booking_ids) for booking_ids in due.values())
+        batch_count += len(batches)
     
-    logger.info(f"Event reminder task completed. Sent: {reminder_count}, Failed: {failed_count}")
+    logger.info(f"Event reminder task completed. Queued: {reminder_count} in {batch_count} batches")
     return {
         'status': 'success',
-        'reminders_sent': reminder_count,
-        'reminders_failed': failed_count
+        'reminders_queued': reminder_count,
+        'batches': batch_count
+    }
+
+@celery.task(name='tasks.send_reminder_batch', bind=True, max_retries=3)
+def send_reminder_batch(self, event_id, booking_ids):
+    """Send the reminders for a batch of claimed bookings of one event"""
+    result = ReminderService.deliver(event_id, booking_ids)
+    logger.info(f"Reminder batch for event {event_id} completed. Sent: {result['sent']}, Failed: {len(result['failed'])}")
+
+    if result['pending']:
+        if self.request.retries < self.max_retries:
+            self.retry(args=(event_id, result['pending']), countdown=60 * (self.request.retries + 1))
+        # Give unsent bookings back to the next scheduled run
+        ReminderService.release(result['pending'])
+
+    return {
+        'status': 'success' if not result['pending'] else 'error',
+        'sent': result['sent'],
+        'failed': len(result['failed']),
+        'unsent': len(result['pending'])
     }
 
 @celery.task(name='tasks.send_low_ticket_alerts')
@@ -254,39 +331,3 @@ def send_low_ticket_alerts():
         'status': 'success',
         'alerts_sent': alert_count
     }
-
-@celery.task(name='tasks.cleanup_abandoned_bookings')
-def cleanup_abandoned_bookings():
-    """Clean up abandoned bookings (created but not paid)"""
-    logger.info("Starting abandoned booking cleanup")
-    
-    # Find bookings that were created more than 15 minutes ago and still pending
-    cutoff_time = datetime.utcnow() - timedelta(minutes=15)
-    abandoned_bookings = Booking.query.filter(
-        Booking.status == 'pending',
-        Booking.created_at <= cutoff_time
-    ).all()
-    
-    cleaned_count = 0
-    for booking in abandoned_bookings:
-        try:
-            # Return tickets to event
-            event = Event.query.get(booking.event_id)
-            if event:
-                event.available_tickets += booking.quantity
-            
-            # Delete the booking
-            Booking.query.filter_by(id=booking.id).delete()
-            
-            cleaned_count += 1
-            logger.info(f"Cleaned up abandoned booking {booking.id}")
-            
-        except Exception as e:
-            logger.error(f"Error cleaning up booking {booking.id}: {str(e)}")
-            continue
-    
-    logger.info(f"Abandoned booking cleanup completed. Cleaned: {cleaned_count}")
-    return {
-        'status': 'success',
-        'bookings_cleaned': cleaned_count
-    } 
\ No newline at end of file
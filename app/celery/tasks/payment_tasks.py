@@ -0,0 +1,42 @@
+import logging
+from app.extensions import celery
+from app.services.payment_gateway import GatewayUnavailable
+from app.services.payment_service import PaymentService
+from app.utils.database import db
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name="tasks.authorize_payment", bind=True, max_retries=5)
+def authorize_payment(self, payment_id, token):
+    """
+    Charge the card token for a pending checkout payment
+
+    Gateway outages and transient database errors are retried with
+    exponential backoff (1, 2, 4, 8, 16 seconds), which stays well inside
+    the booking hold. Every attempt reuses the payment id as the gateway's
+    idempotency key, so a retry after a timeout cannot charge twice. Once
+    the retries are spent the payment is marked failed and the customer
+    can pay again from the checkout page.
+
+    Args:
+        payment_id (str): ID of the pending payment
+        token (str): Card token from the gateway
+
+    Returns:
+        dict: Final payment status and message
+    """
+    try:
+        return PaymentService.authorize(payment_id, token)
+    except Exception as e:
+        db.session.rollback()
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Payment {payment_id} failed after {self.request.retries} retries: {e}")
+            message = (
+                "The payment provider is unavailable. Please try again."
+                if isinstance(e, GatewayUnavailable)
+                else "Payment processing failed. Please try again."
+            )
+            PaymentService.fail(payment_id, message)
+            return {"status": "failed", "message": message}
+        raise self.retry(exc=e, countdown=2 ** self.request.retries)
@@ -0,0 +1,394 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+@click.command()
+@with_appcontext
+def initroles():
+    """Khởi tạo dữ liệu cơ bản như các vai trò (roles)"""
+    from app.utils.init_roles import init_roles
+
+    init_roles()
+    print("Roles initialized.")
+
+@click.command()
+@with_appcontext
+def forge():
+    """Generate fake data for testing"""
+    from app.models.user import User
+    from app.models.event import Event
+    from app.models.booking import Booking
+    from app.models.ticket import Ticket
+    from app.extensions import db
+
+    users = User.generate_fake_data(count=10)
+    db.session.add_all(users)
+    db.session.commit()
+
+    events = Event.generate_fake_data(count=10)
+    db.session.add_all(events)
+    db.session.commit()
+
+    bookings = Booking.generate_fake_data(count=10)
+    db.session.add_all(bookings)
+    db.session.commit()
+
+    tickets = Ticket.generate_fake_data(count=10)
+    db.session.add_all(tickets)
+    db.session.commit()
+
+    print("Fake data generated successfully")
+
+@click.command("benchmark-mail")
+@click.option("--count", default=2000, help="Number of recipients to render for")
+@with_appcontext
+def benchmark_mail(count):
+    """Measure email renders per second per worker, full vs pre-rendered"""
+    import time
+    from datetime import datetime
+    from flask import render_template
+    from app.utils.mail_templates import MailTemplateRenderer
+
+    template_name = "mail/event_announcement.html"
+    shared_context = {
+        "event": {
+            "title": "Benchmark Concert",
+            "description": "An evening of music. " * 20,
+            "venue": "Hanoi Opera House",
+            "event_date": datetime.utcnow(),
+            "price": 25.0,
+        },
+        "custom_message": "Early bird tickets are on sale now.",
+        "event_url": "https://example.com/events/1",
+        "year": datetime.utcnow().year,
+    }
+    recipients = [
+        {"user": {"email": f"user{i}@example.com", "username": f"user{i}"}}
+        for i in range(count)
+    ]
+
+    start = time.perf_counter()
+    for recipient in recipients:
+        render_template(template_name, **shared_context, **recipient)
+    full = count / (time.perf_counter() - start)
+
+    renderer = MailTemplateRenderer()
+    start = time.perf_counter()
+    template = renderer.prepare(template_name, shared_context, ["user"])
+    for recipient in recipients:
+        template.render(recipient)
+    prepared = count / (time.perf_counter() - start)
+
+    print(f"{template_name}, {count} recipients")
+    print(f"render_template:  {full:,.0f} renders/s")
+    print(f"pre-rendered:     {prepared:,.0f} renders/s ({prepared / full:.1f}x)")
+
+@click.command("relay-outbox")
+@click.option("--batch-size", type=int, help="Outbox rows published per round")
+@click.option("--once", is_flag=True, help="Publish what is pending and exit")
+@click.option("--requeue-dead", is_flag=True, help="Give dead-lettered rows another round of attempts first")
+@with_appcontext
+def relay_outbox(batch_size, once, requeue_dead):
+    """Publish pending outbox rows to Celery until stopped"""
+    import time
+    from app.extensions import db
+    from app.services.outbox_service import OutboxService
+
+    if requeue_dead:
+        print(f"Requeued {OutboxService.requeue_dead()} dead-lettered outbox messages")
+    batch_size = batch_size or current_app.config["OUTBOX_BATCH_SIZE"]
+    interval = current_app.config["OUTBOX_POLL_INTERVAL"]
+    while True:
+        try:
+            published = OutboxService.relay(batch_size)
+        except Exception as e:
+            current_app.logger.error(f"Outbox relay error: {e}")
+            db.session.rollback()
+            published = 0
+        if published:
+            print(f"Published {published} outbox messages")
+        if once and published < batch_size:
+            break
+        # Keep draining while batches come back full
+        if published < batch_size:
+            time.sleep(interval)
+
+@click.command("fake-gateway")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8081)
+@click.option("--latency", default=0.0, help="Seconds to wait before each answer")
+@click.option("--failure-rate", default=0.0, help="Share of requests (0-1) answered with 503")
+def fake_gateway(host, port, latency, failure_rate):
+    """Serve a local fake payment gateway for PAYMENT_GATEWAY=http"""
+    from app.utils.fake_gateway import create_fake_gateway
+
+    create_fake_gateway(latency=latency, failure_rate=failure_rate).run(host=host, port=port, threaded=True)
+
+@click.command("fake-smtp")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8025)
+@click.option("--connect-latency", default=0.0, help="Seconds to wait before greeting each session")
+@click.option("--message-latency", default=0.0, help="Seconds to wait before accepting each message")
+def fake_smtp(host, port, connect_latency, message_latency):
+    """Serve a local fake SMTP server (MAIL_USE_TLS=false, no MAIL_USERNAME)"""
+    from app.utils.fake_smtp import FakeSMTPServer
+
+    server = FakeSMTPServer((host, port), connect_latency=connect_latency, message_latency=message_latency)
+    print(f"Fake SMTP server listening on {host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+@click.command("benchmark-mail-delivery")
+@click.option("--count", default=500, help="Messages to send")
+@click.option("--workers", default=4, help="Sending threads, as in one worker process")
+@click.option("--connect-latency", default=0.05, help="Seconds each new SMTP session costs")
+@with_appcontext
+def benchmark_mail_delivery(count, workers, connect_latency):
+    """
+    Measure messages sent per second, one session per message vs pooled
+
+    Sends real SMTP traffic to an in-process fake server instead of relying
+    on MAIL_SUPPRESS_SEND, which skips the network and so hides what the
+    pool saves. The mail settings are pointed at the fake server for the
+    run and restored afterwards.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from flask_mail import Message
+    from app.extensions import mail
+    from app.services.mail_delivery_service import mail_pool
+    from app.utils.fake_smtp import FakeSMTPServer
+
+    app = current_app._get_current_object()
+    server = FakeSMTPServer(connect_latency=connect_latency).start()
+    overrides = {
+        "MAIL_SERVER": "127.0.0.1", "MAIL_PORT": server.port, "MAIL_USE_TLS": False,
+        "MAIL_USE_SSL": False, "MAIL_USERNAME": None, "MAIL_SUPPRESS_SEND": False,
+        "MAIL_POOL_SIZE": workers,
+    }
+    saved = {key: app.config.get(key) for key in overrides}
+    app.config.update(overrides)
+    mail.init_app(app)
+
+    def message(i):
+        return Message(subject="Benchmark", recipients=[f"user{i}@example.com"],
+                       sender="bench@example.com", html="<p>Hello</p>" * 50)
+
+    def run(send):
+        def task(i):
+            with app.app_context():
+                send(message(i))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(task, range(count)))
+        return count / (time.perf_counter() - start)
+
+    def send_unpooled(msg):
+        with mail.connect() as connection:
+            connection.send(msg)
+
+    def send_pooled(msg):
+        with mail_pool.connection() as connection:
+            connection.send(msg)
+
+    try:
+        unpooled = run(send_unpooled)
+        sessions = server.sessions
+        pooled = run(send_pooled)
+        mail_pool.close_all()
+        print(f"{count} messages, {workers} threads, {connect_latency * 1000:.0f} ms per new session")
+        print(f"session per message: {unpooled:,.0f} msg/s ({sessions} sessions)")
+        print(f"pooled:              {pooled:,.0f} msg/s ({server.sessions - sessions} sessions) "
+              f"({pooled / unpooled:.1f}x)")
+        print(f"delivered:           {len(server.messages)} of {count * 2}")
+    finally:
+        app.config.update(saved)
+        mail.init_app(app)
+        server.stop()
+
+@click.command("benchmark-inventory")
+@click.option("--buyers", default=1000, help="Concurrent buyers, one seat each")
+@click.option("--seats", default=800, help="Seats on sale")
+@click.option("--sql/--no-sql", default=True, help="Also measure the old row-lock UPDATE on events")
+@with_appcontext
+def benchmark_inventory(buyers, seats, sql):
+    """
+    Measure seat reservations under contention for one hot event
+
+    Compares the old row-lock UPDATE on events with the Redis ledger that
+    replaced it. Redis runs each reservation script to completion on one
+    thread, so splitting an event's ledger over several keys on the same
+    instance would add round trips without adding concurrency; measure
+    here against the deployment's Redis before reaching for that.
+    """
+    import statistics
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime, timedelta
+    from app.extensions import db
+    from app.models.event import Event
+    from app.services.inventory_service import InventoryService, DIRTY_EVENTS_KEY
+    from app.utils.redis_client import redis_client
+
+    app = current_app._get_current_object()
+
+    def run(reserve):
+        """Start every buyer at once; return (sold, seconds, latencies in ms)"""
+        barrier = threading.Barrier(buyers)
+
+        def buyer(_):
+            with app.app_context():
+                barrier.wait()
+                start = time.perf_counter()
+                try:
+                    sold = reserve()
+                except Exception:
+                    sold = False
+                return sold, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=buyers) as pool:
+            results = list(pool.map(buyer, range(buyers)))
+        elapsed = time.perf_counter() - start
+        return sum(sold for sold, _ in results), elapsed, sorted(latency for _, latency in results)
+
+    def report(label, sold, elapsed, latencies, remaining):
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        oversold = "" if sold == min(buyers, seats) and remaining == seats - sold else "  MISMATCH"
+        print(
+            f"{label:<22} {buyers / elapsed:>9,.0f} buyers/s  p50 {statistics.median(latencies):7.2f} ms"
+            f"  p99 {p99:7.2f} ms  sold {sold}/{seats}, {remaining} left{oversold}"
+        )
+
+    # A scratch event the benchmark creates and deletes again
+    event = Event(
+        title="Inventory benchmark", description="", venue="-",
+        event_date=datetime.utcnow() + timedelta(days=365),
+        total_tickets=seats, price=0, status="draft",
+    )
+    db.session.add(event)
+    db.session.commit()
+    event_id = event.id
+    print(f"{buyers} concurrent buyers, {seats} seats")
+
+    try:
+        if sql:
+            def reserve_row():
+                updated = db.session.execute(
+                    db.update(Event)
+                    .where(Event.id == event_id, Event.available_tickets >= 1)
+                    .values(available_tickets=Event.available_tickets - 1)
+                ).rowcount
+                db.session.commit()
+                return updated == 1
+
+            sold, elapsed, latencies = run(reserve_row)
+            db.session.expire_all()
+            report("events row (UPDATE)", sold, elapsed, latencies, db.session.get(Event, event_id).available_tickets)
+            event = db.session.get(Event, event_id)
+            event.available_tickets = seats
+            db.session.commit()
+
+        InventoryService.evict(event_id)
+        InventoryService.warm(event)
+        sold, elapsed, latencies = run(lambda: InventoryService.reserve(event_id, 1))
+        report("ledger (Lua script)", sold, elapsed, latencies, InventoryService.get_available(event))
+    finally:
+        InventoryService.evict(event_id)
+        redis_client.srem(DIRTY_EVENTS_KEY, event_id)
+        db.session.delete(db.session.get(Event, event_id))
+        db.session.commit()
+
+@click.command("benchmark-search")
+@click.option("--events", default=1_000_000, help="Events in the scratch catalog")
+@click.option("--repeat", default=5, help="Runs per query; the median is reported")
+@with_appcontext
+def benchmark_search(events, repeat):
+    """
+    Compare event search through the FTS5 index with ILIKE substring scans
+
+    Builds a throwaway SQLite catalog in a temporary file, so the app's
+    database is never touched, and times the first page of events.list for
+    a common word, a rare word and a miss. The ILIKE side is the search the
+    index replaced: the whole term against title or venue.
+    """
+    import os
+    import random
+    import statistics
+    import tempfile
+    import time
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.extensions import db
+    from app.models.event import Event
+    from app.utils.search import FTS_TABLE, search_events
+
+    vocabulary = [f"word{i}" for i in range(5000)]
+    common, rare = "festival", "zyxwvut"
+    path = os.path.join(tempfile.mkdtemp(), "search.sqlite")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Event.__table__.create(engine)
+        started = time.perf_counter()
+        start_date = datetime.utcnow()
+        with engine.begin() as connection:
+            for offset in range(0, events, 10_000):
+                rows = []
+                for i in range(offset, min(offset + 10_000, events)):
+                    words = random.choices(vocabulary, k=30)
+                    # Marker words go in the title, which both searches cover
+                    if i % 10 == 0:
+                        words.insert(0, common)
+                    if i == events // 2:
+                        words.insert(0, rare)
+                    rows.append({
+                        "title": " ".join(words[:4]), "venue": " ".join(words[4:6]),
+                        "description": " ".join(words[6:]), "category": "Music",
+                        "status": "active", "event_date": start_date + timedelta(minutes=i),
+                        "total_tickets": 100, "available_tickets": 100, "price": 10.0,
+                    })
+                connection.execute(Event.__table__.insert(), rows)
+            connection.exec_driver_sql(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, venue, description, category) "
+                "SELECT id, title, venue, description, category FROM events"
+            )
+        print(f"{events:,} events built in {time.perf_counter() - started:.0f} s")
+
+        session = Session(engine)
+        base = session.query(Event).filter(Event.event_date >= start_date)
+
+        def page(query):
+            return query.order_by(Event.event_date, Event.id).limit(11).all()
+
+        def measure(search, term):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                found = len(page(search(term)))
+                timings.append(time.perf_counter() - start)
+            return found, statistics.median(timings) * 1000
+
+        print(f"{'term':<12}{'rows':>6}{'ILIKE ms':>12}{'FTS5 ms':>12}")
+        for term in (common, rare, "nomatch"):
+            found, scan = measure(lambda t: base.filter(db.or_(
+                Event.title.ilike(f"%{t}%"), Event.venue.ilike(f"%{t}%"),
+            )), term)
+            _, indexed = measure(lambda t: search_events(base, t), term)
+            print(f"{term:<12}{found:>6}{scan:>12.1f}{indexed:>12.1f}")
+        session.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+def register_commands(app):
+    """Register the project's flask CLI commands"""
+    for command in (
+        initroles, forge, benchmark_mail, relay_outbox, fake_gateway,
+        benchmark_inventory, fake_smtp, benchmark_mail_delivery, benchmark_search,
+    ):
+        app.cli.add_command(command)
@@ -21,10 +21,50 @@ class Config:
     # Redis
     REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379')
     
+    # Cached pages for anonymous visitors, invalidated by the catalog version
+    PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 300))
+    
     # Celery
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND')
     
+    # Reports
+    REPORT_DIR = os.getenv('REPORT_DIR') or os.path.join(basedir, 'instance', 'reports')
+    
+    # Outbox relay
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 100))
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 0.5))  # Seconds to wait when the outbox is empty
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))  # Failed publishes before a row is dead-lettered
+    
+    # Booking
+    BOOKING_HOLD_SECONDS = int(os.getenv('BOOKING_HOLD_SECONDS', 600))
+    
+    # Waiting room for on-sale spikes, opened per event by an admin
+    WAITING_ROOM_ADMIT_RATE = float(os.getenv('WAITING_ROOM_ADMIT_RATE', 5))  # Buyers let through per second
+    WAITING_ROOM_OVERSUBSCRIBE = float(os.getenv('WAITING_ROOM_OVERSUBSCRIBE', 1.5))  # Admitted buyers per available seat
+    WAITING_ROOM_ADMISSION_SECONDS = int(os.getenv('WAITING_ROOM_ADMISSION_SECONDS', 600))  # Time to book once admitted
+    WAITING_ROOM_CLAIM_SECONDS = int(os.getenv('WAITING_ROOM_CLAIM_SECONDS', 30))  # Time for an admitted buyer's page to notice
+    
+    # Rate limits on login, registration and booking (policies in app/utils/rate_limit.py)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', 0))  # Trusted proxies in front of the app setting X-Forwarded-For
+    
+    # Node id (0-1023) for booking/ticket numbers; leased from Redis when unset
+    ID_NODE_ID = os.getenv('ID_NODE_ID')
+    
+    # Payments: 'mock' approves in-process, 'http' calls PAYMENT_GATEWAY_URL
+    # (run `flask fake-gateway` for a local stand-in)
+    PAYMENT_GATEWAY = os.getenv('PAYMENT_GATEWAY', 'mock')
+    PAYMENT_GATEWAY_URL = os.getenv('PAYMENT_GATEWAY_URL', 'http://payment_gateway:8081')
+    PAYMENT_GATEWAY_KEY = os.getenv('PAYMENT_GATEWAY_KEY')
+    PAYMENT_CURRENCY = os.getenv('PAYMENT_CURRENCY', 'USD')
+    PAYMENT_POOL_SIZE = int(os.getenv('PAYMENT_POOL_SIZE', 10))  # Kept-alive gateway connections per worker process
+    PAYMENT_CONNECT_TIMEOUT = float(os.getenv('PAYMENT_CONNECT_TIMEOUT', 3))
+    PAYMENT_READ_TIMEOUT = float(os.getenv('PAYMENT_READ_TIMEOUT', 10))
+    PAYMENT_BREAKER_THRESHOLD = int(os.getenv('PAYMENT_BREAKER_THRESHOLD', 5))  # Failures in a row that open the breaker
+    PAYMENT_BREAKER_RESET_SECONDS = int(os.getenv('PAYMENT_BREAKER_RESET_SECONDS', 30))
+    PAYMENT_PENDING_TIMEOUT = int(os.getenv('PAYMENT_PENDING_TIMEOUT', 300))  # Pending payments older than this are failed by the expiry sweep
+    
     # # Stripe
     # STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
     # STRIPE_PUBLIC_KEY = os.getenv('STRIPE_PUBLIC_KEY')
@@ -36,6 +76,10 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
+    MAIL_POOL_SIZE = int(os.getenv('MAIL_POOL_SIZE', 4))  # Open SMTP sessions per worker process
+    MAIL_POOL_IDLE_SECONDS = int(os.getenv('MAIL_POOL_IDLE_SECONDS', 60))
+    MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 100))  # Messages per send_email_batch task
+    MAIL_TEMPLATE_CACHE_SIZE = int(os.getenv('MAIL_TEMPLATE_CACHE_SIZE', 64))  # Pre-rendered templates per worker
     
     #Admin
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME')
@@ -50,6 +94,9 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    SQL_QUERY_BUDGET_STRICT = True
+    MAIL_SUPPRESS_SEND = True
+    RATE_LIMIT_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
 config = {
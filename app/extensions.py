@@ -11,24 +11,36 @@ login_manager = LoginManager()
 csrf = CSRFProtect()
 celery = Celery('app')
 
+# Task modules are imported by the worker at startup rather than here,
+# so the web process and short-lived scripts never pay for them
+TASK_MODULES = [
+    'app.celery.tasks.booking_tasks',
+    'app.celery.tasks.email_tasks',
+    'app.celery.tasks.payment_tasks',
+]
+
 def init_celery(app=None):
     """Initialize Celery with Flask app context"""
     if not app:
         return
 
+    from app.celery.routing import configure_routing
+    from app.celery.schedule import BEAT_SCHEDULE
+
     celery.conf.update(
         broker_url=app.config['CELERY_BROKER_URL'],
         result_backend=app.config['CELERY_RESULT_BACKEND'],
-        imports=[
-            'app.celery.tasks.booking_tasks',
-            'app.celery.tasks.notification_tasks'
-        ]
+        imports=TASK_MODULES,
+        beat_schedule=BEAT_SCHEDULE
     )
 
+    # Separate queues for booking-critical, email and reporting tasks
+    configure_routing(celery)
+
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
             with app.app_context():
-                return self.run(*args, **kwargs)
+                return super().__call__(*args, **kwargs)
 
     celery.Task = ContextTask
-    return celery 
\ No newline at end of file
+    return celery
@@ -0,0 +1,86 @@
+import importlib
+import logging
+import os
+import time
+from flask import Flask
+from app.config import config
+from app.extensions import mail, csrf, login_manager, init_celery
+from app.utils.database import init_db
+from app.utils.filters import register_filters
+from app.utils.rate_limit import init_rate_limits
+
+logger = logging.getLogger(__name__)
+
+# (module, blueprint attribute, url prefix); imported only when registered
+BLUEPRINTS = {
+    "main": ("app.routes.main", "main_bp", None),
+    "auth": ("app.routes.auth", "auth_bp", "/auth"),
+    "events": ("app.routes.events", "events_bp", "/events"),
+    "booking": ("app.routes.booking", "booking_bp", "/booking"),
+    "admin": ("app.routes.admin", "admin_bp", "/admin"),
+}
+
+
+def register_blueprints(app, names=None):
+    """Import and register the named blueprints, or all of them"""
+    for name in names if names is not None else BLUEPRINTS:
+        module_name, attribute, url_prefix = BLUEPRINTS[name]
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+
+def create_app(config_name=None, blueprints=None):
+    """
+    Create Flask application
+
+    Args:
+        config_name (str, optional): Key of app.config.config; defaults to FLASK_ENV
+        blueprints (iterable, optional): Names of the blueprints to register;
+            all of them by default. Celery workers only need the ones their
+            email templates build URLs for.
+
+    Returns:
+        Flask: Configured application
+    """
+    started = time.perf_counter()
+    app = Flask(__name__,
+                template_folder="templates",
+                static_folder="static",
+                root_path=os.path.dirname(__file__))
+
+    if config_name is None:
+        config_name = os.getenv("FLASK_ENV", "development")
+    app.config.from_object(config[config_name])
+
+    # Initialize extensions
+    init_db(app)
+    mail.init_app(app)
+    csrf.init_app(app)
+    login_manager.init_app(app)
+    init_celery(app)
+
+    from app.models.user import AnonymousUser, User
+
+    login_manager.login_view = "auth.login"
+    login_manager.anonymous_user = AnonymousUser
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return User.query.get(int(user_id))
+
+    # Register filters
+    register_filters(app)
+
+    # Before the blueprints, so throttled requests never reach the auth
+    # hook that loads the user
+    init_rate_limits(app)
+
+    # Register blueprints
+    register_blueprints(app, blueprints)
+
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+
+    logger.info(f"App created in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return app
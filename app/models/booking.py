@@ -1,13 +1,30 @@
 from datetime import datetime
-import uuid
 from random import randint
 from app.utils.database import db
+from app.utils.id_generator import generate_number
 from app.models.user import User
 from app.models.event import Event
 from app.models.payment import Payment
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        db.Index('ix_bookings_status_payment_created', 'status', 'payment_status', 'created_at'),
+        db.Index('ix_bookings_user_created', 'user_id', 'created_at'),
+        db.Index('ix_bookings_event_status', 'event_id', 'status'),
+        # Partial index covering only bookings still waiting for payment
+        db.Index(
+            'ix_bookings_pending_created', 'created_at',
+            postgresql_where=db.text("status = 'pending' AND payment_status = 'pending'"),
+            sqlite_where=db.text("status = 'pending' AND payment_status = 'pending'"),
+        ),
+        # Partial index covering only confirmed bookings still owed a reminder
+        db.Index(
+            'ix_bookings_reminder_due', 'event_id',
+            postgresql_where=db.text("status = 'confirmed' AND reminder_sent_at IS NULL"),
+            sqlite_where=db.text("status = 'confirmed' AND reminder_sent_at IS NULL"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     booking_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -18,6 +35,7 @@ class Booking(db.Model):
     status = db.Column(db.String(20), default='pending')  # pending, confirmed, cancelled
     payment_status = db.Column(db.String(20), default='pending')  # pending, paid, refunded
     payment_id = db.Column(db.String(100))
+    reminder_sent_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -34,8 +52,8 @@ class Booking(db.Model):
 
     @staticmethod
     def generate_booking_number():
-        """Generate unique booking number"""
-        return f"BKG-{uuid.uuid4().hex[:8].upper()}"
+        """Generate unique, time-ordered booking number"""
+        return generate_number('BKG')
 
     def confirm(self):
         """Confirm booking"""
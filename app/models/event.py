@@ -1,9 +1,14 @@
 from datetime import datetime
+from sqlalchemy import DDL, event
 from app.utils.database import db
+from app.utils.search import CREATE_FTS_TABLE, sync_event_document, remove_event_document
 
 
 class Event(db.Model):
     __tablename__ = "events"
+    __table_args__ = (
+        db.Index("ix_events_date_active", "event_date", "is_active"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -112,3 +117,29 @@ class Event(db.Model):
 
     def __repr__(self):
         return f"<Event {self.title}>"
+
+
+# Keep the full-text search index in sync with the events table
+event.listen(
+    Event.__table__, "after_create", DDL(CREATE_FTS_TABLE).execute_if(dialect="sqlite")
+)
+
+
+SEARCHABLE_FIELDS = ("title", "venue", "description", "category")
+
+
+@event.listens_for(Event, "after_insert")
+def _index_event(mapper, connection, target):
+    sync_event_document(connection, target)
+
+
+@event.listens_for(Event, "after_update")
+def _reindex_event(mapper, connection, target):
+    state = db.inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in SEARCHABLE_FIELDS):
+        sync_event_document(connection, target)
+
+
+@event.listens_for(Event, "after_delete")
+def _unindex_event(mapper, connection, target):
+    remove_event_document(connection, target.id)
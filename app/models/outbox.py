@@ -0,0 +1,43 @@
+from datetime import datetime
+from kombu.utils.json import dumps, loads
+from app.utils.database import db
+
+
+class OutboxMessage(db.Model):
+    """A Celery task to publish, written in the same transaction as the change that caused it"""
+    __tablename__ = 'outbox_messages'
+    __table_args__ = (
+        # Partial index covering only messages the relay still has to publish
+        db.Index(
+            'ix_outbox_messages_pending', 'id',
+            postgresql_where=db.text('published_at IS NULL AND dead_at IS NULL'),
+            sqlite_where=db.text('published_at IS NULL AND dead_at IS NULL'),
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    published_at = db.Column(db.DateTime)
+    # Set once OUTBOX_MAX_ATTEMPTS publishes failed; the relay skips the row
+    dead_at = db.Column(db.DateTime)
+
+    def __init__(self, task_name, args=None, kwargs=None):
+        self.task_name = task_name
+        # Same JSON encoding as the Celery messages, so dates survive the trip
+        self.payload = dumps({'args': list(args or ()), 'kwargs': kwargs or {}})
+
+    @property
+    def task_id(self):
+        """Stable Celery task id, so a message published twice is recognisable"""
+        return f'outbox-{self.id}'
+
+    def get_args(self):
+        payload = loads(self.payload)
+        return payload['args'], payload['kwargs']
+
+    def __repr__(self):
+        return f'<OutboxMessage {self.id} {self.task_name}>'
@@ -4,10 +4,23 @@ from datetime import datetime
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_booking_id', 'booking_id'),
+        # At most one payment in flight per booking, so a double submit
+        # cannot start a second charge
+        db.Index(
+            'ix_payments_booking_pending', 'booking_id', unique=True,
+            postgresql_where=db.text("status = 'pending'"),
+            sqlite_where=db.text("status = 'pending'"),
+        ),
+    )
     id = db.Column(db.String(64), primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, paid, refunded, failed
     method = db.Column(db.String(20), default='card')
+    gateway_reference = db.Column(db.String(64))  # Charge id at the payment gateway
+    failure_reason = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    refunded_at = db.Column(db.DateTime, nullable=True)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    refunded_at = db.Column(db.DateTime, nullable=True)
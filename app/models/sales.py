@@ -0,0 +1,25 @@
+from app.utils.database import db
+
+
+class DailyEventSales(db.Model):
+    """Per-day, per-event booking totals, bucketed by booking creation date"""
+    __tablename__ = 'daily_event_sales'
+
+    sales_date = db.Column(db.Date, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    bookings_created = db.Column(db.Integer, nullable=False, default=0)
+    bookings_confirmed = db.Column(db.Integer, nullable=False, default=0)
+    bookings_cancelled = db.Column(db.Integer, nullable=False, default=0)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    COUNTERS = (
+        'bookings_created',
+        'bookings_confirmed',
+        'bookings_cancelled',
+        'tickets_sold',
+        'revenue',
+    )
+
+    def __repr__(self):
+        return f'<DailyEventSales {self.sales_date} event={self.event_id}>'
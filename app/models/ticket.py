@@ -1,11 +1,16 @@
 from datetime import datetime
-import uuid
 from app.utils.database import db
+from app.utils.id_generator import generate_number, generate_numbers
 from app.models.booking import Booking
 from random import randint
 
+QR_CODE_URL = "https://api.qrserver.com/v1/create-qr-code/?size=150x150&data="
+
 class Ticket(db.Model):
     __tablename__ = 'tickets'
+    __table_args__ = (
+        db.Index('ix_tickets_booking_id', 'booking_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     ticket_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -24,14 +29,24 @@ class Ticket(db.Model):
 
     @staticmethod
     def generate_ticket_number():
-        """Generate unique ticket number"""
-        return f"TKT-{uuid.uuid4().hex[:8].upper()}"
+        """Generate unique, time-ordered ticket number"""
+        return generate_number('TKT')
 
-    def generate_qr_code(self):
-        """Generate QR code for ticket"""
+    @staticmethod
+    def generate_ticket_numbers(count):
+        """Generate `count` ascending ticket numbers in one call"""
+        return generate_numbers('TKT', count)
+
+    @staticmethod
+    def build_qr_code(ticket_number):
+        """Build the QR code URL for a ticket number"""
         # In a real application, you would use a QR code generation library
         # and possibly store the QR code image in a cloud storage
-        self.qr_code = f"https://api.qrserver.com/v1/create-qr-code/?size=150x150&data={self.ticket_number}"
+        return f"{QR_CODE_URL}{ticket_number}"
+
+    def generate_qr_code(self):
+        """Generate QR code for ticket"""
+        self.qr_code = self.build_qr_code(self.ticket_number)
 
     def mark_as_used(self):
         """Mark ticket as used"""
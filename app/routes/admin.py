@@ -1,30 +1,46 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 from flask_login import current_user, login_required
 from app.models.user import User
 from app.models.event import Event
 from app.models.booking import Booking
 from app.models.role import Role
+from app.models.sales import DailyEventSales
 from app.utils.database import db, commit_changes
 from app.utils.decorators import permission_required, admin_required
 from app.utils.permissions import Permission
+from app.utils.search import search_events
+from app.utils.pagination import keyset_paginate
+from app.utils.query_budget import query_budget
+from app.utils.query_profiles import booking_with_event_and_user, user_with_role
 from app.services.email_service import EmailService
+from app.services.campaign_service import CampaignService
+from app.services.waiting_room_service import WaitingRoomService
+from app.utils.cache import bump_catalog_version
 from app.extensions import csrf
 from datetime import datetime, timedelta
-from app.celery.tasks.email_tasks import send_email_notification
 
 admin_bp = Blueprint("admin", __name__)
 
 
 @admin_bp.route("/dashboard")
 @permission_required(Permission.VIEW_DASHBOARD)
+@query_budget(6)
 def dashboard():
-    # Get basic statistics
+    # Get basic statistics; booking totals come from the daily sales rollup
     total_users = User.query.count()
     total_events = Event.query.count()
-    total_bookings = Booking.query.count()
+    total_bookings, total_revenue = db.session.query(
+        db.func.coalesce(db.func.sum(DailyEventSales.bookings_created), 0),
+        db.func.coalesce(db.func.sum(DailyEventSales.revenue), 0),
+    ).one()
 
     # Get recent bookings
-    recent_bookings = Booking.query.order_by(Booking.created_at.desc()).limit(5).all()
+    recent_bookings = (
+        Booking.query.options(*booking_with_event_and_user())
+        .order_by(Booking.created_at.desc())
+        .limit(5)
+        .all()
+    )
 
     # Get upcoming events
     upcoming_events = (
@@ -34,14 +50,6 @@ def dashboard():
         .all()
     )
 
-    # Calculate revenue
-    total_revenue = (
-        db.session.query(db.func.sum(Booking.total_amount))
-        .filter(Booking.status == "confirmed")
-        .scalar()
-        or 0
-    )
-
     return render_template(
         "admin/dashboard.html",
         total_users=total_users,
@@ -59,59 +67,102 @@ def dashboard():
 @admin_bp.route("/events")
 @permission_required(Permission.MANAGE_EVENTS)
 def events():
-    page = request.args.get("page", 1, type=int)
     per_page = 10
     search = request.args.get("search", "").strip()
 
     query = Event.query
 
     if search:
-        query = query.filter(Event.title.ilike(f"%{search}%"))
+        query = search_events(query, search)
 
-    pagination = query.order_by(Event.event_date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    pagination = keyset_paginate(
+        query,
+        (Event.event_date, Event.id),
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        per_page=per_page,
+        descending=True,
     )
     events = pagination.items
+    waiting_rooms = WaitingRoomService.open_event_ids([event.id for event in events])
 
     return render_template(
         "admin/events.html",
         events=events,
         pagination=pagination,
+        waiting_rooms=waiting_rooms,
         search=search,  # để giữ lại giá trị trong ô tìm kiếm
     )
 
 
+@admin_bp.route("/events/<int:event_id>/waiting-room", methods=["POST"])
+@permission_required(Permission.MANAGE_EVENTS)
+def toggle_waiting_room(event_id):
+    event = Event.query.get_or_404(event_id)
+    if WaitingRoomService.is_open(event.id):
+        WaitingRoomService.close(event.id)
+        flash(f"Waiting room for {event.title} closed; booking is open to everyone.", "success")
+    else:
+        rate = request.form.get("rate", type=float)
+        WaitingRoomService.open(event, rate=rate)
+        flash(f"Waiting room for {event.title} opened.", "success")
+    # The event page tells visitors about the queue
+    bump_catalog_version()
+    return redirect(request.referrer or url_for("admin.events"))
+
+
 @admin_bp.route("/bookings")
 @permission_required(Permission.VIEW_ALL_BOOKINGS)
+@query_budget(3)
 def bookings():
-    bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-    return render_template("admin/bookings.html", bookings=bookings)
+    pagination = keyset_paginate(
+        Booking.query.options(*booking_with_event_and_user()),
+        (Booking.created_at, Booking.id),
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        per_page=50,
+        descending=True,
+    )
+
+    # Per-status totals for the summary cards, counted in SQL
+    status_counts = dict(
+        db.session.query(Booking.status, db.func.count(Booking.id))
+        .group_by(Booking.status)
+        .all()
+    )
+
+    return render_template(
+        "admin/bookings.html",
+        bookings=pagination.items,
+        pagination=pagination,
+        status_counts=status_counts,
+    )
 
 
 @admin_bp.route("/reports")
 @permission_required(Permission.VIEW_REPORTS)
 def reports():
     # Get date range
-    end_date = datetime.now()
+    end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=30)
 
-    # Daily bookings
+    # Daily bookings, read from the daily sales rollup
     daily_bookings = (
         db.session.query(
-            db.func.date(Booking.created_at).label("date"),
-            db.func.count(Booking.id).label("count"),
+            DailyEventSales.sales_date.label("date"),
+            db.func.sum(DailyEventSales.bookings_created).label("count"),
         )
-        .filter(Booking.created_at.between(start_date, end_date))
-        .group_by(db.func.date(Booking.created_at))
+        .filter(DailyEventSales.sales_date.between(start_date, end_date))
+        .group_by(DailyEventSales.sales_date)
+        .order_by(DailyEventSales.sales_date)
         .all()
     )
 
     # Revenue by event
     revenue_by_event = (
-        db.session.query(Event.name, db.func.sum(Booking.total_amount).label("revenue"))
-        .join(Booking, Event.id == Booking.event_id)
-        .filter(Booking.status == "confirmed")
-        .group_by(Event.id)
+        db.session.query(Event.title, db.func.sum(DailyEventSales.revenue).label("revenue"))
+        .join(DailyEventSales, Event.id == DailyEventSales.event_id)
+        .group_by(Event.id, Event.title)
         .all()
     )
 
@@ -130,9 +181,17 @@ def user_detail(user_id):
 @admin_bp.route('/users')
 @login_required
 @admin_required
+@query_budget(2)
 def list_users():
-    users = User.query.all()
-    return render_template('admin/users/list.html', users=users)
+    pagination = keyset_paginate(
+        User.query.options(*user_with_role()),
+        (User.created_at, User.id),
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=50,
+        descending=True,
+    )
+    return render_template('admin/users/list.html', users=pagination.items, pagination=pagination)
 
 @admin_bp.route('/users/<int:user_id>')
 @login_required
@@ -180,7 +239,9 @@ def delete_user(user_id):
 def bulk_email_form():
     users = User.query.all()
     events = Event.query.filter(Event.event_date >= datetime.now()).all()
-    return render_template('admin/users/bulk_email.html', users=users, events=events)
+    campaign_id = request.args.get('campaign')
+    campaign = CampaignService.progress(campaign_id) if campaign_id else None
+    return render_template('admin/users/bulk_email.html', users=users, events=events, campaign=campaign)
 
 @admin_bp.route('/send-bulk-email', methods=['POST'])
 @login_required
@@ -203,35 +264,26 @@ def send_bulk_email():
     # Tạo event URL trước khi gửi email
     event_url = url_for('events.detail', event_id=event.id, _external=True)
     
-    success_count = 0
-    fail_count = 0
-    
-    for user_id in selected_users:
-        user = User.query.get(user_id)
-        if user:
-            context = {
-                'user': user.to_dict(),
-                'event': event.to_dict(),
-                'custom_message': custom_message,
-                'event_url': event_url  # Thêm URL vào context
-            }
-            
-            # Gửi email thông qua Celery task
-            result = send_email_notification.delay(
-                recipient_email=user.email,
-                subject=f"New Event Announcement: {event.title}",
-                template_name='mail/event_announcement.html',
-                context=context
-            )
-            
-            if result.get():
-                success_count += 1
-            else:
-                fail_count += 1
+    # Queue the campaign; users are loaded and emailed by Celery workers
+    campaign_id = CampaignService.start(
+        selected_users,
+        subject=f"New Event Announcement: {event.title}",
+        template_name='mail/event_announcement.html',
+        context={
+            'event': event.to_dict(),
+            'custom_message': custom_message,
+            'event_url': event_url  # Thêm URL vào context
+        }
+    )
     
-    if success_count > 0:
-        flash(f'Successfully sent {success_count} emails', 'success')
-    if fail_count > 0:
-        flash(f'Failed to send {fail_count} emails', 'error')
-        
-    return redirect(url_for('admin.bulk_email_form'))
+    flash(f'Queued emails to {len(selected_users)} users (campaign {campaign_id})', 'success')
+    return redirect(url_for('admin.bulk_email_form', campaign=campaign_id))
+
+@admin_bp.route('/campaigns/<campaign_id>')
+@login_required
+@admin_required
+def campaign_status(campaign_id):
+    progress = CampaignService.progress(campaign_id)
+    if progress is None:
+        abort(404)
+    return progress
@@ -4,10 +4,12 @@ from flask import current_app
 from app.models.user import User
 from app.forms.auth import LoginForm, RegistrationForm
 from app.services.auth_service import AuthService
+from app.utils.rate_limit import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@rate_limit('login')
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
@@ -23,6 +25,7 @@ def login():
     return render_template('auth/login.html', form=form)
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
+@rate_limit('register')
 def register():
     """Handle user registration"""
     if current_user.is_authenticated:
@@ -53,11 +56,16 @@ def logout():
     flash('You have been logged out.', 'info')
     return redirect(url_for('main.index'))
 
+# Endpoints that never need a confirmed account. Checked before
+# current_user is touched, so polled endpoints answered from Redis alone
+# do not load the user from the database on every request.
+UNCONFIRMED_EXEMPT_ENDPOINTS = {'static', 'booking.waiting_room_status'}
+
 @auth_bp.before_app_request
 def before_request():
-    if current_user.is_authenticated and not current_user.is_confirmed \
-        and request.blueprint != 'auth' \
-        and request.endpoint != 'static':
+    if request.blueprint == 'auth' or request.endpoint in UNCONFIRMED_EXEMPT_ENDPOINTS:
+        return
+    if current_user.is_authenticated and not current_user.is_confirmed:
         return redirect(url_for('auth.unconfirmed'))
 
 @auth_bp.route('/confirm/<token>')
@@ -1,14 +1,22 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, session
 from flask_login import current_user
 from app.models.booking import Booking
+from app.models.event import Event
 from app.services.booking_service import BookingService
 from app.services.payment_service import PaymentService
+from app.services.payment_gateway import GatewayUnavailable, PaymentGatewayError
+from app.services.hold_service import HoldService
+from app.services.waiting_room_service import WaitingRoomService
 from app.forms.booking import BookingForm, PaymentForm
 from app.utils.decorators import permission_required
 from app.utils.permissions import Permission
+from app.utils.rate_limit import rate_limit
 import logging
 from datetime import datetime
 from app.utils.database import db
+from app.utils.pagination import keyset_paginate
+from app.utils.query_budget import query_budget
+from app.utils.query_profiles import booking_with_event_and_tickets, booking_with_event_and_user
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +25,11 @@ booking_bp = Blueprint("booking", __name__)
 
 @booking_bp.route("/my-bookings")
 @permission_required(Permission.VIEW_OWN_BOOKINGS)
+@query_budget(3)
 def my_bookings():
     bookings = (
-        Booking.query.filter_by(user_id=current_user.id)
+        Booking.query.options(*booking_with_event_and_tickets())
+        .filter_by(user_id=current_user.id)
         .order_by(Booking.created_at.desc())
         .all()
     )
@@ -27,22 +37,73 @@ def my_bookings():
 
 
 @booking_bp.route("/create/<int:event_id>", methods=["POST"])
+@rate_limit("booking")
 @permission_required(Permission.BOOK_TICKET)
 def create_booking(event_id):
     form = BookingForm()
     if form.validate_on_submit():
+        # While the event's waiting room is open, only admitted buyers book
+        admission = None
+        if WaitingRoomService.is_open(event_id):
+            admission = WaitingRoomService.consume(
+                session.get(f"admission:{event_id}"), event_id, current_user.id
+            )
+            if admission is None:
+                return redirect(url_for("booking.waiting_room", event_id=event_id))
         try:
             result = BookingService.create_booking(
                 user_id=current_user.id, event_id=event_id, quantity=form.quantity.data
             )
+            session.pop(f"admission:{event_id}", None)
             # Generate payment URL using booking number
             return redirect(url_for("booking.checkout", booking_number=result["booking"]["booking_number"]))
         except ValueError as e:
+            if admission:
+                WaitingRoomService.restore(admission)
             flash(str(e), "danger")
             return redirect(url_for("events.detail", event_id=event_id))
     return redirect(url_for("events.detail", event_id=event_id))
 
 
+@booking_bp.route("/queue/<int:event_id>")
+@permission_required(Permission.BOOK_TICKET)
+def waiting_room(event_id):
+    event = Event.query.get_or_404(event_id)
+    ticket = WaitingRoomService.join(event_id, current_user.id)
+    if ticket is None:
+        return redirect(url_for("events.detail", event_id=event_id))
+    session[f"waiting_room:{event_id}"] = ticket
+    return render_template("booking/waiting_room.html", event=event)
+
+
+@booking_bp.route("/queue/<int:event_id>/status")
+def waiting_room_status(event_id):
+    """
+    Report the place in line held by this browser's ticket
+
+    Polled by everyone waiting, so it is answered from the signed ticket
+    and Redis alone, without loading the user or touching the database.
+    """
+    ticket = session.get(f"waiting_room:{event_id}")
+    if ticket is None:
+        return jsonify(state="invalid", redirect=url_for("booking.waiting_room", event_id=event_id))
+
+    status = WaitingRoomService.status(ticket)
+    state = status["state"]
+    if state == "admitted":
+        session[f"admission:{event_id}"] = status.pop("token")
+        session.pop(f"waiting_room:{event_id}", None)
+        minutes = max(status["expires_in"] // 60, 1)
+        flash(f"It's your turn! You have {minutes} minute(s) to book your tickets.", "success")
+        status["redirect"] = url_for("events.detail", event_id=event_id)
+    elif state == "closed":
+        session.pop(f"waiting_room:{event_id}", None)
+        status["redirect"] = url_for("events.detail", event_id=event_id)
+    elif state in ("expired", "invalid"):
+        session.pop(f"waiting_room:{event_id}", None)
+    return jsonify(**status)
+
+
 @booking_bp.route("/checkout/<booking_number>", methods=["GET", "POST"])
 @permission_required(Permission.BOOK_TICKET)
 def checkout(booking_number):
@@ -55,60 +116,80 @@ def checkout(booking_number):
         flash("Unauthorized access", "danger")
         return redirect(url_for("booking.my_bookings"))
     
-    # Calculate time elapsed since booking creation
-    time_elapsed = datetime.utcnow() - booking.created_at
-    if time_elapsed.total_seconds() > 600:  # 10 minutes = 600 seconds
-        # Booking has expired
-        if booking.status == "pending" and booking.payment_status == "pending":
-            # Cancel the booking if it's still pending
-            booking.cancel()
-            db.session.commit()
+    # Remaining time on the booking's payment hold, also used by the client-side timer
+    remaining_seconds = HoldService.remaining_seconds(booking)
+    if remaining_seconds <= 0:
+        # Booking has expired; cancel it if it's still pending
+        if BookingService.expire_booking(booking):
             flash("Booking has expired. Please create a new booking.", "warning")
         return redirect(url_for("booking.my_bookings"))
 
-    # Calculate remaining time for client-side timer
-    remaining_seconds = max(600 - int(time_elapsed.total_seconds()), 0)
-    
     # Verify booking is pending payment
     if booking.status != "pending" or booking.payment_status != "pending":
         flash("Invalid booking status", "danger")
         return redirect(url_for("booking.my_bookings"))
 
+    # A submitted payment is authorized by a worker; the page polls for it
+    payment = PaymentService.pending_payment(booking.id)
     form = PaymentForm()
-    if form.validate_on_submit():
+    if payment is None and form.validate_on_submit():
         try:
-            # Process payment
-            payment_result = PaymentService.process_payment(
-                amount=booking.total_amount,
-                card_number=form.card_number.data,
-                expiry=form.expiry.data,
-                cvv=form.cvv.data,
-                booking_id=booking.id,
+            PaymentService.start_payment(
+                booking,
+                card={
+                    "number": form.card_number.data,
+                    "expiry": form.expiry.data,
+                    "cvv": form.cvv.data,
+                    "holder": form.card_holder.data,
+                },
             )
-
-            if payment_result["status"] == "success":
-                # Complete booking with payment
-                BookingService.complete_payment(booking.id, payment_result)
-                flash(
-                    "Payment successful! Your tickets have been issued and sent to your email.",
-                    "success",
-                )
-                return redirect(url_for("booking.my_bookings"))
-            else:
-                flash("Payment processing failed. Please try again.", "danger")
-
+        except GatewayUnavailable as e:
+            logger.error(f"Payment gateway unavailable for booking {booking_number}: {str(e)}")
+            flash("The payment provider is unavailable. Please try again.", "danger")
+        except PaymentGatewayError as e:
+            # The card was rejected before any charge was attempted
+            logger.warning(f"Card tokenization failed for booking {booking_number}: {str(e)}")
+            flash(str(e), "danger")
         except Exception as e:
             logger.error(f"Payment failed for booking {booking_number}: {str(e)}")
             flash("Payment processing failed. Please try again.", "danger")
+        return redirect(url_for("booking.checkout", booking_number=booking_number))
 
     return render_template(
         "booking/checkout.html", 
         booking=booking, 
         form=form,
+        payment=payment,
         remaining_seconds=remaining_seconds
     )
 
 
+@booking_bp.route("/checkout/<booking_number>/payment-status")
+@permission_required(Permission.BOOK_TICKET)
+def payment_status(booking_number):
+    """Report the booking's latest payment; once it has settled, where to go next"""
+    booking = Booking.query.filter_by(booking_number=booking_number).first_or_404()
+    if booking.user_id != current_user.id and not current_user.can(
+        Permission.MANAGE_BOOKINGS
+    ):
+        abort(403)
+
+    payment = PaymentService.latest_payment(booking.id)
+    if payment is None or payment.status == "pending":
+        return jsonify(status=payment.status if payment else "none")
+
+    if payment.status == "paid":
+        flash(
+            "Payment successful! Your tickets have been issued and sent to your email.",
+            "success",
+        )
+        next_url = url_for("booking.my_bookings")
+    else:
+        flash(payment.failure_reason or "Payment processing failed. Please try again.", "danger")
+        next_url = url_for("booking.checkout", booking_number=booking_number)
+    return jsonify(status=payment.status, redirect=next_url)
+
+
 @booking_bp.route("/cancel/<string:booking_number>", methods=["POST"])
 @permission_required(Permission.CANCEL_TICKET)
 def cancel_booking(booking_number):
@@ -136,6 +217,16 @@ def cancel_booking(booking_number):
 
 @booking_bp.route("/all")
 @permission_required(Permission.VIEW_ALL_BOOKINGS)
+@query_budget(2)
 def all_bookings():
-    bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-    return render_template("booking/all_bookings.html", bookings=bookings)
+    pagination = keyset_paginate(
+        Booking.query.options(*booking_with_event_and_user()),
+        (Booking.created_at, Booking.id),
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        per_page=50,
+        descending=True,
+    )
+    return render_template(
+        "booking/all_bookings.html", bookings=pagination.items, pagination=pagination
+    )
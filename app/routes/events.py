@@ -1,37 +1,42 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from sqlalchemy import or_
 from app.models.event import Event
 from app.models.booking import Booking
+from app.models.sales import DailyEventSales
 from app.forms.booking import BookingForm
 from app.forms.event import EventForm
-from app.utils.database import db, commit_changes
+from app.utils.database import db, commit_changes, unit_of_work
 from app.utils.decorators import permission_required
 from app.utils.permissions import Permission
+from app.services.inventory_service import InventoryService
+from app.services.waiting_room_service import WaitingRoomService
+from app.utils.cache import cached_page, bump_catalog_version
+from app.utils.search import search_events
+from app.utils.pagination import keyset_paginate
 from datetime import datetime
 
 events_bp = Blueprint("events", __name__)
 
 
 @events_bp.route("/")
+@cached_page(query_args=("after", "before", "search"))
 def list():
-    page = request.args.get("page", 1, type=int)
     per_page = 10
     search = request.args.get("search", "").strip()
 
     query = Event.query.filter(Event.event_date >= datetime.now())
 
     if search:
-        # Lọc theo tên hoặc địa điểm (venue)
-        query = query.filter(
-            or_(
-                Event.title.ilike(f"%{search}%"),
-                Event.venue.ilike(f"%{search}%")
-            )
-        )
+        # Tìm kiếm toàn văn theo tên, địa điểm, mô tả và thể loại
+        query = search_events(query, search)
 
-    query = query.order_by(Event.event_date)
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagination = keyset_paginate(
+        query,
+        (Event.event_date, Event.id),
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        per_page=per_page,
+    )
     events = pagination.items
 
     return render_template(
@@ -43,10 +48,16 @@ def list():
 
 
 @events_bp.route("/<int:event_id>")
+@cached_page()
 def detail(event_id):
     event = Event.query.get_or_404(event_id)
     form = BookingForm()
-    return render_template("events/detail.html", event=event, form=form)
+    return render_template(
+        "events/detail.html",
+        event=event,
+        form=form,
+        waiting_room_open=WaitingRoomService.is_open(event.id),
+    )
 
 
 @events_bp.route("/create", methods=["GET", "POST"])
@@ -66,6 +77,7 @@ def create():
         )
         db.session.add(event)
         commit_changes()
+        bump_catalog_version()
         flash("Event created successfully!", "success")
         return redirect(url_for("events.detail", event_id=event.id))
     return render_template("events/create.html", form=form)
@@ -77,14 +89,25 @@ def edit(event_id):
     event = Event.query.get_or_404(event_id)
     form = EventForm(obj=event)
     if form.validate_on_submit():
-        event.title = form.title.data
-        event.description = form.description.data
-        event.event_date = form.event_date.data
-        event.venue = form.venue.data
-        event.total_tickets = form.total_tickets.data
-        event.price = form.price.data
-        event.category = form.category.data
-        commit_changes()
+        delta = form.total_tickets.data - event.total_tickets
+        if delta < 0:
+            held = InventoryService.seats_held(event.id)
+            if form.total_tickets.data < held:
+                flash(f"Total tickets cannot be lower than the {held} already booked.", "danger")
+                return render_template("events/edit.html", form=form, event=event)
+
+        with unit_of_work() as uow:
+            event.title = form.title.data
+            event.description = form.description.data
+            event.event_date = form.event_date.data
+            event.venue = form.venue.data
+            event.total_tickets = form.total_tickets.data
+            event.available_tickets = max(event.available_tickets + delta, 0)
+            event.price = form.price.data
+            event.category = form.category.data
+            # Otherwise the sync task writes the old counts back from the ledger
+            uow.after_commit(InventoryService.adjust_total, event.id, delta)
+        bump_catalog_version()
         flash("Event updated successfully!", "success")
         return redirect(url_for("events.detail", event_id=event.id))
     return render_template("events/edit.html", form=form, event=event)
@@ -97,7 +120,10 @@ def delete(event_id):
     if Booking.query.filter_by(event_id=event.id).first():
         flash("Cannot delete event with existing bookings.", "danger")
     else:
+        DailyEventSales.query.filter_by(event_id=event.id).delete()
         db.session.delete(event)
         commit_changes()
+        InventoryService.evict(event_id)
+        bump_catalog_version()
         flash("Event deleted successfully!", "success")
     return redirect(url_for("events.list"))
@@ -1,10 +1,12 @@
 from flask import Blueprint, render_template
 from app.models.event import Event
+from app.utils.cache import cached_page
 from datetime import datetime
 
 main_bp = Blueprint('main', __name__, static_folder='../static', template_folder='../templates')
 
 @main_bp.route('/')
+@cached_page()
 def index():
     # Get upcoming events
     upcoming_events = Event.query.filter(
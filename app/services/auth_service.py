@@ -3,6 +3,7 @@ from flask import current_app, url_for
 from app.models.user import User
 from app.utils.database import db
 from app.celery.tasks.email_tasks import send_email_notification
+from app.services.outbox_service import OutboxService
 from itsdangerous import URLSafeTimedSerializer
 
 class AuthService:
@@ -36,9 +37,9 @@ class AuthService:
                 phone=phone
             )
             
-            # Save user to database
+            # Save user to database; the id is needed for the token
             db.session.add(user)
-            db.session.commit()
+            db.session.flush()
 
             # Generate confirmation token
             token = user.generate_confirmation_token()
@@ -57,14 +58,15 @@ class AuthService:
                 'year': datetime.utcnow().year
             }
 
-            # Send confirmation email asynchronously using Celery
-            send_email_notification.delay(
+            # Queue the confirmation email in the same transaction as the user
+            OutboxService.enqueue(
+                'tasks.send_email_notification',
                 recipient_email=user.email,
                 subject='Please Confirm Your Account',
                 template_name='mail/registration_confirmation.html',
                 context=context
             )
-
+            db.session.commit()
 
             return user, "Registration successful. Please check your email to confirm your account."
         
@@ -1,9 +1,14 @@
 from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
 from app.models.booking import Booking
 from app.models.event import Event
-from app.utils.database import db, commit_changes
+from app.utils.database import db, commit_changes, unit_of_work
 from app.services.payment_service import PaymentService
-from app.services.email_service import EmailService
+from app.services.inventory_service import InventoryService
+from app.services.hold_service import HoldService
+from app.services.rollup_service import SalesRollupService
+from app.services.outbox_service import OutboxService
+from app.services.ticket_service import TicketService
 from app.celery.tasks.booking_tasks import process_booking, cancel_expired_bookings, generate_booking_report
 
 class BookingService:
@@ -28,10 +33,10 @@ class BookingService:
         if not event:
             raise ValueError('Event not found')
 
-        if event.is_sold_out():
-            raise ValueError('Event is sold out')
-
-        if quantity > event.available_tickets:
+        # Reserve seats atomically in the inventory ledger
+        if not InventoryService.reserve(event_id, quantity):
+            if InventoryService.get_available(event) <= 0:
+                raise ValueError('Event is sold out')
             raise ValueError('Not enough tickets available')
 
         # Calculate total amount
@@ -46,10 +51,13 @@ class BookingService:
         )
 
         db.session.add(booking)
-        commit_changes()
+        SalesRollupService.booking_created(booking)
+        if not commit_changes():
+            InventoryService.release(event_id, quantity)
+            raise ValueError('Could not create booking. Please try again.')
 
-        # Schedule booking expiration check after 10 minutes
-        cancel_expired_bookings.apply_async(countdown=600)  # 600 seconds = 10 minutes
+        # Hold the seats until payment; the expiry sweeper releases them after that
+        HoldService.place(booking)
 
         return {
             'booking': booking.to_dict()
@@ -59,6 +67,12 @@ class BookingService:
     def complete_payment(booking_id, payment_data):
         """
         Complete payment and process booking
+
+        The booking row is locked, then marked paid and confirmed, its
+        tickets are minted and the confirmation task is queued through the
+        outbox, all in one transaction. Called inside a unit_of_work (as the
+        payment worker does) this joins the caller's transaction, so the
+        payment row is committed with it.
         
         Args:
             booking_id (int): ID of the booking
@@ -67,34 +81,56 @@ class BookingService:
         Returns:
             dict: Updated booking details
         """
-        booking = Booking.query.get(booking_id)
-        if not booking:
-            raise ValueError('Booking not found')
-
-        if booking.payment_status != 'pending':
-            raise ValueError('Invalid booking status')
-
-        # Mark booking as paid
-        booking.mark_as_paid(payment_data['payment_id'])
-        booking.confirm()
-        commit_changes()
-
-        # Process booking (generate tickets, etc)
-        process_booking.delay(booking.id)
-
-        # Send confirmation email only after successful payment
-        EmailService.send_email(
-            recipient_email=booking.user.email,
-            subject='Booking Confirmation - Payment Successful',
-            template_name='mail/booking_confirmation.html',
-            context={
-                'booking': booking.to_dict(),
-                'event': booking.event.to_dict()
-            }
-        )
+        with unit_of_work() as uow:
+            # FOR UPDATE: the expiry sweeper skips locked bookings instead
+            # of cancelling one that is being paid for
+            booking = Booking.query.filter_by(id=booking_id).with_for_update().first()
+            if not booking:
+                raise ValueError('Booking not found')
+
+            # A hold that ran out while the card was charged leaves a cancelled booking
+            if booking.status != 'pending' or booking.payment_status != 'pending':
+                raise ValueError('Invalid booking status')
+
+            # Mark booking as paid
+            booking.mark_as_paid(payment_data['payment_id'])
+            booking.confirm()
+            SalesRollupService.booking_confirmed(booking)
+            TicketService.mint_tickets(booking)
+
+            # Send the confirmation email; queued through the outbox so it
+            # is published only if this commits
+            OutboxService.enqueue('tasks.process_booking', booking.id)
+            uow.after_commit(HoldService.release, booking.id)
 
         return booking.to_dict()
 
+    @staticmethod
+    def expire_booking(booking):
+        """
+        Cancel a pending booking whose payment hold has run out
+
+        Args:
+            booking (Booking): Booking to expire
+
+        Returns:
+            bool: True if the booking was cancelled, False if it was no longer pending
+        """
+        HoldService.release(booking.id)
+        try:
+            with unit_of_work() as uow:
+                # Re-read under lock, the payment worker may be completing it
+                db.session.refresh(booking, with_for_update=True)
+                if booking.status != 'pending' or booking.payment_status != 'pending':
+                    return False
+
+                booking.cancel()
+                SalesRollupService.booking_cancelled(booking)
+                uow.after_commit(InventoryService.release, booking.event_id, booking.quantity)
+        except SQLAlchemyError:
+            return False
+        return True
+
     @staticmethod
     def get_user_bookings(user_id):
         """
@@ -136,29 +172,33 @@ class BookingService:
         Raises:
             ValueError: If booking not found, unauthorized, or cannot be cancelled
         """
-        # Validate booking and permissions
-        booking = Booking.query.filter_by(booking_number=booking_number).first_or_404()
-        if not booking:
-            raise ValueError('Booking not found')
-
-        if booking.user_id != user_id:
-            raise ValueError('Unauthorized to cancel this booking')
-
-        if not booking.is_cancellable():
-            raise ValueError('Booking cannot be cancelled')
-
-        # Process payment refund
-        refund_result = PaymentService.process_refund(booking.id)
-        if refund_result['status'] != 'success':
-            raise ValueError('Refund failed')
-
-        # Return tickets to event inventory
-        event = Event.query.get(booking.event_id)
-        event.update_available_tickets(booking.quantity, operation='increase')
-
-        # Update booking status
-        booking.cancel()
-        commit_changes()
+        with unit_of_work() as uow:
+            # Validate booking and permissions; the row stays locked until commit
+            booking = (
+                Booking.query.filter_by(booking_number=booking_number)
+                .with_for_update()
+                .first_or_404()
+            )
+            if not booking:
+                raise ValueError('Booking not found')
+
+            if booking.user_id != user_id:
+                raise ValueError('Unauthorized to cancel this booking')
+
+            if not booking.is_cancellable():
+                raise ValueError('Booking cannot be cancelled')
+
+            # Process payment refund
+            refund_result = PaymentService.process_refund(booking.id)
+            if refund_result['status'] != 'success':
+                raise ValueError('Refund failed')
+
+            # Update booking status
+            booking.cancel()
+            SalesRollupService.booking_cancelled(booking, was_confirmed=True)
+
+            # Return tickets to event inventory once the cancellation is committed
+            uow.after_commit(InventoryService.release, booking.event_id, booking.quantity)
 
         return booking.to_dict()
 
@@ -0,0 +1,112 @@
+from datetime import datetime
+from app.utils.id_generator import generate_number
+from app.utils.redis_client import redis_client, register_script
+
+CAMPAIGN_KEY = 'campaign:{campaign_id}'
+CAMPAIGN_TTL = 7 * 24 * 3600
+COUNTERS = ('total', 'queued', 'sent', 'failed', 'skipped')
+
+# KEYS[1] = campaign hash; ARGV = field, delta pairs
+# Marks the campaign completed once every recipient is accounted for
+RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+local counts = redis.call('HMGET', KEYS[1], 'total', 'sent', 'failed', 'skipped')
+local done = (tonumber(counts[2]) or 0) + (tonumber(counts[3]) or 0) + (tonumber(counts[4]) or 0)
+if done >= (tonumber(counts[1]) or 0) then
+    redis.call('HSET', KEYS[1], 'status', 'completed')
+end
+return 1
+"""
+
+_record = register_script(RECORD_SCRIPT)
+
+
+class CampaignService:
+    """
+    Bulk email campaigns tracked by progress counters in Redis.
+
+    Starting a campaign only writes its counter hash and queues one
+    dispatch task, so the request returns immediately however many
+    recipients there are. The dispatch task loads the users in chunks and
+    queues send_email_batch tasks, which add to the sent/failed counters.
+    """
+
+    @staticmethod
+    def campaign_key(campaign_id):
+        return CAMPAIGN_KEY.format(campaign_id=campaign_id)
+
+    @staticmethod
+    def start(recipient_ids, subject, template_name, context):
+        """
+        Create a campaign and queue its dispatch
+
+        Args:
+            recipient_ids (list): IDs of the users to email
+            subject (str): Email subject
+            template_name (str): Name of the template file
+            context (dict): Template context shared by all recipients
+
+        Returns:
+            str: Campaign ID
+        """
+        from app.celery.tasks.email_tasks import dispatch_email_campaign
+
+        recipient_ids = sorted({int(user_id) for user_id in recipient_ids})
+        campaign_id = generate_number('CMP')
+        key = CampaignService.campaign_key(campaign_id)
+
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={
+            'status': 'queued',
+            'subject': subject,
+            'created_at': datetime.utcnow().isoformat(),
+            **{counter: 0 for counter in COUNTERS},
+            'total': len(recipient_ids),
+        })
+        pipe.expire(key, CAMPAIGN_TTL)
+        pipe.execute()
+
+        dispatch_email_campaign.delay(campaign_id, recipient_ids, subject, template_name, context)
+        return campaign_id
+
+    @staticmethod
+    def record(campaign_id, **deltas):
+        """Add to a campaign's counters, e.g. record(cid, sent=98, failed=2)"""
+        args = []
+        for counter, delta in deltas.items():
+            if delta:
+                args.extend([counter, delta])
+        if args:
+            _record(keys=[CampaignService.campaign_key(campaign_id)], args=args)
+
+    @staticmethod
+    def set_status(campaign_id, status):
+        key = CampaignService.campaign_key(campaign_id)
+        # Never move a campaign back out of completed
+        if redis_client.hget(key, 'status') != b'completed':
+            redis_client.hset(key, 'status', status)
+
+    @staticmethod
+    def progress(campaign_id):
+        """
+        Get a campaign's progress counters
+
+        Returns:
+            dict: Status, subject and counters, or None if the campaign is unknown
+        """
+        data = redis_client.hgetall(CampaignService.campaign_key(campaign_id))
+        if not data:
+            return None
+        data = {field.decode(): value.decode() for field, value in data.items()}
+        return {
+            'id': campaign_id,
+            'status': data.get('status'),
+            'subject': data.get('subject'),
+            'created_at': data.get('created_at'),
+            **{counter: int(data.get(counter, 0)) for counter in COUNTERS},
+        }
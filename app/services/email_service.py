@@ -3,6 +3,7 @@ from flask import render_template, current_app
 from flask_mail import Message
 from app.extensions import mail
 from app.celery.tasks.email_tasks import send_email_notification
+from app.utils.idempotency import submit_once
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -10,7 +11,7 @@ logger = logging.getLogger(__name__)
 
 class EmailService:
     @staticmethod
-    def send_email(recipient_email, subject, template_name, context):
+    def send_email(recipient_email, subject, template_name, context, idempotency_key=None):
         """
         Send an email using Flask-Mail through Celery task
         
@@ -19,6 +20,8 @@ class EmailService:
             subject (str): Email subject
             template_name (str): Name of the template file (e.g. 'mail/registration_confirmation.html')
             context (dict): Context variables for the template
+            idempotency_key (str, optional): Send at most one email per key,
+                e.g. 'booking-confirmation:42'; duplicates are dropped
             
         Returns:
             bool: True if email was queued successfully, False otherwise
@@ -39,12 +42,16 @@ class EmailService:
                 return False
             
             # Queue email sending task
-            send_email_notification.delay(
-                recipient_email=recipient_email,
-                subject=subject,
-                template_name=template_name,
-                context=context
-            )
+            email = {
+                'recipient_email': recipient_email,
+                'subject': subject,
+                'template_name': template_name,
+                'context': context
+            }
+            if idempotency_key:
+                submit_once(send_email_notification, idempotency_key, ttl=86400, **email)
+            else:
+                send_email_notification.delay(**email)
             
             logger.info(f"Email queued successfully for {recipient_email}")
             return True
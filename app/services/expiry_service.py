@@ -0,0 +1,162 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from celery import group
+from flask import current_app
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+from app.utils.database import db
+from app.services.inventory_service import InventoryService
+from app.services.hold_service import HoldService
+from app.services.rollup_service import SalesRollupService
+from app.celery.tasks.email_tasks import send_email_notification
+
+logger = logging.getLogger(__name__)
+
+# Delay before a booking skipped because it was locked is looked at again
+SKIPPED_RETRY_SECONDS = 30
+
+
+class ExpiryService:
+    """
+    Set-based cancellation of bookings whose payment hold has run out.
+
+    A chunk of bookings is cancelled with one UPDATE ... RETURNING, seats
+    are returned to the inventory ledger once per event and the timeout
+    emails are published as one group, so the cost of a chunk depends on
+    the number of events involved rather than the number of bookings.
+    """
+
+    @staticmethod
+    def expire_bookings(booking_ids):
+        """
+        Cancel the still-pending bookings among the given IDs
+
+        Args:
+            booking_ids (iterable): IDs of bookings whose hold has expired
+
+        Returns:
+            int: Number of bookings cancelled
+        """
+        booking_ids = list(booking_ids)
+        if not booking_ids:
+            return 0
+
+        # Bookings locked by a checkout completing its payment are skipped
+        # rather than waited for
+        expirable = (
+            db.select(Booking.id)
+            .where(
+                Booking.id.in_(booking_ids),
+                Booking.status == 'pending',
+                Booking.payment_status == 'pending',
+            )
+            .with_for_update(skip_locked=True)
+        )
+        cancelled = db.session.execute(
+            db.update(Booking)
+            .where(
+                Booking.id.in_(expirable),
+                Booking.status == 'pending',
+                Booking.payment_status == 'pending',
+            )
+            .values(status='cancelled', updated_at=datetime.utcnow())
+            .returning(
+                Booking.id,
+                Booking.booking_number,
+                Booking.user_id,
+                Booking.event_id,
+                Booking.quantity,
+                Booking.total_amount,
+                Booking.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        # Skipped bookings go back on the hold index, due again shortly, in
+        # case their checkout rolls back; paid ones are dropped next sweep
+        skipped = set(booking_ids) - {row.id for row in cancelled}
+        if skipped:
+            HoldService.restore({booking_id: time.time() + SKIPPED_RETRY_SECONDS for booking_id in skipped})
+
+        if not cancelled:
+            db.session.commit()
+            return 0
+
+        # One rollup delta per (day, event) in the same transaction
+        cancelled_per_bucket = defaultdict(int)
+        for row in cancelled:
+            cancelled_per_bucket[(row.created_at.date(), row.event_id)] += 1
+        SalesRollupService.record_many([
+            {'sales_date': sales_date, 'event_id': event_id, 'bookings_cancelled': count}
+            for (sales_date, event_id), count in cancelled_per_bucket.items()
+        ])
+        db.session.commit()
+
+        # The cancellations are committed; nothing below may undo them or
+        # put their holds back, so failures are logged and repaired here
+        quantities = defaultdict(int)
+        for row in cancelled:
+            quantities[row.event_id] += row.quantity
+        try:
+            # Return seats once per event instead of once per booking
+            InventoryService.release_many(quantities)
+        except Exception as e:
+            logger.error(f"Failed to return seats of expired bookings, evicting the ledgers: {str(e)}")
+            # Re-warmed from the bookings table, which has the cancellations
+            for event_id in quantities:
+                try:
+                    InventoryService.evict(event_id)
+                except Exception:
+                    logger.exception(f"Failed to evict the inventory ledger of event {event_id}")
+
+        try:
+            ExpiryService._notify(cancelled)
+        except Exception:
+            logger.exception(f"Failed to queue timeout emails for {len(cancelled)} expired booking(s)")
+        return len(cancelled)
+
+    @staticmethod
+    def _notify(cancelled):
+        """Publish the payment-timeout emails for a chunk as one Celery group"""
+        user_ids = {row.user_id for row in cancelled}
+        event_ids = {row.event_id for row in cancelled}
+        users = {
+            user.id: user
+            for user in User.query.filter(User.id.in_(user_ids))
+        }
+        # The template formats event_date, so it goes out as a datetime
+        events = {
+            event.id: {**event.to_dict(), 'event_date': event.event_date}
+            for event in Event.query.filter(Event.id.in_(event_ids))
+        }
+
+        hold_minutes = current_app.config.get('BOOKING_HOLD_SECONDS', 600) // 60
+        year = datetime.utcnow().year
+        messages = []
+        for row in cancelled:
+            user = users.get(row.user_id)
+            if not user:
+                continue
+            messages.append(send_email_notification.s(
+                recipient_email=user.email,
+                subject='Booking Cancelled - Payment Timeout',
+                template_name='mail/booking_timeout_cancellation.html',
+                context={
+                    'booking': {
+                        'id': row.id,
+                        'booking_number': row.booking_number,
+                        'quantity': row.quantity,
+                        'total_amount': row.total_amount,
+                        'user': {'first_name': user.first_name},
+                    },
+                    'event': events.get(row.event_id),
+                    'reason': f'Payment not completed within {hold_minutes} minutes',
+                    'year': year,
+                }
+            ))
+
+        if messages:
+            group(messages).apply_async()
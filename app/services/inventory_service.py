@@ -0,0 +1,232 @@
+from app.utils.database import db
+from app.models.booking import Booking
+from app.models.event import Event
+from app.utils.redis_client import redis_client, register_script
+
+INVENTORY_KEY = 'inventory:event:{event_id}'
+DIRTY_EVENTS_KEY = 'inventory:dirty'
+
+# Script results below zero are status codes, not seat counts
+LEDGER_COLD = -2
+INSUFFICIENT = -1
+
+# KEYS[1] = ledger hash, KEYS[2] = dirty set
+# ARGV[1] = quantity, ARGV[2] = event id
+RESERVE_SCRIPT = """
+local available = redis.call('HGET', KEYS[1], 'available')
+if not available then
+    return -2
+end
+local quantity = tonumber(ARGV[1])
+if tonumber(available) < quantity then
+    return -1
+end
+local remaining = redis.call('HINCRBY', KEYS[1], 'available', -quantity)
+redis.call('SADD', KEYS[2], ARGV[2])
+return remaining
+"""
+
+RELEASE_SCRIPT = """
+local available = redis.call('HGET', KEYS[1], 'available')
+if not available then
+    return -2
+end
+local total = tonumber(redis.call('HGET', KEYS[1], 'total'))
+local remaining = math.min(tonumber(available) + tonumber(ARGV[1]), total)
+redis.call('HSET', KEYS[1], 'available', remaining)
+redis.call('SADD', KEYS[2], ARGV[2])
+return remaining
+"""
+
+# ARGV[1] = available, ARGV[2] = total
+WARM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], 'available', ARGV[1], 'total', ARGV[2])
+end
+return tonumber(redis.call('HGET', KEYS[1], 'available'))
+"""
+
+# KEYS[1] = ledger hash, KEYS[2] = dirty set
+# ARGV[1] = change in total seats, ARGV[2] = event id
+# Moves the total and the available seats together, never below zero
+ADJUST_SCRIPT = """
+local ledger = redis.call('HMGET', KEYS[1], 'available', 'total')
+if not ledger[1] then
+    return -2
+end
+local delta = tonumber(ARGV[1])
+local total = math.max(tonumber(ledger[2]) + delta, 0)
+local available = math.max(math.min(tonumber(ledger[1]) + delta, total), 0)
+redis.call('HSET', KEYS[1], 'available', available, 'total', total)
+redis.call('SADD', KEYS[2], ARGV[2])
+return available
+"""
+
+_reserve = register_script(RESERVE_SCRIPT)
+_release = register_script(RELEASE_SCRIPT)
+_warm = register_script(WARM_SCRIPT)
+_adjust = register_script(ADJUST_SCRIPT)
+
+
+class InventoryService:
+    """
+    Seat inventory ledger kept in Redis.
+
+    The ledger is the source of truth for seat counts while an event is on
+    sale. Each event has a hash holding its available and total seats, warmed
+    lazily from the event's total less the seats its live bookings hold
+    (events.available_tickets lags the ledger by up to a sync interval, so
+    it is never trusted to seed it). Every change marks the event dirty, and
+    sync_event_inventory writes the counts back to events.available_tickets
+    in the background so the booking path never locks the event row.
+    """
+
+    @staticmethod
+    def ledger_key(event_id):
+        return INVENTORY_KEY.format(event_id=event_id)
+
+    @staticmethod
+    def warm(event):
+        """
+        Load an event's seat count into the ledger if it is not there yet
+
+        Args:
+            event (Event): Event to warm the ledger for
+
+        Returns:
+            int: Seats available according to the ledger
+        """
+        available = max(event.total_tickets - InventoryService.seats_held(event.id), 0)
+        return int(_warm(
+            keys=[InventoryService.ledger_key(event.id)],
+            args=[available, event.total_tickets]
+        ))
+
+    @staticmethod
+    def seats_held(event_id):
+        """Count the seats held by an event's pending and confirmed bookings"""
+        return db.session.query(
+            db.func.coalesce(db.func.sum(Booking.quantity), 0)
+        ).filter(
+            Booking.event_id == event_id,
+            Booking.status != 'cancelled',
+        ).scalar()
+
+    @staticmethod
+    def adjust_total(event_id, delta):
+        """
+        Apply a change in an event's total seats to its ledger
+
+        Available seats move with the total. A cold ledger is left alone:
+        it is warmed from the new total when next used.
+
+        Args:
+            event_id (int): ID of the event
+            delta (int): New total minus the old total
+        """
+        if delta:
+            _adjust(keys=[InventoryService.ledger_key(event_id), DIRTY_EVENTS_KEY], args=[delta, event_id])
+
+    @staticmethod
+    def _run(script, event_id, quantity):
+        keys = [InventoryService.ledger_key(event_id), DIRTY_EVENTS_KEY]
+        result = int(script(keys=keys, args=[quantity, event_id]))
+        if result == LEDGER_COLD:
+            event = Event.query.get(event_id)
+            if not event:
+                raise ValueError('Event not found')
+            InventoryService.warm(event)
+            result = int(script(keys=keys, args=[quantity, event_id]))
+        return result
+
+    @staticmethod
+    def reserve(event_id, quantity):
+        """
+        Atomically take seats out of the ledger
+
+        Args:
+            event_id (int): ID of the event
+            quantity (int): Number of seats to reserve
+
+        Returns:
+            bool: True if the seats were reserved, False if not enough remain
+        """
+        return InventoryService._run(_reserve, event_id, quantity) != INSUFFICIENT
+
+    @staticmethod
+    def release(event_id, quantity):
+        """
+        Return seats to the ledger, never exceeding the event's total
+
+        Args:
+            event_id (int): ID of the event
+            quantity (int): Number of seats to return
+
+        Returns:
+            int: Seats available after the release
+        """
+        return InventoryService._run(_release, event_id, quantity)
+
+    @staticmethod
+    def release_many(quantities):
+        """
+        Return seats for several events in a single Redis round trip
+
+        Args:
+            quantities (dict): Mapping of event ID to the number of seats to return
+        """
+        if not quantities:
+            return
+
+        pipe = redis_client.pipeline(transaction=False)
+        for event_id, quantity in quantities.items():
+            keys = [InventoryService.ledger_key(event_id), DIRTY_EVENTS_KEY]
+            _release(keys=keys, args=[quantity, event_id], client=pipe)
+        results = pipe.execute()
+
+        # Ledgers that were never warmed are loaded and released one by one
+        for (event_id, quantity), result in zip(quantities.items(), results):
+            if int(result) == LEDGER_COLD:
+                InventoryService.release(event_id, quantity)
+
+    @staticmethod
+    def get_available(event):
+        """Get the live seat count for an event"""
+        available = redis_client.hget(InventoryService.ledger_key(event.id), 'available')
+        if available is None:
+            return InventoryService.warm(event)
+        return int(available)
+
+    @staticmethod
+    def peek_available(event_id):
+        """Get the live seat count without touching the database; None if the ledger is cold"""
+        available = redis_client.hget(InventoryService.ledger_key(event_id), 'available')
+        return None if available is None else int(available)
+
+    @staticmethod
+    def pop_dirty(count):
+        """
+        Take up to `count` changed events off the dirty set
+
+        Returns:
+            dict: Mapping of event ID to its current ledger seat count
+        """
+        event_ids = redis_client.spop(DIRTY_EVENTS_KEY, count) or []
+        if not event_ids:
+            return {}
+
+        pipe = redis_client.pipeline(transaction=False)
+        for event_id in event_ids:
+            pipe.hget(InventoryService.ledger_key(int(event_id)), 'available')
+        counts = pipe.execute()
+
+        return {
+            int(event_id): int(available)
+            for event_id, available in zip(event_ids, counts)
+            if available is not None
+        }
+
+    @staticmethod
+    def evict(event_id):
+        """Drop an event from the ledger so it is re-warmed from the database"""
+        redis_client.delete(InventoryService.ledger_key(event_id))
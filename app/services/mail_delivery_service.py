@@ -0,0 +1,215 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import render_template, current_app
+from flask_mail import Message
+from app.extensions import mail
+from app.utils.mail_templates import mail_renderer
+
+logger = logging.getLogger(__name__)
+
+
+
+class SMTPSessionLost(Exception):
+    """The SMTP session broke; the rest of the batch should be retried"""
+
+
+def is_session_error(error):
+    """
+    Tell errors that break the SMTP session apart from per-message rejections
+
+    SMTPException subclasses OSError, so socket errors are only those that are
+    not SMTP replies; a 421 reply means the server is closing the session.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class MailConnectionPool:
+    """
+    Bounded per-process pool of open SMTP sessions.
+
+    Connections are opened with mail.connect() and kept open between tasks,
+    so a worker pays the connect/STARTTLS/login cost once instead of once per
+    message. Sessions idle for longer than the idle timeout are closed rather
+    than reused, since SMTP servers drop them. Under MAIL_SUPPRESS_SEND
+    (on by default when TESTING) the connections never touch the network and
+    sent messages can be captured with mail.record_messages().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_process(self):
+        # Forked workers must not share the parent's sockets
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                size = current_app.config.get('MAIL_POOL_SIZE', 4)
+                self._slots = threading.BoundedSemaphore(size)
+                self._idle = []
+                self._pid = os.getpid()
+
+    @staticmethod
+    def _open():
+        connection = mail.connect()
+        connection.__enter__()
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        try:
+            if connection.host is not None:
+                connection.host.quit()
+        except Exception:
+            pass
+
+    def _checkout(self):
+        idle_timeout = current_app.config.get('MAIL_POOL_IDLE_SECONDS', 60)
+        with self._lock:
+            while self._idle:
+                connection, released_at = self._idle.pop()
+                if time.monotonic() - released_at < idle_timeout:
+                    return connection
+                self._close(connection)
+        return self._open()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow an open SMTP connection, blocking while the pool is exhausted
+
+        A connection whose session broke while it was borrowed (the block
+        raised SMTPSessionLost or a session error such as
+        SMTPServerDisconnected) is closed instead of being returned to the
+        pool; per-message rejections leave it reusable.
+        """
+        self._ensure_process()
+        self._slots.acquire()
+        connection = None
+        try:
+            try:
+                connection = self._checkout()
+            except Exception as e:
+                if is_session_error(e):
+                    raise SMTPSessionLost(str(e)) from e
+                raise
+            yield connection
+        except Exception as e:
+            if connection is not None and (isinstance(e, SMTPSessionLost) or is_session_error(e)):
+                self._close(connection)
+                connection = None
+            raise
+        finally:
+            if connection is not None:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+            self._slots.release()
+
+    def close_all(self):
+        """Close every idle connection held by this process"""
+        with self._lock:
+            idle, self._idle = getattr(self, '_idle', []), []
+        for connection, _ in idle:
+            self._close(connection)
+
+
+mail_pool = MailConnectionPool()
+
+
+class MailDeliveryService:
+    @staticmethod
+    def build_message(recipient_email, subject, template_name, context, prepared=None):
+        """
+        Render a templated email into a Flask-Mail message
+
+        Args:
+            recipient_email (str): Email address of the recipient
+            subject (str): Email subject
+            template_name (str): Name of the template file
+            context (dict): Context variables for the template
+            prepared (PreparedTemplate, optional): Template already
+                pre-rendered for the batch's shared context; only `context`
+                is then filled in
+
+        Returns:
+            Message: Message ready to send
+        """
+        mail_sender = current_app.config.get('MAIL_DEFAULT_SENDER')
+        if not mail_sender:
+            logger.error("MAIL_DEFAULT_SENDER not configured")
+            raise Exception('Mail sender not configured')
+
+        msg = Message(subject=subject, recipients=[recipient_email], sender=mail_sender)
+        if prepared is None:
+            if 'year' not in context:
+                context['year'] = datetime.utcnow().year
+            msg.html = render_template(template_name, **context)
+        else:
+            msg.html = prepared.render(context)
+        return msg
+
+    @staticmethod
+    def deliver(messages, shared_context=None):
+        """
+        Send a batch of templated emails over one pooled SMTP session
+
+        Messages rejected by the server or failing to render are counted as
+        failed and dropped. If the session itself breaks, delivery stops and
+        the unsent remainder is returned so the caller can retry it.
+
+        Args:
+            messages (list): Dicts with recipient_email, subject, template_name and context
+            shared_context (dict, optional): Template context common to every message
+
+        Returns:
+            dict: Number sent, failed recipients and the messages still pending
+        """
+        sent = 0
+        failed = []
+        if shared_context is not None and 'year' not in shared_context:
+            shared_context = {**shared_context, 'year': datetime.utcnow().year}
+
+        # Pre-render each template once for the whole batch
+        templates = {}
+
+        def prepare(spec):
+            if shared_context is None:
+                return None
+            key = (spec['template_name'], tuple(sorted(spec['context'])))
+            if key not in templates:
+                templates[key] = mail_renderer.prepare(spec['template_name'], shared_context, key[1])
+            return templates[key]
+
+        try:
+            with mail_pool.connection() as connection:
+                for spec in messages:
+                    try:
+                        msg = MailDeliveryService.build_message(**spec, prepared=prepare(spec))
+                    except Exception as e:
+                        logger.error(f"Failed to render email to {spec['recipient_email']}: {str(e)}")
+                        failed.append(spec['recipient_email'])
+                        continue
+                    try:
+                        connection.send(msg)
+                    except Exception as e:
+                        if is_session_error(e):
+                            raise SMTPSessionLost(str(e)) from e
+                        logger.error(f"Failed to send email to {spec['recipient_email']}: {str(e)}")
+                        failed.append(spec['recipient_email'])
+                        continue
+                    sent += 1
+        except SMTPSessionLost as e:
+            logger.warning(f"SMTP session lost after {sent} messages: {str(e)}")
+            return {'sent': sent, 'failed': failed, 'pending': messages[sent + len(failed):]}
+
+        return {'sent': sent, 'failed': failed, 'pending': []}
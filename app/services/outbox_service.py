@@ -0,0 +1,134 @@
+import logging
+from datetime import datetime
+from flask import current_app
+from kombu.exceptions import OperationalError
+from app.extensions import celery
+from app.models.outbox import OutboxMessage
+from app.utils.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """
+    Transactional outbox for Celery tasks.
+
+    Request handlers add an outbox row in the same transaction as the change
+    that needs the task, instead of publishing to the broker inline, so the
+    task is queued exactly when the change commits and a broker outage never
+    slows down or fails the request. The relay publishes pending rows in
+    batches over one broker connection. Delivery is at least once: a row
+    published just before a relay crash is published again with the same
+    task id.
+    """
+
+    @staticmethod
+    def enqueue(task_name, *args, **kwargs):
+        """
+        Add a task to the outbox; the caller owns the commit
+
+        Args:
+            task_name (str): Registered Celery task name, e.g. 'tasks.process_booking'
+            *args: Positional task arguments
+            **kwargs: Keyword task arguments
+
+        Returns:
+            OutboxMessage: The pending outbox row
+        """
+        message = OutboxMessage(task_name, args, kwargs)
+        db.session.add(message)
+        return message
+
+    @staticmethod
+    def relay(batch_size=100, max_attempts=None):
+        """
+        Publish one batch of pending outbox rows to Celery
+
+        Rows are locked with SKIP LOCKED where the database supports it,
+        so several relays can run side by side. A row that fails to publish
+        does not hold up the rows behind it; after `max_attempts` failures
+        it is dead-lettered and left for requeue_dead(). A broker that
+        cannot be reached ends the round without counting an attempt
+        against any row.
+
+        Args:
+            batch_size (int): Maximum number of rows to publish
+            max_attempts (int, optional): Failures before a row is
+                dead-lettered; OUTBOX_MAX_ATTEMPTS by default
+
+        Returns:
+            int: Number of rows published
+        """
+        if max_attempts is None:
+            max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', 5)
+        messages = (
+            OutboxMessage.query
+            .filter(OutboxMessage.published_at.is_(None), OutboxMessage.dead_at.is_(None))
+            .order_by(OutboxMessage.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not messages:
+            db.session.commit()
+            return 0
+
+        published = []
+        try:
+            with celery.producer_or_acquire() as producer:
+                for message in messages:
+                    try:
+                        args, kwargs = message.get_args()
+                        celery.send_task(
+                            message.task_name,
+                            args=args,
+                            kwargs=kwargs,
+                            task_id=message.task_id,
+                            producer=producer,
+                        )
+                    except OperationalError:
+                        raise
+                    except Exception as e:
+                        message.attempts += 1
+                        message.last_error = str(e)
+                        if message.attempts >= max_attempts:
+                            message.dead_at = datetime.utcnow()
+                            logger.error(f"Outbox message {message.id} dead-lettered after {message.attempts} attempts: {str(e)}")
+                        else:
+                            logger.warning(f"Outbox message {message.id} failed to publish: {str(e)}")
+                        continue
+                    published.append(message)
+        except OperationalError as e:
+            # Broker unreachable; leave the rest for the next round
+            logger.error(f"Outbox relay lost the broker after {len(published)} messages: {str(e)}")
+
+        now = datetime.utcnow()
+        for message in published:
+            message.published_at = now
+        db.session.commit()
+        return len(published)
+
+    @staticmethod
+    def requeue_dead(ids=None):
+        """
+        Give dead-lettered rows back to the relay with a fresh attempt count
+
+        Args:
+            ids (list, optional): Rows to requeue; all dead rows by default
+
+        Returns:
+            int: Number of rows requeued
+        """
+        query = OutboxMessage.query.filter(OutboxMessage.dead_at.isnot(None))
+        if ids is not None:
+            query = query.filter(OutboxMessage.id.in_(ids))
+        count = query.update({'dead_at': None, 'attempts': 0}, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def purge(older_than):
+        """Delete rows published before `older_than`; the caller owns the commit"""
+        return OutboxMessage.query.filter(
+            OutboxMessage.published_at < older_than
+        ).delete(synchronize_session=False)
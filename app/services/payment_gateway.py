@@ -0,0 +1,273 @@
+import logging
+import os
+import threading
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from app.utils.redis_client import redis_client, register_script
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURES_KEY = 'breaker:{name}:failures'
+BREAKER_OPEN_KEY = 'breaker:{name}:open'
+
+# KEYS[1] = failure counter, KEYS[2] = open flag
+# ARGV[1] = threshold, ARGV[2] = failure window, ARGV[3] = open seconds
+# Opens the breaker once `threshold` failures land within the window
+RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if failures >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[2], 1, 'EX', ARGV[3])
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+_record_failure = register_script(RECORD_FAILURE_SCRIPT)
+
+
+class PaymentGatewayError(Exception):
+    """The gateway rejected the request itself (bad request, bad credentials)"""
+
+
+class PaymentDeclined(PaymentGatewayError):
+    """The card was declined; retrying will not help"""
+
+
+class GatewayUnavailable(PaymentGatewayError):
+    """The gateway could not be reached or failed; the call may be retried"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every process through Redis.
+
+    After `threshold` failures in a row (within `window` seconds) it opens
+    and calls fail fast for `reset_seconds`, so a gateway outage costs each
+    checkout one Redis round trip instead of a full timeout. When it closes
+    again traffic resumes and another run of failures reopens it.
+    """
+
+    def __init__(self, name, threshold=5, window=60, reset_seconds=30):
+        self.failures_key = BREAKER_FAILURES_KEY.format(name=name)
+        self.open_key = BREAKER_OPEN_KEY.format(name=name)
+        self.threshold = threshold
+        self.window = window
+        self.reset_seconds = reset_seconds
+
+    def allow(self):
+        """Return False while the breaker is open"""
+        return not redis_client.exists(self.open_key)
+
+    def record_failure(self):
+        opened = _record_failure(
+            keys=[self.failures_key, self.open_key],
+            args=[self.threshold, self.window, self.reset_seconds],
+        )
+        if opened:
+            logger.warning(f"Circuit breaker {self.open_key} opened for {self.reset_seconds}s")
+
+    def record_success(self):
+        redis_client.delete(self.failures_key)
+
+
+class PaymentGateway:
+    """
+    Interface of a card payment provider.
+
+    Both calls take an idempotency key, so a retried call (after a timeout
+    or a redelivered task) never charges or refunds twice.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def tokenize(self, card):
+        """
+        Exchange card details for a single-use token
+
+        Only the token is passed on (to task queues, logs or the database),
+        so card numbers and CVVs never leave the request that received them.
+
+        Args:
+            card (dict): number, expiry, cvv and holder
+
+        Returns:
+            str: Token to charge with authorize()
+
+        Raises:
+            PaymentGatewayError: The card details were rejected
+            GatewayUnavailable: The call failed and may be retried
+        """
+        raise NotImplementedError
+
+    def authorize(self, amount, currency, source, idempotency_key):
+        """
+        Charge a card
+
+        Args:
+            amount (float): Amount to charge
+            currency (str): ISO currency code
+            source (str): Card token from tokenize()
+            idempotency_key (str): Key identifying this charge
+
+        Returns:
+            str: Gateway reference of the charge
+
+        Raises:
+            PaymentDeclined: The card was declined
+            GatewayUnavailable: The call failed and may be retried
+        """
+        raise NotImplementedError
+
+    def refund(self, reference, amount, idempotency_key):
+        """
+        Refund a charge
+
+        Args:
+            reference (str): Gateway reference returned by authorize()
+            amount (float): Amount to refund
+            idempotency_key (str): Key identifying this refund
+
+        Returns:
+            str: Gateway reference of the refund
+        """
+        raise NotImplementedError
+
+
+class MockGateway(PaymentGateway):
+    """In-process stand-in that approves every charge without any network call"""
+
+    def tokenize(self, card):
+        return f'tok_mock_{uuid.uuid4().hex}'
+
+    def authorize(self, amount, currency, source, idempotency_key):
+        return f'mock_{uuid.uuid5(uuid.NAMESPACE_URL, idempotency_key).hex}'
+
+    def refund(self, reference, amount, idempotency_key):
+        return f'mock_re_{uuid.uuid5(uuid.NAMESPACE_URL, idempotency_key).hex}'
+
+
+class HttpGateway(PaymentGateway):
+    """
+    JSON-over-HTTP gateway client with a pooled session per process.
+
+    Connections are kept alive in a requests Session whose pool holds up to
+    PAYMENT_POOL_SIZE connections, so a worker pays the TCP/TLS handshake
+    once instead of once per charge. Every call has a connect and a read
+    timeout and goes through a shared circuit breaker. `flask fake-gateway`
+    serves the same API locally.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.base_url = config['PAYMENT_GATEWAY_URL'].rstrip('/')
+        self.api_key = config.get('PAYMENT_GATEWAY_KEY')
+        self.pool_size = config.get('PAYMENT_POOL_SIZE', 10)
+        self.timeout = (config.get('PAYMENT_CONNECT_TIMEOUT', 3), config.get('PAYMENT_READ_TIMEOUT', 10))
+        self.breaker = CircuitBreaker(
+            'payment_gateway',
+            threshold=config.get('PAYMENT_BREAKER_THRESHOLD', 5),
+            reset_seconds=config.get('PAYMENT_BREAKER_RESET_SECONDS', 30),
+        )
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    @property
+    def session(self):
+        # Forked workers must not share the parent's sockets
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    session = requests.Session()
+                    # Retries are left to the caller, which knows the idempotency key
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    if self.api_key:
+                        session.headers['Authorization'] = f'Bearer {self.api_key}'
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def _post(self, path, payload, idempotency_key):
+        if not self.breaker.allow():
+            raise GatewayUnavailable('Payment gateway circuit is open')
+
+        try:
+            response = self.session.post(
+                f'{self.base_url}{path}',
+                json=payload,
+                headers={'Idempotency-Key': idempotency_key},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise GatewayUnavailable(f'Payment gateway request failed: {e}') from e
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+            raise GatewayUnavailable(f'Payment gateway returned {response.status_code}')
+        self.breaker.record_success()
+
+        body = response.json() if response.content else {}
+        if response.status_code == 402:
+            raise PaymentDeclined(body.get('error', {}).get('message', 'Card declined'))
+        if response.status_code >= 400:
+            raise PaymentGatewayError(body.get('error', {}).get('message', f'HTTP {response.status_code}'))
+        return body
+
+    def tokenize(self, card):
+        body = self._post('/v1/tokens', {
+            'card': {
+                'number': card['number'],
+                'expiry': card['expiry'],
+                'cvv': card['cvv'],
+                'holder': card.get('holder'),
+            },
+        }, str(uuid.uuid4()))
+        return body['id']
+
+    def authorize(self, amount, currency, source, idempotency_key):
+        body = self._post('/v1/charges', {
+            'amount': round(amount * 100),
+            'currency': currency,
+            'source': source,
+        }, idempotency_key)
+        return body['id']
+
+    def refund(self, reference, amount, idempotency_key):
+        body = self._post('/v1/refunds', {
+            'charge': reference,
+            'amount': round(amount * 100),
+        }, idempotency_key)
+        return body['id']
+
+
+# PAYMENT_GATEWAY setting -> gateway class
+GATEWAYS = {
+    'mock': MockGateway,
+    'http': HttpGateway,
+}
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Get this process's gateway client, built from PAYMENT_GATEWAY on first use"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                name = current_app.config.get('PAYMENT_GATEWAY', 'mock')
+                if name not in GATEWAYS:
+                    raise ValueError(f'Unknown payment gateway: {name}')
+                _gateway = GATEWAYS[name](current_app.config)
+    return _gateway
@@ -1,28 +1,196 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import logging
 import uuid
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from app.models.payment import Payment
-from app.utils.database import db
+from app.services.payment_gateway import GatewayUnavailable, PaymentGatewayError, get_gateway
+from app.utils.database import db, unit_of_work
+
+logger = logging.getLogger(__name__)
 
 
 class PaymentService:
+    """
+    Card payments for bookings.
+
+    Checkout exchanges the card for a gateway token, records a pending
+    payment and queues authorize_payment with the token; the worker charges
+    it through the configured gateway and completes the booking, while the
+    checkout page polls the payment's status. Card numbers and CVVs never
+    reach the broker, and request workers are held only for the quick
+    tokenization call.
+    """
+
+    @staticmethod
+    def pending_payment(booking_id):
+        """Get the booking's payment still being authorized, if any"""
+        return Payment.query.filter_by(booking_id=booking_id, status='pending').first()
+
     @staticmethod
-    def process_payment(amount, card_number, expiry, cvv, booking_id):
-        """Process payment (mock implementation)"""
-        # In production: Gọi Stripe API ở đây
-        payment_id = str(uuid.uuid4())
+    def latest_payment(booking_id):
+        """Get the booking's most recent payment attempt"""
+        return (
+            Payment.query.filter_by(booking_id=booking_id)
+            .order_by(Payment.created_at.desc())
+            .first()
+        )
+
+    @staticmethod
+    def start_payment(booking, card):
+        """
+        Record a pending payment and queue its authorization
+
+        A booking has at most one pending payment; submitting again while
+        one is in flight returns that payment instead of charging twice.
+
+        Args:
+            booking (Booking): Booking to pay for
+            card (dict): number, expiry, cvv and holder
+
+        Returns:
+            Payment: The booking's pending payment
+
+        Raises:
+            PaymentGatewayError: The card could not be tokenized
+        """
+        from app.celery.tasks.payment_tasks import authorize_payment
+
+        payment = PaymentService.pending_payment(booking.id)
+        if payment:
+            return payment
+
+        token = get_gateway().tokenize(card)
 
         payment = Payment(
-            id=payment_id,
-            booking_id=booking_id,
-            amount=amount,
-            status='paid',
+            id=str(uuid.uuid4()),
+            booking_id=booking.id,
+            amount=booking.total_amount,
+            status='pending',
             method='card',
             created_at=datetime.utcnow()
         )
         db.session.add(payment)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent submit created the pending payment first
+            db.session.rollback()
+            return PaymentService.pending_payment(booking.id)
+
+        try:
+            authorize_payment.delay(payment.id, token)
+        except Exception:
+            PaymentService.fail(payment.id, 'Payment could not be started. Please try again.')
+            raise
+        return payment
+
+    @staticmethod
+    def authorize(payment_id, token):
+        """
+        Charge the card for a pending payment and complete its booking
+
+        The payment id is the gateway idempotency key, so running this again
+        for the same payment (task retry or redelivery) never charges twice.
+        If the booking expired while the card was being charged, the charge
+        is refunded, as it is if the payment was meanwhile given up on by
+        fail_stale().
+
+        Args:
+            payment_id (str): ID of the pending payment
+            token (str): Card token from the gateway
+
+        Returns:
+            dict: Final payment status and message
+
+        Raises:
+            GatewayUnavailable: The gateway failed; the caller should retry
+        """
+        from app.services.booking_service import BookingService
+
+        payment = Payment.query.get(payment_id)
+        if not payment:
+            return {'status': 'error', 'message': 'Payment not found'}
+        if payment.status != 'pending':
+            return {'status': payment.status, 'message': payment.failure_reason}
+
+        gateway = get_gateway()
+        currency = current_app.config.get('PAYMENT_CURRENCY', 'USD')
+        try:
+            reference = gateway.authorize(payment.amount, currency, token, idempotency_key=payment.id)
+        except GatewayUnavailable:
+            raise
+        except PaymentGatewayError as e:
+            PaymentService.fail(payment.id, str(e))
+            return {'status': 'failed', 'message': str(e)}
+
+        try:
+            # Payment, booking, tickets and the confirmation task commit together
+            with unit_of_work():
+                # Locked so fail_stale() cannot give up on it meanwhile
+                db.session.refresh(payment, with_for_update=True)
+                if payment.status != 'pending':
+                    raise ValueError('Payment timed out')
+                payment.status = 'paid'
+                payment.gateway_reference = reference
+                BookingService.complete_payment(payment.booking_id, {'payment_id': payment.id})
+        except ValueError as e:
+            # The booking or payment is no longer payable; database errors
+            # propagate instead so the caller retries
+            gateway.refund(reference, payment.amount, idempotency_key=f'{payment.id}:refund')
+            with unit_of_work():
+                payment = Payment.query.get(payment_id)
+                payment.status = 'refunded'
+                payment.gateway_reference = reference
+                payment.failure_reason = 'The payment could not be completed and was refunded'
+                payment.refunded_at = datetime.utcnow()
+            logger.warning(f"Refunded payment {payment_id}: booking no longer payable ({e})")
+            return {'status': 'refunded', 'message': payment.failure_reason}
+
+        return {'status': 'paid', 'message': None}
+
+    @staticmethod
+    def fail(payment_id, reason):
+        """Mark a pending payment as failed so the booking can be paid again"""
+        db.session.execute(
+            db.update(Payment)
+            .where(Payment.id == payment_id, Payment.status == 'pending')
+            .values(status='failed', failure_reason=reason[:255], updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
 
-        return {'status': 'success', 'payment_id': payment_id}
+    @staticmethod
+    def fail_stale(older_than=None):
+        """
+        Fail pending payments whose authorization never finished
+
+        A task lost with the broker would otherwise leave its payment
+        pending forever, and the one-pending-payment-per-booking index would
+        keep the customer from paying again.
+
+        Args:
+            older_than (int, optional): Age in seconds; PAYMENT_PENDING_TIMEOUT by default
+
+        Returns:
+            int: Number of payments failed
+        """
+        older_than = older_than or current_app.config.get('PAYMENT_PENDING_TIMEOUT', 300)
+        cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+        result = db.session.execute(
+            db.update(Payment)
+            .where(Payment.status == 'pending', Payment.created_at < cutoff)
+            .values(
+                status='failed',
+                failure_reason='The payment timed out. Please try again.',
+                updated_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount:
+            logger.warning(f"Failed {result.rowcount} payment(s) stuck pending for over {older_than}s")
+        return result.rowcount
 
     @staticmethod
     def create_payment_intent(amount, card_number, expiry, cvv):
@@ -37,34 +205,47 @@ class PaymentService:
 
     @staticmethod
     def process_refund(booking_id):
-        """Process refund for a booking (mocked)"""
-        payment = Payment.query.filter_by(booking_id=booking_id).first()
+        """
+        Refund a booking's paid payment at the gateway; the caller owns the commit
+
+        The refund is keyed on the payment, so a retried cancellation never
+        refunds twice.
+
+        Args:
+            booking_id (int): ID of the booking being cancelled
 
+        Returns:
+            dict: 'status' is success or error, with a message
+        """
+        payment = Payment.query.filter_by(booking_id=booking_id, status='paid').first()
         if not payment:
-            return {'status': 'error', 'message': 'Payment not found'}
+            return {'status': 'error', 'message': 'No paid payment to refund'}
 
-        if payment.status != 'paid':
-            return {'status': 'error', 'message': 'Invalid payment status'}
+        try:
+            get_gateway().refund(
+                payment.gateway_reference, payment.amount, idempotency_key=f'{payment.id}:refund'
+            )
+        except PaymentGatewayError as e:
+            logger.error(f"Refund of payment {payment.id} failed: {str(e)}")
+            return {'status': 'error', 'message': str(e)}
 
-        # Update status
         payment.status = 'refunded'
         payment.refunded_at = datetime.utcnow()
-        db.session.commit()
 
         return {'status': 'success', 'message': 'Refund processed'}
 
     @staticmethod
     def get_payment_status(booking_id):
-        """Get payment status"""
-        payment = Payment.query.filter_by(booking_id=booking_id).first()
+        """Get the status of the booking's latest payment attempt"""
+        payment = PaymentService.latest_payment(booking_id)
         if not payment:
             return 'not_found'
         return payment.status
 
     @staticmethod
     def get_payment_details(booking_id):
-        """Return detailed payment info"""
-        payment = Payment.query.filter_by(booking_id=booking_id).first()
+        """Return detailed info on the booking's latest payment attempt"""
+        payment = PaymentService.latest_payment(booking_id)
         if not payment:
             return None
 
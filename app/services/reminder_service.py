@@ -0,0 +1,135 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+from app.utils.database import db
+from app.services.mail_delivery_service import MailDeliveryService
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderService:
+    """
+    Reminder emails for confirmed bookings of events starting soon.
+
+    Due bookings are claimed by stamping reminder_sent_at in one UPDATE,
+    so a rerun or a concurrent run only sees bookings not yet claimed and
+    its cost grows with the number of new reminders. Claimed bookings are
+    then sent in fixed-size batches, one event per batch.
+    """
+
+    @staticmethod
+    def claim_due(window_hours=24, limit=5000):
+        """
+        Mark due bookings as reminded and return them
+
+        Args:
+            window_hours (int): Remind for events starting within this many hours
+            limit (int): Maximum number of bookings to claim
+
+        Returns:
+            dict: Event ID -> list of claimed booking IDs
+        """
+        now = datetime.utcnow()
+        due = (
+            db.select(Booking.id)
+            .join(Event, Event.id == Booking.event_id)
+            .where(
+                Event.event_date > now,
+                Event.event_date <= now + timedelta(hours=window_hours),
+                Event.status == 'active',
+                Booking.status == 'confirmed',
+                Booking.reminder_sent_at.is_(None),
+            )
+            .limit(limit)
+        )
+        claimed = db.session.execute(
+            db.update(Booking)
+            .where(Booking.id.in_(due), Booking.reminder_sent_at.is_(None))
+            .values(reminder_sent_at=now)
+            .returning(Booking.id, Booking.event_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+
+        booking_ids = defaultdict(list)
+        for row in claimed:
+            booking_ids[row.event_id].append(row.id)
+        return booking_ids
+
+    @staticmethod
+    def release(booking_ids):
+        """Clear the reminder marker so the next run sends these again"""
+        if not booking_ids:
+            return
+        db.session.execute(
+            db.update(Booking)
+            .where(Booking.id.in_(booking_ids))
+            .values(reminder_sent_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def deliver(event_id, booking_ids):
+        """
+        Send the reminders for a batch of bookings of one event
+
+        Args:
+            event_id (int): ID of the event
+            booking_ids (list): IDs of claimed bookings
+
+        Returns:
+            dict: Number sent, failed recipients and the booking IDs still unsent
+        """
+        try:
+            return ReminderService._send(event_id, booking_ids)
+        except Exception:
+            # Nothing was sent: MailDeliveryService.deliver only raises
+            # before its first message. Give the whole batch back so the
+            # claimed bookings are not left marked as reminded.
+            logger.exception(f"Reminder batch for event {event_id} failed; releasing {len(booking_ids)} booking(s)")
+            db.session.rollback()
+            ReminderService.release(booking_ids)
+            raise
+
+    @staticmethod
+    def _send(event_id, booking_ids):
+        event = db.session.get(Event, event_id)
+        if not event:
+            return {'sent': 0, 'failed': [], 'pending': []}
+
+        rows = (
+            db.session.query(Booking, User)
+            .join(User, User.id == Booking.user_id)
+            .options(db.selectinload(Booking.tickets))
+            .filter(Booking.id.in_(booking_ids))
+            .order_by(Booking.id)
+            .all()
+        )
+        messages = [
+            {
+                'recipient_email': user.email,
+                'subject': f"Reminder: {event.title} starts in 24 hours!",
+                'template_name': 'mail/event_reminder.html',
+                'context': {
+                    'user': user.to_dict(),
+                    'booking': {
+                        'id': booking.id,
+                        'booking_number': booking.booking_number,
+                        'quantity': booking.quantity,
+                    },
+                    'tickets': [{'ticket_number': ticket.ticket_number} for ticket in booking.tickets],
+                },
+            }
+            for booking, user in rows
+        ]
+
+        result = MailDeliveryService.deliver(
+            messages,
+            shared_context={'event': {**event.to_dict(), 'event_date': event.event_date}},
+        )
+        result['pending'] = [message['context']['booking']['id'] for message in result['pending']]
+        return result
@@ -0,0 +1,106 @@
+import json
+import os
+from datetime import datetime
+from itertools import groupby
+from flask import current_app
+from app.models.booking import Booking
+from app.models.ticket import Ticket
+from app.utils.database import db
+
+
+class ReportService:
+    @staticmethod
+    def _report_filters(start_dt, end_dt):
+        filters = [Booking.status == 'confirmed', Booking.payment_status == 'paid']
+        if start_dt:
+            filters.append(Booking.created_at >= start_dt)
+        if end_dt:
+            filters.append(Booking.created_at <= end_dt)
+        return filters
+
+    @staticmethod
+    def summarize(start_dt=None, end_dt=None):
+        """
+        Compute booking statistics with SQL aggregates
+
+        Args:
+            start_dt (datetime, optional): Start of the report period
+            end_dt (datetime, optional): End of the report period
+
+        Returns:
+            dict: Total bookings, total revenue and average booking value
+        """
+        total_bookings, total_revenue, avg_booking_value = db.session.query(
+            db.func.count(Booking.id),
+            db.func.coalesce(db.func.sum(Booking.total_amount), 0),
+            db.func.coalesce(db.func.avg(Booking.total_amount), 0),
+        ).filter(*ReportService._report_filters(start_dt, end_dt)).one()
+
+        return {
+            'total_bookings': total_bookings,
+            'total_revenue': float(total_revenue),
+            'average_booking_value': float(avg_booking_value),
+        }
+
+    @staticmethod
+    def export_bookings(start_dt=None, end_dt=None, chunk_size=1000):
+        """
+        Stream the report's booking rows into a JSON-lines file
+
+        Rows are fetched with yield_per and written as they arrive, so
+        memory use stays flat however long the report period is. Each
+        line is one booking with its ticket numbers.
+
+        Args:
+            start_dt (datetime, optional): Start of the report period
+            end_dt (datetime, optional): End of the report period
+            chunk_size (int): Number of rows fetched per round trip
+
+        Returns:
+            dict: Artifact handle with the file path, format and row count
+        """
+        report_dir = current_app.config['REPORT_DIR']
+        os.makedirs(report_dir, exist_ok=True)
+        filename = f"bookings-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.jsonl"
+        path = os.path.join(report_dir, filename)
+
+        stmt = (
+            db.select(
+                Booking.id,
+                Booking.booking_number,
+                Booking.user_id,
+                Booking.event_id,
+                Booking.quantity,
+                Booking.total_amount,
+                Booking.payment_id,
+                Booking.created_at,
+                Ticket.ticket_number,
+            )
+            .outerjoin(Ticket, Ticket.booking_id == Booking.id)
+            .where(*ReportService._report_filters(start_dt, end_dt))
+            .order_by(Booking.id)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        row_count = 0
+        tmp_path = f"{path}.part"
+        with open(tmp_path, 'w', encoding='utf-8') as artifact:
+            rows = db.session.execute(stmt)
+            for _, booking_rows in groupby(rows, key=lambda row: row.id):
+                booking_rows = list(booking_rows)
+                first = booking_rows[0]
+                artifact.write(json.dumps({
+                    'id': first.id,
+                    'booking_number': first.booking_number,
+                    'user_id': first.user_id,
+                    'event_id': first.event_id,
+                    'quantity': first.quantity,
+                    'total_amount': first.total_amount,
+                    'payment_id': first.payment_id,
+                    'created_at': first.created_at.isoformat(),
+                    'tickets': [row.ticket_number for row in booking_rows if row.ticket_number],
+                }) + '\n')
+                row_count += 1
+        os.replace(tmp_path, path)
+
+        return {'path': path, 'format': 'jsonl', 'rows': row_count}
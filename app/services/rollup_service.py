@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from app.models.booking import Booking
+from app.models.sales import DailyEventSales
+from app.utils.database import db
+
+
+class SalesRollupService:
+    """
+    Incremental maintenance of the daily_event_sales rollup.
+
+    Booking state transitions add their deltas to the row for the booking's
+    creation date and event in the same transaction as the booking change.
+    compact_daily_sales periodically rebuilds recent days from the bookings
+    table to correct any drift.
+    """
+
+    @staticmethod
+    def _insert():
+        if db.session.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(DailyEventSales)
+
+    @staticmethod
+    def record_many(deltas):
+        """
+        Add counter deltas to their rollup rows with one upsert
+
+        Args:
+            deltas (list): Dicts with sales_date, event_id and any counters to add
+        """
+        if not deltas:
+            return
+
+        rows = [
+            {
+                'sales_date': delta['sales_date'],
+                'event_id': delta['event_id'],
+                **{counter: delta.get(counter, 0) for counter in DailyEventSales.COUNTERS},
+            }
+            for delta in deltas
+        ]
+        stmt = SalesRollupService._insert()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['sales_date', 'event_id'],
+            set_={
+                counter: getattr(DailyEventSales, counter) + stmt.excluded[counter]
+                for counter in DailyEventSales.COUNTERS
+            },
+        )
+        db.session.execute(stmt, rows)
+
+    @staticmethod
+    def record(booking, **counters):
+        """Add counter deltas for a single booking; the caller owns the commit"""
+        SalesRollupService.record_many([{
+            'sales_date': (booking.created_at or datetime.utcnow()).date(),
+            'event_id': booking.event_id,
+            **counters,
+        }])
+
+    @staticmethod
+    def booking_created(booking):
+        SalesRollupService.record(booking, bookings_created=1)
+
+    @staticmethod
+    def booking_confirmed(booking):
+        SalesRollupService.record(
+            booking,
+            bookings_confirmed=1,
+            tickets_sold=booking.quantity,
+            revenue=booking.total_amount,
+        )
+
+    @staticmethod
+    def booking_cancelled(booking, was_confirmed=False):
+        if was_confirmed:
+            SalesRollupService.record(
+                booking,
+                bookings_confirmed=-1,
+                bookings_cancelled=1,
+                tickets_sold=-booking.quantity,
+                revenue=-booking.total_amount,
+            )
+        else:
+            SalesRollupService.record(booking, bookings_cancelled=1)
+
+    @staticmethod
+    def rebuild(start_date, end_date):
+        """
+        Recompute the rollup rows for a date range from the bookings table
+
+        Args:
+            start_date (date): First day to rebuild
+            end_date (date): Last day to rebuild, inclusive
+        """
+        confirmed = Booking.status == 'confirmed'
+        cancelled = Booking.status == 'cancelled'
+        sales_date = db.func.date(Booking.created_at)
+
+        aggregate = (
+            db.select(
+                sales_date,
+                Booking.event_id,
+                db.func.count(Booking.id),
+                db.func.sum(db.case((confirmed, 1), else_=0)),
+                db.func.sum(db.case((cancelled, 1), else_=0)),
+                db.func.sum(db.case((confirmed, Booking.quantity), else_=0)),
+                db.func.sum(db.case((confirmed, Booking.total_amount), else_=0)),
+            )
+            .where(
+                Booking.created_at >= datetime.combine(start_date, datetime.min.time()),
+                Booking.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+            )
+            .group_by(sales_date, Booking.event_id)
+        )
+
+        db.session.execute(
+            db.delete(DailyEventSales).where(
+                DailyEventSales.sales_date >= start_date,
+                DailyEventSales.sales_date <= end_date,
+            )
+        )
+        db.session.execute(
+            db.insert(DailyEventSales).from_select(
+                ['sales_date', 'event_id', *DailyEventSales.COUNTERS], aggregate
+            )
+        )
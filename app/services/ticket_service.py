@@ -0,0 +1,41 @@
+from datetime import datetime
+from app.models.ticket import Ticket
+from app.utils.database import db
+
+
+class TicketService:
+    @staticmethod
+    def mint_tickets(booking):
+        """
+        Issue every ticket of a booking with a single bulk INSERT
+
+        The rows are written with one executemany instead of one ORM object
+        per seat, and the caller gets the ticket numbers back without
+        reloading booking.tickets. The caller owns the commit.
+
+        Args:
+            booking (Booking): Booking to issue tickets for
+
+        Returns:
+            list: Ticket numbers of the minted tickets
+        """
+        ticket_numbers = Ticket.generate_ticket_numbers(booking.quantity)
+        now = datetime.utcnow()
+
+        db.session.execute(
+            db.insert(Ticket),
+            [
+                {
+                    'ticket_number': ticket_number,
+                    'event_id': booking.event_id,
+                    'booking_id': booking.id,
+                    'status': 'active',
+                    'qr_code': Ticket.build_qr_code(ticket_number),
+                    'created_at': now,
+                    'updated_at': now,
+                }
+                for ticket_number in ticket_numbers
+            ],
+        )
+
+        return ticket_numbers
@@ -0,0 +1,271 @@
+import time
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.services.inventory_service import InventoryService
+from app.utils.redis_client import redis_client, register_script
+
+ROOM_KEY = 'waitingroom:{event_id}'
+POSITIONS_KEY = 'waitingroom:{event_id}:positions'
+ADMITTED_KEY = 'waitingroom:{event_id}:admitted'
+CLAIMED_KEY = 'waitingroom:{event_id}:claimed'
+
+TICKET_SALT = 'waiting-room-ticket'
+ADMISSION_SALT = 'waiting-room-admission'
+
+# KEYS[1] = room hash, KEYS[2] = positions hash; ARGV[1] = user id
+# Returns the user's place in line, giving new arrivals the next one, or
+# -1 if the room is closed
+JOIN_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local position = redis.call('HGET', KEYS[2], ARGV[1])
+if position then
+    return tonumber(position)
+end
+position = redis.call('HINCRBY', KEYS[1], 'joined', 1)
+redis.call('HSET', KEYS[2], ARGV[1], position)
+return position
+"""
+
+# KEYS[1] = room hash, KEYS[2] = admitted set (position -> admission deadline)
+# ARGV[1] = now, ARGV[2] = cap on admitted users still shopping (-1 = none)
+# Lets people in at the room's rate, but never more than `cap` at a time;
+# admissions that were used or ran out free their place. New admissions
+# only last the short claim window until their page polls, so places of
+# people who left the line stop counting against the cap quickly.
+# Returns the last admitted position, or -1 if the room is closed.
+ADVANCE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local room = redis.call('HMGET', KEYS[1], 'admitted', 'joined', 'advanced_at', 'rate', 'claim')
+local admitted, joined = tonumber(room[1]), tonumber(room[2])
+local advanced_at, rate, claim = tonumber(room[3]), tonumber(room[4]), tonumber(room[5])
+local now = tonumber(ARGV[1])
+
+local due = math.floor((now - advanced_at) * rate)
+if due < 1 then
+    return admitted
+end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local admit = math.min(due, joined - admitted)
+local cap = tonumber(ARGV[2])
+if cap >= 0 then
+    admit = math.min(admit, math.max(cap - redis.call('ZCARD', KEYS[2]), 0))
+end
+for position = admitted + 1, admitted + admit do
+    redis.call('ZADD', KEYS[2], now + claim, position)
+end
+
+-- Unused capacity is not banked: an idle or full room does not admit a
+-- burst later
+if admit == due then
+    advanced_at = advanced_at + due / rate
+else
+    advanced_at = now
+end
+redis.call('HSET', KEYS[1], 'admitted', admitted + admit, 'advanced_at', advanced_at)
+return admitted + admit
+"""
+
+# KEYS[1] = admitted set, KEYS[2] = claimed set; ARGV[1] = position,
+# ARGV[2] = now, ARGV[3] = admission window
+# The first poll after admission extends the claim window to the full
+# admission window. Returns the deadline, or nil if the admission is gone.
+CLAIM_SCRIPT = """
+local deadline = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not deadline or tonumber(deadline) <= tonumber(ARGV[2]) then
+    return false
+end
+if redis.call('SADD', KEYS[2], ARGV[1]) == 1 then
+    deadline = tostring(tonumber(ARGV[2]) + tonumber(ARGV[3]))
+    redis.call('ZADD', KEYS[1], deadline, ARGV[1])
+end
+return deadline
+"""
+
+_join = register_script(JOIN_SCRIPT)
+_advance = register_script(ADVANCE_SCRIPT)
+_claim = register_script(CLAIM_SCRIPT)
+
+
+class WaitingRoomService:
+    """
+    Virtual waiting room in front of booking for on-sale spikes.
+
+    While an event's room is open, buyers join a line in Redis and are let
+    through at WAITING_ROOM_ADMIT_RATE per second, with at most
+    WAITING_ROOM_OVERSUBSCRIBE x the seats still available shopping at
+    once. Admitted buyers get a signed admission token that create_booking
+    requires, valid for WAITING_ROOM_ADMISSION_SECONDS and usable once. An
+    admission nobody polls for within WAITING_ROOM_CLAIM_SECONDS lapses, so
+    people who left the line do not hold up the ones behind them.
+    Places in line are carried in a signed ticket, so polling for one's
+    turn only touches Redis and the database load stays bounded by the
+    admission rate however large the crowd is. Admission is advanced by
+    the polls themselves; no scheduler is involved.
+    """
+
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+
+    @staticmethod
+    def _keys(event_id):
+        return [ROOM_KEY.format(event_id=event_id), ADMITTED_KEY.format(event_id=event_id)]
+
+    @staticmethod
+    def open(event, rate=None):
+        """
+        Start queueing buyers for an event
+
+        Args:
+            event (Event): Event going on sale
+            rate (float, optional): Buyers admitted per second; WAITING_ROOM_ADMIT_RATE by default
+        """
+        config = current_app.config
+        # The admission cap reads the seat ledger, so make sure it is warm
+        InventoryService.warm(event)
+        redis_client.hset(ROOM_KEY.format(event_id=event.id), mapping={
+            'rate': rate or config.get('WAITING_ROOM_ADMIT_RATE', 5),
+            'claim': config.get('WAITING_ROOM_CLAIM_SECONDS', 30),
+            'joined': 0,
+            'admitted': 0,
+            'advanced_at': time.time(),
+        })
+
+    @staticmethod
+    def close(event_id):
+        """Stop queueing; booking is open to everyone again"""
+        redis_client.delete(
+            ROOM_KEY.format(event_id=event_id),
+            POSITIONS_KEY.format(event_id=event_id),
+            ADMITTED_KEY.format(event_id=event_id),
+            CLAIMED_KEY.format(event_id=event_id),
+        )
+
+    @staticmethod
+    def is_open(event_id):
+        return bool(redis_client.exists(ROOM_KEY.format(event_id=event_id)))
+
+    @staticmethod
+    def open_event_ids(event_ids):
+        """Get which of the given events have an open room, in one round trip"""
+        pipe = redis_client.pipeline(transaction=False)
+        for event_id in event_ids:
+            pipe.exists(ROOM_KEY.format(event_id=event_id))
+        return {event_id for event_id, is_open in zip(event_ids, pipe.execute()) if is_open}
+
+    @staticmethod
+    def join(event_id, user_id):
+        """
+        Take a place in line, or get back the one already held
+
+        Returns:
+            str: Signed ticket holding the place in line, or None if the room is closed
+        """
+        position = int(_join(
+            keys=[ROOM_KEY.format(event_id=event_id), POSITIONS_KEY.format(event_id=event_id)],
+            args=[user_id],
+        ))
+        if position < 0:
+            return None
+        return WaitingRoomService._serializer().dumps(
+            {'event_id': event_id, 'user_id': user_id, 'position': position}, salt=TICKET_SALT
+        )
+
+    @staticmethod
+    def _leave(event_id, user_id):
+        # A later join goes to the back of the line
+        redis_client.hdel(POSITIONS_KEY.format(event_id=event_id), user_id)
+
+    @staticmethod
+    def status(ticket):
+        """
+        Check a place in line, letting people in as their turn comes
+
+        Args:
+            ticket (str): Ticket from join()
+
+        Returns:
+            dict: 'state' is one of waiting (with 'ahead'), admitted (with
+                'token' and 'expires_in'), expired, sold_out, closed or invalid
+        """
+        try:
+            data = WaitingRoomService._serializer().loads(ticket, salt=TICKET_SALT)
+        except BadSignature:
+            return {'state': 'invalid'}
+        event_id, position = data['event_id'], data['position']
+
+        available = InventoryService.peek_available(event_id)
+        cap = -1
+        if available is not None:
+            oversubscribe = current_app.config.get('WAITING_ROOM_OVERSUBSCRIBE', 1.5)
+            cap = int(available * oversubscribe)
+
+        keys = WaitingRoomService._keys(event_id)
+        admitted = int(_advance(keys=keys, args=[time.time(), cap]))
+        if admitted < 0:
+            return {'state': 'closed'}
+        if position > admitted:
+            if available == 0:
+                return {'state': 'sold_out', 'ahead': position - admitted - 1}
+            return {'state': 'waiting', 'ahead': position - admitted - 1}
+
+        deadline = _claim(
+            keys=[keys[1], CLAIMED_KEY.format(event_id=event_id)],
+            args=[position, time.time(), current_app.config.get('WAITING_ROOM_ADMISSION_SECONDS', 600)],
+        )
+        if deadline is None:
+            WaitingRoomService._leave(event_id, data['user_id'])
+            return {'state': 'expired'}
+        deadline = float(deadline)
+        token = WaitingRoomService._serializer().dumps(
+            {'event_id': event_id, 'user_id': data['user_id'], 'position': position, 'deadline': deadline},
+            salt=ADMISSION_SALT,
+        )
+        return {'state': 'admitted', 'token': token, 'expires_in': int(deadline - time.time())}
+
+    @staticmethod
+    def consume(token, event_id, user_id):
+        """
+        Use an admission token for a booking
+
+        The admission is removed atomically, so a token books at most once;
+        give it back with restore() if the booking then fails.
+
+        Returns:
+            dict: The admission, or None if the token is invalid, used or expired
+        """
+        if not token:
+            return None
+        try:
+            admission = WaitingRoomService._serializer().loads(
+                token, salt=ADMISSION_SALT,
+                max_age=current_app.config.get('WAITING_ROOM_ADMISSION_SECONDS', 600),
+            )
+        except BadSignature:
+            return None
+        if admission['event_id'] != event_id or admission['user_id'] != user_id:
+            return None
+        if admission['deadline'] <= time.time():
+            return None
+        if not redis_client.zrem(ADMITTED_KEY.format(event_id=event_id), admission['position']):
+            return None
+        WaitingRoomService._leave(event_id, user_id)
+        return admission
+
+    @staticmethod
+    def restore(admission):
+        """Give back an admission whose booking failed, until its deadline"""
+        if admission['deadline'] > time.time():
+            redis_client.zadd(
+                ADMITTED_KEY.format(event_id=admission['event_id']),
+                {admission['position']: admission['deadline']},
+            )
+            redis_client.hset(
+                POSITIONS_KEY.format(event_id=admission['event_id']),
+                admission['user_id'], admission['position'],
+            )
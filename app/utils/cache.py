@@ -0,0 +1,76 @@
+import hashlib
+import logging
+from functools import wraps
+from flask import Response, current_app, make_response, request, session
+from flask_login import current_user
+from redis.exceptions import RedisError
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'cache:catalog:version'
+PAGE_CACHE_KEY = 'cache:page:{version}:{endpoint}:{digest}'
+
+
+def catalog_version():
+    """Get the current event-catalog version"""
+    return int(redis_client.get(CATALOG_VERSION_KEY) or 0)
+
+
+def bump_catalog_version():
+    """Invalidate every cached page that shows event data"""
+    try:
+        redis_client.incr(CATALOG_VERSION_KEY)
+    except RedisError as e:
+        logger.error(f"Failed to bump catalog version: {str(e)}")
+
+
+def page_cache_key(version, query_args=()):
+    """Build the cache key for the current request"""
+    parts = [f"{name}={value}" for name, value in sorted((request.view_args or {}).items())]
+    parts += [f"{name}={request.args.get(name, '')}" for name in query_args]
+    digest = hashlib.sha1('&'.join(parts).encode()).hexdigest()
+    return PAGE_CACHE_KEY.format(version=version, endpoint=request.endpoint, digest=digest)
+
+
+def cached_page(query_args=()):
+    """
+    Cache the rendered page for anonymous visitors
+
+    Pages are keyed on the endpoint, its view arguments, the given query
+    arguments and the event-catalog version, so bumping the version
+    invalidates all of them at once. Logged-in users and requests with
+    pending flash messages always get a freshly rendered page.
+
+    Args:
+        query_args (tuple): Query string arguments that change the page
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or current_user.is_authenticated or session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            try:
+                key = page_cache_key(catalog_version(), query_args)
+                cached = redis_client.get(key)
+            except RedisError as e:
+                logger.error(f"Page cache unavailable: {str(e)}")
+                return f(*args, **kwargs)
+
+            if cached is not None:
+                return Response(cached, mimetype='text/html')
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                try:
+                    redis_client.setex(
+                        key,
+                        current_app.config.get('PAGE_CACHE_TIMEOUT', 300),
+                        response.get_data()
+                    )
+                except RedisError as e:
+                    logger.error(f"Failed to cache page {key}: {str(e)}")
+            return response
+        return decorated_function
+    return decorator
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from app.extensions import db
 from flask_migrate import Migrate
 
@@ -13,6 +14,9 @@ def init_db(app):
     from app.models.event import Event
     from app.models.ticket import Ticket
     from app.models.booking import Booking
+    from app.models.sales import DailyEventSales
+    from app.models.outbox import OutboxMessage
+    from app.models.payment import Payment
 
 def create_tables(app):
     """Create all database tables"""
@@ -31,4 +35,58 @@ def commit_changes():
         return True
     except Exception as e:
         db.session.rollback()
-        return False 
\ No newline at end of file
+        return False 
+
+
+class UnitOfWork:
+    """Callbacks to run once the surrounding transaction has committed"""
+
+    def __init__(self):
+        self._after_commit = []
+
+    def after_commit(self, callback, *args, **kwargs):
+        """
+        Run a side effect outside the database (Redis ledger, hold index)
+        only if the transaction commits, e.g. returning seats after a
+        cancellation
+        """
+        self._after_commit.append((callback, args, kwargs))
+
+    def _run_after_commit(self):
+        for callback, args, kwargs in self._after_commit:
+            callback(*args, **kwargs)
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Run a block of writes as a single transaction
+
+    The session is committed once when the outermost block exits and rolled
+    back if it raises, so services called inside the block add to the
+    session without committing on their own. Nested blocks join the outer
+    one, which lets a service method open a block and still be composed into
+    a larger transaction by its caller.
+
+    Usage:
+        with unit_of_work() as uow:
+            booking = Booking.query.with_for_update().filter_by(id=booking_id).one()
+            booking.cancel()
+            uow.after_commit(InventoryService.release, booking.event_id, booking.quantity)
+    """
+    outer = db.session.info.get('unit_of_work')
+    if outer is not None:
+        yield outer
+        return
+
+    uow = UnitOfWork()
+    db.session.info['unit_of_work'] = uow
+    try:
+        yield uow
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop('unit_of_work', None)
+    uow._run_after_commit()
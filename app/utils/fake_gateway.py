@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+import uuid
+from flask import Flask, jsonify, request
+
+# Card numbers with a fixed outcome, after the usual provider test cards
+DECLINED_CARDS = {
+    '4000000000000002': 'Your card was declined.',
+    '4000000000009995': 'Your card has insufficient funds.',
+    '4000000000000069': 'Your card has expired.',
+}
+ERROR_CARD = '4000000000000119'  # Gateway answers 500
+
+
+def create_fake_gateway(latency=0.0, failure_rate=0.0):
+    """
+    Build a local stand-in for the payment gateway HttpGateway talks to
+
+    Cards are exchanged for tokens first, and charges take a token.
+    Charges succeed unless the card is one of DECLINED_CARDS (402) or
+    ERROR_CARD (500). Requests are answered after `latency` seconds and a
+    `failure_rate` share of them fail with 503, to exercise timeouts, task
+    retries and the circuit breaker. Repeated Idempotency-Keys get the
+    first response back, as with a real provider. State is kept in memory.
+
+    Args:
+        latency (float): Seconds to wait before answering
+        failure_rate (float): Share of requests (0-1) answered with 503
+
+    Returns:
+        Flask: The fake gateway application
+    """
+    app = Flask(__name__)
+    responses = {}
+    tokens = {}
+    charges = {}
+    lock = threading.Lock()
+
+    def error(status, code, message):
+        return {'error': {'code': code, 'message': message}}, status
+
+    def idempotent(handler):
+        key = request.headers.get('Idempotency-Key')
+        with lock:
+            if key and key in responses:
+                body, status = responses[key]
+                return jsonify(body), status
+        if latency:
+            time.sleep(latency)
+        if random.random() < failure_rate:
+            # Not stored, so a retry with the same key can succeed
+            body, status = error(503, 'unavailable', 'Gateway temporarily unavailable')
+            return jsonify(body), status
+        body, status = handler(request.get_json(silent=True) or {})
+        if key and status < 500:
+            with lock:
+                responses.setdefault(key, (body, status))
+                body, status = responses[key]
+        return jsonify(body), status
+
+    def tokenize(payload):
+        card = payload.get('card') or {}
+        if not card.get('number'):
+            return error(400, 'invalid_request', 'card.number is required')
+        token = f'tok_{uuid.uuid4().hex}'
+        with lock:
+            tokens[token] = card
+        return {'id': token}, 200
+
+    def charge(payload):
+        with lock:
+            card = tokens.get(payload.get('source'))
+        amount = payload.get('amount')
+        if card is None:
+            return error(400, 'invalid_request', 'No such token')
+        if not isinstance(amount, int) or amount <= 0:
+            return error(400, 'invalid_request', 'amount is required')
+        if card['number'] == ERROR_CARD:
+            return error(500, 'processing_error', 'An error occurred while processing your card.')
+        if card['number'] in DECLINED_CARDS:
+            return error(402, 'card_declined', DECLINED_CARDS[card['number']])
+        charge_id = f'ch_{uuid.uuid4().hex}'
+        with lock:
+            charges[charge_id] = amount
+        return {'id': charge_id, 'amount': amount, 'currency': payload.get('currency'), 'status': 'succeeded'}, 200
+
+    def refund(payload):
+        with lock:
+            charged = charges.get(payload.get('charge'))
+        if charged is None:
+            return error(404, 'resource_missing', 'No such charge')
+        if payload.get('amount', charged) > charged:
+            return error(400, 'invalid_request', 'Refund exceeds the charge')
+        return {'id': f're_{uuid.uuid4().hex}', 'charge': payload['charge'], 'status': 'succeeded'}, 200
+
+    app.add_url_rule('/v1/tokens', 'tokens', lambda: idempotent(tokenize), methods=['POST'])
+    app.add_url_rule('/v1/charges', 'charges', lambda: idempotent(charge), methods=['POST'])
+    app.add_url_rule('/v1/refunds', 'refunds', lambda: idempotent(refund), methods=['POST'])
+    return app
@@ -0,0 +1,98 @@
+import socketserver
+import threading
+import time
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Local stand-in for the SMTP server the mail pool talks to
+
+    Speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+    for smtplib and Flask-Mail, without TLS or authentication, so run it
+    with MAIL_USE_TLS off and no MAIL_USERNAME. Each new session is greeted
+    after `connect_latency` seconds, standing in for the connect, STARTTLS
+    and login round trips of a real provider, and each message is accepted
+    after `message_latency` seconds. A session is dropped without a reply
+    once it has sent `drop_after` messages, to exercise SMTPSessionLost.
+    Accepted messages are kept in `messages` as (sender, recipients, data).
+
+    Args:
+        address (tuple): (host, port) to listen on; port 0 picks a free one
+        connect_latency (float): Seconds to wait before greeting a session
+        message_latency (float): Seconds to wait before accepting a message
+        drop_after (int, optional): Messages per session before it is dropped
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0), connect_latency=0.0, message_latency=0.0, drop_after=None):
+        super().__init__(address, _SMTPHandler)
+        self.connect_latency = connect_latency
+        self.message_latency = message_latency
+        self.drop_after = drop_after
+        self.messages = []
+        self.sessions = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """Serve from a daemon thread and return the server"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        time.sleep(server.connect_latency)
+        self.reply('220 localhost fake SMTP ready')
+
+        sender, recipients, sent = None, [], 0
+        for raw in self.rfile:
+            line = raw.decode(errors='replace').rstrip('\r\n')
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'MAIL':
+                sender, recipients = line.partition(':')[2].strip(), []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(line.partition(':')[2].strip())
+                self.reply('250 OK')
+            elif command == 'DATA':
+                if server.drop_after is not None and sent >= server.drop_after:
+                    return
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for body_line in self.rfile:
+                    if body_line.rstrip(b'\r\n') == b'.':
+                        break
+                    data.append(body_line)
+                time.sleep(server.message_latency)
+                with server.lock:
+                    server.messages.append((sender, recipients, b''.join(data)))
+                sent += 1
+                self.reply('250 OK: queued')
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 OK')
+            elif command == 'NOOP':
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
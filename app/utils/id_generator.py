@@ -0,0 +1,217 @@
+import logging
+import os
+import socket
+import threading
+import time
+from redis.exceptions import RedisError
+from app.config import Config
+from app.utils.redis_client import redis_client, register_script
+
+# Crockford base32 keeps the display form unambiguous and, at a fixed width,
+# sorts the same way as the underlying integer
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ENCODED_LENGTH = 13  # ceil(63 bits / 5)
+
+# 41 bits of milliseconds | 10 bits of node id | 12 bits of sequence
+EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+NODE_LEASE_KEY = 'idgen:node:{node_id}'
+NODE_CURSOR_KEY = 'idgen:node_cursor'
+NODE_LEASE_SECONDS = 3600
+NODE_RENEW_SECONDS = NODE_LEASE_SECONDS // 4
+
+# KEYS[1] = lease key, ARGV[1] = owner token, ARGV[2] = ttl
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) and 1 or 0
+"""
+
+_renew_lease = register_script(RENEW_LEASE_SCRIPT)
+
+logger = logging.getLogger(__name__)
+
+
+def encode_crockford(value):
+    """Encode a non-negative integer as fixed-width Crockford base32"""
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        value, remainder = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+class SnowflakeGenerator:
+    """
+    Time-ordered, k-sortable 63-bit ID generator.
+
+    IDs are unique as long as no two live processes share a node id, so
+    web and Celery workers never need a retry loop on insert. Every node id
+    in use is held as a lease in Redis and renewed from a background thread,
+    so an idle process keeps its id. ID_NODE_ID, when set, is claimed the
+    same way; if another process already holds it a free node id is leased
+    instead. Forked children (e.g. Celery prefork workers) drop the parent's
+    lease and claim ID_NODE_ID or a node id of their own.
+    """
+
+    def __init__(self, node_id=None):
+        self._fixed_node_id = node_id
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _after_fork(self):
+        # The parent keeps its lease and renewal thread; the child starts over
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._generation += 1
+        self._node_id = None
+        self._lease_token = None
+        self._leased_at = 0
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _lease_node_id(self, token):
+        start = redis_client.incr(NODE_CURSOR_KEY)
+        for offset in range(MAX_NODE_ID + 1):
+            node_id = (start + offset) & MAX_NODE_ID
+            key = NODE_LEASE_KEY.format(node_id=node_id)
+            if redis_client.set(key, token, nx=True, ex=NODE_LEASE_SECONDS):
+                return node_id
+        raise RuntimeError('No free ID generator node id available')
+
+    def _acquire_node_id(self):
+        token = f'{socket.gethostname()}:{os.getpid()}'
+        node_id = self._fixed_node_id
+        if node_id is not None:
+            key = NODE_LEASE_KEY.format(node_id=node_id)
+            if not _renew_lease(keys=[key], args=[token, NODE_LEASE_SECONDS]):
+                logger.warning(f"ID_NODE_ID {node_id} is held by another process; leasing a free node id")
+                node_id = None
+        if node_id is None:
+            node_id = self._lease_node_id(token)
+        self._lease_token = token
+        self._leased_at = time.monotonic()
+        threading.Thread(
+            target=self._renew_periodically, args=(self._generation,),
+            name='idgen-lease', daemon=True
+        ).start()
+        return node_id
+
+    def _renew(self):
+        # Called with the lock held; on a lost lease the next call claims again
+        key = NODE_LEASE_KEY.format(node_id=self._node_id)
+        try:
+            renewed = _renew_lease(keys=[key], args=[self._lease_token, NODE_LEASE_SECONDS])
+        except RedisError as e:
+            logger.error(f"Failed to renew ID generator node id {self._node_id}: {str(e)}")
+            return
+        if renewed:
+            self._leased_at = time.monotonic()
+        else:
+            logger.warning(f"ID generator node id {self._node_id} was taken over; claiming another")
+            self._generation += 1
+            self._node_id = None
+            self._lease_token = None
+
+    def _renew_periodically(self, generation):
+        while True:
+            time.sleep(NODE_RENEW_SECONDS)
+            with self._lock:
+                # Superseded by a fork, a lost lease or a newer thread
+                if generation != self._generation:
+                    return
+                self._renew()
+
+    def _node(self):
+        if self._node_id is not None and time.monotonic() - self._leased_at > NODE_LEASE_SECONDS / 2:
+            # The renewal thread has fallen behind (e.g. Redis was down)
+            self._renew()
+        if self._node_id is None:
+            self._node_id = self._acquire_node_id()
+        return self._node_id
+
+    def next_ids(self, count):
+        """
+        Generate `count` ascending IDs
+
+        Args:
+            count (int): Number of IDs to generate
+
+        Returns:
+            list: Integer IDs, strictly increasing
+        """
+        ids = []
+        with self._lock:
+            node_id = self._node()
+            while len(ids) < count:
+                now_ms = int(time.time() * 1000)
+                if now_ms < self._last_ms:
+                    # Clock moved backwards; never reuse a past timestamp
+                    time.sleep((self._last_ms - now_ms) / 1000)
+                    continue
+                if now_ms == self._last_ms:
+                    if self._sequence == MAX_SEQUENCE:
+                        # Sequence exhausted for this millisecond
+                        time.sleep(0.0005)
+                        continue
+                    self._sequence += 1
+                else:
+                    self._last_ms = now_ms
+                    self._sequence = 0
+                ids.append(
+                    ((now_ms - EPOCH_MS) << (NODE_BITS + SEQUENCE_BITS))
+                    | (node_id << SEQUENCE_BITS)
+                    | self._sequence
+                )
+        return ids
+
+    def next_id(self):
+        """Generate a single ID"""
+        return self.next_ids(1)[0]
+
+
+def _default_node_id():
+    if Config.ID_NODE_ID is None:
+        return None
+    node_id = int(Config.ID_NODE_ID)
+    if not 0 <= node_id <= MAX_NODE_ID:
+        raise ValueError(f'ID_NODE_ID must be between 0 and {MAX_NODE_ID}')
+    return node_id
+
+
+_generator = SnowflakeGenerator(_default_node_id())
+
+
+def _after_fork_in_child():
+    # Looked up at fork time so a generator installed by set_generator is reset too
+    after_fork = getattr(_generator, '_after_fork', None)
+    if after_fork is not None:
+        after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def set_generator(generator):
+    """Replace the number generator; it must provide next_ids(count)"""
+    global _generator
+    _generator = generator
+
+
+def generate_number(prefix):
+    """Generate a display number such as BKG-01HZX3K7Q2M5R"""
+    return generate_numbers(prefix, 1)[0]
+
+
+def generate_numbers(prefix, count):
+    """Generate `count` ascending display numbers with the given prefix"""
+    return [f'{prefix}-{encode_crockford(value)}' for value in _generator.next_ids(count)]
@@ -0,0 +1,123 @@
+import functools
+import json
+import uuid
+from celery import current_task
+from celery.exceptions import Retry
+from app.utils.redis_client import redis_client, register_script
+
+SUBMIT_KEY = 'idem:submit:{task}:{key}'
+LEASE_KEY = 'idem:lease:{task}:{key}'
+RESULT_KEY = 'idem:result:{task}:{key}'
+
+# KEYS[1] = lease key, ARGV[1] = owner token, ARGV[2] = ttl
+# Take the lease if it is free or already ours (a retry of the same task)
+ACQUIRE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+# KEYS[1] = lease or submit key, ARGV[1] = owner token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_acquire = register_script(ACQUIRE_SCRIPT)
+_release = register_script(RELEASE_SCRIPT)
+
+
+def submit_once(task, key, *args, ttl=3600, **kwargs):
+    """
+    Queue a task unless one with the same key was queued within `ttl`
+
+    Duplicate submissions (double clicks, retried requests) get the
+    AsyncResult of the first submission instead of a new task. If the
+    publish fails the key is freed and the error re-raised.
+
+    Args:
+        task (Task): Celery task to queue
+        key (str): Idempotency key, unique per logical operation
+        ttl (int): Seconds during which duplicates are collapsed
+
+    Returns:
+        AsyncResult: Result handle of the task that owns the key
+    """
+    submit_key = SUBMIT_KEY.format(task=task.name, key=key)
+    task_id = str(uuid.uuid4())
+    if not redis_client.set(submit_key, task_id, nx=True, ex=ttl):
+        existing = redis_client.get(submit_key)
+        if existing:
+            return task.AsyncResult(existing.decode())
+        # The key expired between the two calls; take it now
+        redis_client.set(submit_key, task_id, ex=ttl)
+    try:
+        return task.apply_async(args=args, kwargs=kwargs, task_id=task_id)
+    except Exception:
+        # Nothing was queued; free the key, unless it has since passed to
+        # another submission, so a retry is not collapsed into this task id
+        _release(keys=[submit_key], args=[task_id])
+        raise
+
+
+def idempotent(key, lease_seconds=600, result_ttl=86400):
+    """
+    Make a Celery task run at most once per idempotency key
+
+    The first execution takes a Redis lease for the key; concurrent
+    duplicates return immediately while it runs, and once it has succeeded
+    its stored result is returned instead of running again. Retries of the
+    same task (same task id) keep the lease. Results with status 'error'
+    are not stored, so a later submission can try again. Apply below
+    @celery.task.
+
+    Args:
+        key (callable): Builds the idempotency key from the task arguments
+        lease_seconds (int): How long an execution may hold the key
+        result_ttl (int): How long the result of a finished execution is kept
+
+    Usage:
+        @celery.task(name='tasks.process_booking', bind=True)
+        @idempotent(key=lambda self, booking_id: booking_id)
+        def process_booking(self, booking_id):
+            ...
+    """
+    def decorator(fun):
+        task_name = f'{fun.__module__}.{fun.__name__}'
+
+        @functools.wraps(fun)
+        def wrapper(*args, **kwargs):
+            idem_key = key(*args, **kwargs)
+            lease_key = LEASE_KEY.format(task=task_name, key=idem_key)
+            result_key = RESULT_KEY.format(task=task_name, key=idem_key)
+
+            stored = redis_client.get(result_key)
+            if stored is not None:
+                return json.loads(stored)
+
+            request_id = current_task.request.id if current_task else None
+            token = request_id or str(uuid.uuid4())
+            if not _acquire(keys=[lease_key], args=[token, lease_seconds]):
+                return {'status': 'duplicate', 'message': f'{task_name} already running for {idem_key}'}
+
+            try:
+                result = fun(*args, **kwargs)
+            except Retry:
+                # Keep the lease for the retry, which runs with the same task id
+                raise
+            except Exception:
+                _release(keys=[lease_key], args=[token])
+                raise
+
+            if not (isinstance(result, dict) and result.get('status') == 'error'):
+                redis_client.set(result_key, json.dumps(result), ex=result_ttl)
+            _release(keys=[lease_key], args=[token])
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+import json
+import re
+import threading
+from flask import current_app
+from jinja2.utils import LRUCache
+from markupsafe import escape
+
+# Marks where a per-recipient value goes in a pre-rendered template
+SLOT_MARKER = '\x00{index}\x00'
+SLOT_PATTERN = re.compile('\x00(\\d+)\x00')
+
+
+class SlotError(Exception):
+    """A per-recipient value was used for more than plain output"""
+
+
+class Slot:
+    """
+    Stand-in for a per-recipient template variable during pre-rendering.
+
+    Attribute and item lookups return child slots, and `{{ slot }}` with
+    autoescaping outputs a marker. Anything that needs the actual value
+    (tests, loops, comparisons, filters, string conversion) raises
+    SlotError, so such templates are rendered in full instead.
+    """
+
+    def __init__(self, registry, path):
+        self._registry = registry
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Slot(self._registry, self._path + (('attr', name),))
+
+    def __getitem__(self, key):
+        return Slot(self._registry, self._path + (('item', key),))
+
+    def __html__(self):
+        self._registry.append(self._path)
+        return SLOT_MARKER.format(index=len(self._registry) - 1)
+
+    def _value_needed(self, *args, **kwargs):
+        raise SlotError('.'.join(str(step[1]) for step in self._path))
+
+    __str__ = __repr__ = __format__ = __bool__ = __len__ = __iter__ = _value_needed
+    __contains__ = __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = _value_needed
+    __hash__ = __call__ = __add__ = __radd__ = __mod__ = __rmod__ = _value_needed
+    __int__ = __float__ = _value_needed
+
+
+class PreparedTemplate:
+    """
+    A template rendered once with its shared context, split around its slots.
+
+    `parts` is None when the template could not be pre-rendered; render()
+    then renders the full template with the shared and recipient context.
+    """
+
+    def __init__(self, template, context, parts=None, paths=None):
+        self.template = template
+        self.context = context
+        self.parts = parts
+        self.paths = paths
+
+    def render(self, recipient_context):
+        """Render for one recipient"""
+        if self.parts is None:
+            return self.template.render({**self.context, **recipient_context})
+        return self.fill(recipient_context)
+
+    def fill(self, context):
+        """Render for one recipient by filling the slots from their context"""
+        environment = self.template.environment
+        output = [self.parts[0]]
+        for path, part in zip(self.paths, self.parts[1:]):
+            value = context.get(path[0][1], environment.undefined(name=path[0][1]))
+            for kind, key in path[1:]:
+                value = environment.getattr(value, key) if kind == 'attr' else environment.getitem(value, key)
+            output.append(escape(value))
+            output.append(part)
+        return ''.join(output)
+
+
+class MailTemplateRenderer:
+    """
+    Renders one email template for many recipients.
+
+    The template is rendered once per shared context (e.g. the event of an
+    update or campaign) with the per-recipient variables replaced by slots;
+    each recipient then only costs filling those slots. Prepared templates
+    are kept in an LRU keyed by template and shared context, next to Jinja's
+    own LRU of compiled templates. Templates that branch or loop on a
+    per-recipient variable fall back to a full render per recipient.
+    """
+
+    def __init__(self, capacity=None):
+        self._capacity = capacity
+        self._cache = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    capacity = self._capacity or current_app.config.get('MAIL_TEMPLATE_CACHE_SIZE', 64)
+                    self._cache = LRUCache(capacity)
+        return self._cache
+
+    @staticmethod
+    def _cache_key(template_name, shared_context, recipient_keys):
+        shared = json.dumps(shared_context, sort_keys=True, default=str)
+        return (template_name, shared, tuple(sorted(recipient_keys)))
+
+    @staticmethod
+    def _prepare(template, shared_context, recipient_keys):
+        # Same context processors render_template applies
+        context = {}
+        current_app.update_template_context(context)
+        context.update(shared_context)
+
+        paths = []
+        slots = {key: Slot(paths, (('name', key),)) for key in recipient_keys}
+        try:
+            rendered = template.render({**context, **slots})
+        except SlotError:
+            # A template that cannot be pre-rendered is cached as such
+            return PreparedTemplate(template, context)
+        pieces = SLOT_PATTERN.split(rendered)
+        slot_paths = [paths[int(index)] for index in pieces[1::2]]
+        return PreparedTemplate(template, context, pieces[0::2], slot_paths)
+
+    def prepare(self, template_name, shared_context, recipient_keys):
+        """
+        Get a template pre-rendered for a shared context
+
+        Callers rendering a batch should prepare once and call render() on
+        the result for each recipient.
+
+        Args:
+            template_name (str): Name of the template file
+            shared_context (dict): Context that is the same for every recipient
+            recipient_keys (iterable): Names of the per-recipient variables
+
+        Returns:
+            PreparedTemplate: Template ready to render per recipient
+        """
+        key = self._cache_key(template_name, shared_context, recipient_keys)
+        prepared = self.cache.get(key)
+        if prepared is None or not prepared.template.is_up_to_date:
+            template = current_app.jinja_env.get_template(template_name)
+            prepared = self._prepare(template, shared_context, recipient_keys)
+            self.cache[key] = prepared
+        return prepared
+
+    def render(self, template_name, shared_context, recipient_context):
+        """Render a template for one recipient"""
+        return self.prepare(template_name, shared_context, recipient_context.keys()).render(recipient_context)
+
+
+mail_renderer = MailTemplateRenderer()
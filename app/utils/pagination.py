@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import datetime
+from werkzeug.exceptions import BadRequest
+from app.extensions import db
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of a row as an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def _decode_value(column, value):
+    # Values are checked against the column type, so a tampered cursor
+    # is rejected instead of being compared against the wrong type
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise TypeError(f'{column.key} must be a timestamp')
+        return datetime.fromisoformat(value)
+    if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, python_type) or (isinstance(value, bool) and python_type is not bool):
+        raise TypeError(f'{column.key} must be {python_type.__name__}')
+    return value
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor back into sort-key values
+
+    Returns:
+        list: Values matching `columns`, or None if the cursor is invalid
+            or any value does not fit its column's type
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            return None
+        return [_decode_value(column, value) for column, value in zip(columns, payload)]
+    except (ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+
+    def __init__(self, items, columns, has_prev, has_next):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+        keys = [column.key for column in columns]
+        self.prev_cursor = encode_cursor([getattr(items[0], key) for key in keys]) if items and has_prev else None
+        self.next_cursor = encode_cursor([getattr(items[-1], key) for key in keys]) if items and has_next else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, columns, after=None, before=None, per_page=20, descending=False):
+    """
+    Paginate a query by seeking past the last row seen instead of OFFSET
+
+    The columns must form a unique sort key, e.g. (event_date, id), so a
+    page costs the same index seek however deep it is, and no COUNT is run.
+
+    Args:
+        query (Query): Query to paginate, without an ORDER BY
+        columns (tuple): Model columns making up the sort key
+        after (str, optional): Cursor of the row to start after
+        before (str, optional): Cursor of the row to end before
+        per_page (int): Number of rows per page
+        descending (bool): Sort newest/largest first
+
+    Returns:
+        KeysetPage: Items of the page plus cursors to its neighbours
+
+    Raises:
+        BadRequest: A cursor is malformed or does not match the sort key
+    """
+    key = db.tuple_(*columns)
+    after_values = decode_cursor(after, columns) if after else None
+    before_values = decode_cursor(before, columns) if before else None
+    if (after and after_values is None) or (before and before_values is None):
+        raise BadRequest(description='Invalid page cursor.')
+
+    # Walking backwards reverses the sort and flips the page afterwards
+    backwards = before_values is not None and after_values is None
+    if backwards:
+        seek = key > db.tuple_(*before_values) if descending else key < db.tuple_(*before_values)
+        reverse = not descending
+    else:
+        reverse = descending
+        seek = None
+        if after_values is not None:
+            seek = key < db.tuple_(*after_values) if descending else key > db.tuple_(*after_values)
+
+    if seek is not None:
+        query = query.filter(seek)
+    order = [column.desc() if reverse else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, columns, has_prev=has_more, has_next=True)
+    return KeysetPage(rows, columns, has_prev=after_values is not None, has_next=has_more)
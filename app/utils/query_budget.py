@@ -0,0 +1,51 @@
+import logging
+from functools import wraps
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a view runs more SQL than its budget"""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'sql_query_count' in g:
+        g.sql_query_count += 1
+
+
+def query_budget(max_queries):
+    """
+    Cap the number of SQL statements a view may run
+
+    Statements are counted from the start of the view until its response
+    is built, including template rendering. Going over the budget logs a
+    warning, or raises QueryBudgetExceeded when SQL_QUERY_BUDGET_STRICT is
+    set (as in testing), so N+1 regressions fail loudly.
+
+    Args:
+        max_queries (int): Maximum number of statements for one request
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            outer_count = g.pop('sql_query_count', None)
+            g.sql_query_count = 0
+            try:
+                response = f(*args, **kwargs)
+            finally:
+                count = g.pop('sql_query_count')
+                if outer_count is not None:
+                    g.sql_query_count = outer_count + count
+
+            if count > max_queries:
+                message = f"{f.__name__} ran {count} SQL statements (budget {max_queries})"
+                if current_app.config.get('SQL_QUERY_BUDGET_STRICT'):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        return decorated_function
+    return decorator
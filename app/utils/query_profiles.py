@@ -0,0 +1,25 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+# Loader options for the queries behind listing pages and reports.
+# Each profile loads exactly the relationships its template or serializer
+# touches, so rendering N rows costs a fixed number of queries instead of N.
+# They are functions because backref attributes such as Booking.user only
+# exist once the mappers are configured.
+
+
+def booking_with_event_and_tickets():
+    """A user's own bookings: event details plus issued tickets"""
+    from app.models.booking import Booking
+    return (joinedload(Booking.event), selectinload(Booking.tickets))
+
+
+def booking_with_event_and_user():
+    """Staff booking listings: event title and buyer email per row"""
+    from app.models.booking import Booking
+    return (joinedload(Booking.event), joinedload(Booking.user))
+
+
+def user_with_role():
+    """User listings show each user's role"""
+    from app.models.user import User
+    return (joinedload(User.role),)
@@ -0,0 +1,145 @@
+import logging
+import time
+from flask import current_app, request, session
+from redis.exceptions import RedisError
+from werkzeug.exceptions import TooManyRequests
+from app.utils.redis_client import register_script
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY = 'ratelimit:{policy}:{scope}:{identity}'
+
+# Policy name -> token buckets a request must get through. Each bucket
+# allows bursts of `requests` and refills at `requests` per `seconds`,
+# keyed on the client IP, the logged-in user (the IP for anonymous
+# visitors) or the email address submitted in the form.
+RATE_LIMIT_POLICIES = {
+    # Password checks are slow by design; also slow down guessing one account from many IPs
+    'login': ({'scope': 'ip', 'requests': 20, 'seconds': 60},
+              {'scope': 'email', 'requests': 5, 'seconds': 300}),
+    # Every registration sends a confirmation email
+    'register': ({'scope': 'ip', 'requests': 5, 'seconds': 3600},),
+    'booking': ({'scope': 'user', 'requests': 10, 'seconds': 60},
+                {'scope': 'ip', 'requests': 60, 'seconds': 60}),
+}
+
+# KEYS = one bucket per limit; ARGV[1] = now, then capacity and refill
+# rate (tokens per second) for each bucket
+# Takes a token from every bucket, or from none of them if any is empty.
+# Returns 0, or the seconds to wait until the request would be let through.
+TAKE_TOKEN_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local capacity, rate = tonumber(ARGV[i * 2]), tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(now - (tonumber(bucket[2]) or now), 0)
+    levels[i] = math.min(capacity, tokens + elapsed * rate)
+    if levels[i] < 1 then
+        wait = math.max(wait, (1 - levels[i]) / rate)
+    end
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+for i = 1, #KEYS do
+    local capacity, rate = tonumber(ARGV[i * 2]), tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', KEYS[i], 'tokens', levels[i] - 1, 'at', now)
+    -- A bucket that has refilled is the same as no bucket
+    redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate))
+end
+return 0
+"""
+
+_take_token = register_script(TAKE_TOKEN_SCRIPT)
+
+
+def client_ip():
+    """Client address, taken from X-Forwarded-For behind RATE_LIMIT_PROXY_HOPS trusted proxies"""
+    hops = current_app.config.get('RATE_LIMIT_PROXY_HOPS', 0)
+    if hops and len(request.access_route) > hops:
+        return request.access_route[-hops - 1]
+    return request.remote_addr or 'unknown'
+
+
+def _identity(scope):
+    if scope == 'user':
+        # Read from the session so the user is never loaded from the database
+        user_id = session.get('_user_id')
+        return f'user:{user_id}' if user_id else f'ip:{client_ip()}'
+    if scope == 'email':
+        email = (request.form.get('email') or '').strip().lower()
+        return email or None
+    return client_ip()
+
+
+def rate_limit(policy, methods=('POST',)):
+    """
+    Throttle a view with one of RATE_LIMIT_POLICIES
+
+    The decorator only tags the view; the limit is enforced by the
+    before_request hook installed by init_rate_limits, which runs ahead of
+    the auth blueprint's hook and never loads the user, so throttled
+    requests cost one Redis round trip and no database query. Requests
+    over the limit get 429 with a Retry-After header. Can go above or
+    below @permission_required.
+
+    Args:
+        policy (str): Name of a RATE_LIMIT_POLICIES entry
+        methods (tuple): HTTP methods that are counted
+
+    Usage:
+        @auth_bp.route('/login', methods=['GET', 'POST'])
+        @rate_limit('login')
+        def login():
+            ...
+    """
+    if policy not in RATE_LIMIT_POLICIES:
+        raise ValueError(f'Unknown rate limit policy: {policy}')
+
+    def decorator(f):
+        # functools.wraps in outer decorators copies the tag along
+        f.rate_limit = (policy, tuple(methods))
+        return f
+    return decorator
+
+
+def check_rate_limit():
+    """Reject the request with 429 if its view's policy is exhausted"""
+    view = current_app.view_functions.get(request.endpoint)
+    policy, methods = getattr(view, 'rate_limit', (None, ()))
+    if policy is None or request.method not in methods:
+        return
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+
+    keys, args = [], [time.time()]
+    for limit in RATE_LIMIT_POLICIES[policy]:
+        identity = _identity(limit['scope'])
+        if identity is None:
+            continue
+        keys.append(RATE_LIMIT_KEY.format(policy=policy, scope=limit['scope'], identity=identity))
+        args += [limit['requests'], limit['requests'] / limit['seconds']]
+    if not keys:
+        return
+
+    try:
+        wait = int(_take_token(keys=keys, args=args))
+    except RedisError as e:
+        # Better to let traffic through than to take the site down with Redis
+        logger.error(f"Rate limiter unavailable: {str(e)}")
+        return
+
+    if wait:
+        logger.warning(f"Rate limited {request.endpoint} ({policy}) for {client_ip()}")
+        raise TooManyRequests(
+            description=f'Too many requests. Please try again in {wait} second(s).',
+            retry_after=wait,
+        )
+
+
+def init_rate_limits(app):
+    """Enforce @rate_limit; install before any hook that loads the user"""
+    app.before_request(check_rate_limit)
@@ -36,4 +36,8 @@ def add_to_set(name, *values):
 
 def get_set_members(name):
     """Get all members of a set"""
-    return redis_client.smembers(name) 
\ No newline at end of file
+    return redis_client.smembers(name)
+
+def register_script(script):
+    """Register a Lua script and return a callable bound to the client"""
+    return redis_client.register_script(script)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import re
+from app.extensions import db
+
+# Full-text index over events.title, venue, description and category.
+# SQLite keeps the documents in an FTS5 table synced from the Event model
+# events; PostgreSQL uses a GIN index on the tsvector expression below.
+FTS_TABLE = 'events_fts'
+
+CREATE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "title, venue, description, category, "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+
+# Must match the expression of ix_events_search in the migrations
+TSVECTOR_SQL = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(events.title, '') || ' ' || coalesce(events.venue, '') || ' ' || "
+    "coalesce(events.description, '') || ' ' || coalesce(events.category, ''))"
+)
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def search_tokens(term):
+    """Split a search term into index-safe tokens"""
+    return TOKEN_PATTERN.findall(term or '')
+
+
+def sync_event_document(connection, event):
+    """Write an event's searchable text into the SQLite FTS table"""
+    if connection.dialect.name != 'sqlite':
+        return
+    remove_event_document(connection, event.id)
+    connection.execute(
+        db.text(
+            "INSERT INTO events_fts (rowid, title, venue, description, category) "
+            "VALUES (:id, :title, :venue, :description, :category)"
+        ),
+        {
+            'id': event.id,
+            'title': event.title,
+            'venue': event.venue,
+            'description': event.description or '',
+            'category': event.category or '',
+        },
+    )
+
+
+def remove_event_document(connection, event_id):
+    """Remove an event from the SQLite FTS table"""
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.execute(db.text("DELETE FROM events_fts WHERE rowid = :id"), {'id': event_id})
+
+
+def search_events(query, term):
+    """
+    Restrict an Event query to prefix-matched search results
+
+    Every token of the term must match the start of a word in the title,
+    venue, description or category. Results are not ordered by relevance:
+    the callers page through them with keyset pagination on their own sort
+    key, which a per-query relevance score cannot be part of.
+
+    Args:
+        query (Query): Event query to filter
+        term (str): Search term as typed by the user
+
+    Returns:
+        Query: Filtered query
+    """
+    from app.models.event import Event
+
+    tokens = search_tokens(term)
+    if not tokens:
+        return query
+
+    dialect = query.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        fts = db.table(FTS_TABLE, db.column('rowid'))
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return (
+            query.join(fts, fts.c.rowid == Event.id)
+            .filter(db.literal_column(FTS_TABLE).op('MATCH')(match))
+        )
+
+    if dialect == 'postgresql':
+        document = db.literal_column(TSVECTOR_SQL)
+        ts_query = db.func.to_tsquery(
+            db.literal_column("'simple'::regconfig"),
+            ' & '.join(f'{token}:*' for token in tokens)
+        )
+        return query.filter(document.op('@@')(ts_query))
+
+    # Other databases fall back to substring matching
+    return substring_search(query, tokens)
+
+
+def substring_search(query, tokens):
+    """Match every token anywhere in the searchable columns; needs a table scan"""
+    from app.models.event import Event
+
+    for token in tokens:
+        query = query.filter(db.or_(
+            Event.title.ilike(f'%{token}%'),
+            Event.venue.ilike(f'%{token}%'),
+            Event.description.ilike(f'%{token}%'),
+            Event.category.ilike(f'%{token}%'),
+        ))
+    return query
@@ -1,68 +1,58 @@
+"""
+Celery entry point for workers and beat:
+
+    celery -A celery_worker.celery worker --loglevel=info
+    celery -A celery_worker.celery beat --loglevel=info
+
+The Flask app comes from the same factory as the web app; Celery config,
+routing and the beat schedule are set up by init_celery.
+"""
+import logging
 import os
-from flask import Flask
-from app.config import Config
-from app.extensions import celery, init_celery, mail, db, csrf, login_manager
-from celery.schedules import crontab
-from datetime import datetime, timedelta
+import time
+
+started = time.perf_counter()
+
+from celery.signals import celeryd_after_setup, import_modules, worker_init
+from app.factory import create_app
+from app.extensions import celery
+from app.celery.routing import apply_worker_profile
+
+logger = logging.getLogger(__name__)
+
+# Workers render emails but serve no pages; only blueprints that email
+# templates build URLs for are registered
+WORKER_BLUEPRINTS = ("events",)
+
+app = create_app(blueprints=WORKER_BLUEPRINTS)
+bootstrap_seconds = time.perf_counter() - started
+
+# Tune this worker for one queue (bookings, email or reports);
+# without a profile the worker consumes every queue
+worker_profile = os.getenv('CELERY_WORKER_PROFILE')
+if worker_profile:
+    worker_queues = apply_worker_profile(celery, worker_profile)
 
-# Create Flask app
-app = Flask(__name__,
-           template_folder="templates",
-           static_folder="static",
-           root_path=os.path.join(os.path.dirname(__file__), "app"))
-app.config.from_object(Config)
+    @celeryd_after_setup.connect
+    def select_worker_queues(sender, instance, **kwargs):
+        instance.app.amqp.queues.select(worker_queues)
 
-# Initialize extensions
-db.init_app(app)
-mail.init_app(app)
-csrf.init_app(app)
-login_manager.init_app(app)
 
-# Initialize Celery
-init_celery(app)
+# Report cold-start cost: app bootstrap plus the task module imports
+# Celery performs right before worker_init
+task_imports_started = None
 
-# Initialize Celery
-celery.conf.broker_url = app.config['CELERY_BROKER_URL']
-celery.conf.result_backend = app.config['CELERY_RESULT_BACKEND']
-celery.conf.imports = [
-    'app.celery.tasks.booking_tasks',
-    'app.celery.tasks.email_tasks'
-]
 
-# Configure Celery Beat schedule
-celery.conf.beat_schedule = {
-    'send-event-reminders': {
-        'task': 'tasks.send_event_reminders',
-        'schedule': crontab(hour='*/12')  # Run every 12 hours
-    },
-    'cleanup-abandoned-bookings': {
-        'task': 'tasks.cleanup_abandoned_bookings',
-        'schedule': crontab(minute='*/15')  # Run every 15 minutes
-    },
-    'send-low-ticket-alerts': {
-        'task': 'tasks.send_low_ticket_alerts',
-        'schedule': crontab(hour='*/6')  # Run every 6 hours
-    },
-    'cancel-expired-bookings': {
-        'task': 'tasks.cancel_expired_bookings',
-        'schedule': crontab(minute='*/30')  # Run every 30 minutes
-    },
-    'generate-daily-report': {
-        'task': 'tasks.generate_booking_report',
-        'schedule': crontab(hour=0, minute=0),  # Run at midnight
-        'args': (
-            # Pass yesterday's date range
-            (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d'),
-            datetime.utcnow().strftime('%Y-%m-%d')
-        )
-    }
-}
+@import_modules.connect
+def start_task_import_timer(sender, **kwargs):
+    global task_imports_started
+    task_imports_started = time.perf_counter()
 
-TaskBase = celery.Task
-class ContextTask(TaskBase):
-    abstract = True
-    def __call__(self, *args, **kwargs):
-        with app.app_context():
-            return TaskBase.__call__(self, *args, **kwargs)
 
-celery.Task = ContextTask
+@worker_init.connect
+def report_startup_time(sender, **kwargs):
+    task_seconds = time.perf_counter() - task_imports_started if task_imports_started else 0
+    logger.info(
+        f"Worker startup: app bootstrap {bootstrap_seconds * 1000:.0f} ms, "
+        f"task imports {task_seconds * 1000:.0f} ms"
+    )
@@ -0,0 +1,34 @@
+"""add outbox dead letter
+
+Revision ID: c4e19a7b3f02
+Revises: b7d2e94c1a60
+Create Date: 2026-10-18 21:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e19a7b3f02'
+down_revision = 'b7d2e94c1a60'
+branch_labels = None
+depends_on = None
+
+
+UNPUBLISHED = sa.text('published_at IS NULL')
+PENDING = sa.text('published_at IS NULL AND dead_at IS NULL')
+
+
+def upgrade():
+    with op.batch_alter_table('outbox_messages', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dead_at', sa.DateTime(), nullable=True))
+        batch_op.drop_index('ix_outbox_messages_unpublished', postgresql_where=UNPUBLISHED, sqlite_where=UNPUBLISHED)
+        batch_op.create_index('ix_outbox_messages_pending', ['id'], unique=False, postgresql_where=PENDING, sqlite_where=PENDING)
+
+
+def downgrade():
+    with op.batch_alter_table('outbox_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_outbox_messages_pending', postgresql_where=PENDING, sqlite_where=PENDING)
+        batch_op.create_index('ix_outbox_messages_unpublished', ['id'], unique=False, postgresql_where=UNPUBLISHED, sqlite_where=UNPUBLISHED)
+        batch_op.drop_column('dead_at')
@@ -0,0 +1,50 @@
+"""add event search index
+
+Revision ID: e8b37a8f7dbf
+Revises: d36ba9ecaaae
+Create Date: 2026-10-18 10:41:07.553902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b37a8f7dbf'
+down_revision = 'd36ba9ecaaae'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(title, '') || ' ' || coalesce(venue, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(category, ''))"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+            "title, venue, description, category, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO events_fts (rowid, title, venue, description, category) "
+            "SELECT id, title, venue, coalesce(description, ''), coalesce(category, '') "
+            "FROM events"
+        )
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_events_search ON events USING gin ({SEARCH_DOCUMENT})")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS events_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_events_search")
@@ -0,0 +1,143 @@
+import itertools
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from redis.commands.core import Script
+from sqlalchemy import event
+from app.factory import create_app
+from app.extensions import db as _db
+from app.utils import id_generator
+from app.utils import redis_client as redis_module
+
+
+class CountingGenerator:
+    """Number generator that needs no Redis node lease"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def next_ids(self, count):
+        return [next(self._ids) for _ in range(count)]
+
+
+@pytest.fixture
+def app():
+    """Application on TestingConfig with a fresh in-memory database"""
+    app = create_app('testing')
+    app.config.update(
+        WTF_CSRF_ENABLED=False,
+        MAIL_DEFAULT_SENDER='noreply@example.com',
+        ADMIN_USERNAME='admin@example.com',
+    )
+    id_generator.set_generator(CountingGenerator())
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """
+    Swap the shared Redis client for an in-memory fakeredis one
+
+    Modules import redis_client by name and register their Lua scripts at
+    import time, so both the module attributes and the scripts are pointed
+    at the fake client.
+    """
+    fakeredis = pytest.importorskip('fakeredis')
+    real, fake = redis_module.redis_client, fakeredis.FakeRedis()
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('app.') or module is None:
+            continue
+        for attribute, value in list(vars(module).items()):
+            if value is real:
+                monkeypatch.setattr(module, attribute, fake)
+            elif isinstance(value, Script) and value.registered_client is real:
+                monkeypatch.setattr(value, 'registered_client', fake)
+    return fake
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a confirmed user; the ADMIN_USERNAME address gets the admin role"""
+    from app.utils.init_roles import init_roles
+    from app.models.user import User
+    init_roles()
+
+    def make_user(email, password='secret123'):
+        user = User(email=email, password=password, first_name='Test', last_name='User')
+        user.is_confirmed = True
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def make_bookings(db):
+    """Create an event with `count` confirmed bookings of two tickets each for `user`"""
+    from app.models.booking import Booking
+    from app.models.event import Event
+    from app.models.ticket import Ticket
+
+    def make_bookings(user, count):
+        event = Event(title='Concert', description='Live music', venue='Hanoi Opera House',
+                      event_date=datetime.utcnow() + timedelta(days=7), total_tickets=1000,
+                      price=25.0, status='active', category='Music')
+        db.session.add(event)
+        db.session.flush()
+        for _ in range(count):
+            booking = Booking(user.id, event.id, 2, 50.0)
+            booking.status = 'confirmed'
+            booking.payment_status = 'paid'
+            db.session.add(booking)
+            db.session.flush()
+            db.session.add_all([Ticket(event.id, booking.id) for _ in range(2)])
+        db.session.commit()
+        return event
+    return make_bookings
+
+
+@pytest.fixture
+def login(client):
+    def login(email, password='secret123'):
+        return client.post('/auth/login', data={'email': email, 'password': password})
+    return login
+
+
+@pytest.fixture
+def count_queries(db):
+    """
+    Count the SQL statements run inside a block, e.g. one whole request
+
+    Usage:
+        with count_queries() as statements:
+            client.get('/booking/my-bookings')
+        assert len(statements) <= 5
+    """
+    @contextmanager
+    def count_queries():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return count_queries
@@ -0,0 +1,34 @@
+import smtplib
+from unittest import mock
+import pytest
+from app.celery.tasks.email_tasks import send_email_batch
+from app.services.campaign_service import CampaignService
+from app.services.mail_delivery_service import MailDeliveryService
+
+
+def messages(count):
+    return [
+        {'recipient_email': f'user{i}@example.com', 'subject': 'News',
+         'template_name': 'mail/event_update.html', 'context': {}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def campaign(redis):
+    campaign_id = 'CMP-TEST'
+    redis.hset(CampaignService.campaign_key(campaign_id), mapping={
+        'status': 'sending', 'total': 3, 'queued': 3, 'sent': 0, 'failed': 0, 'skipped': 0,
+    })
+    return campaign_id
+
+
+def test_batch_that_cannot_connect_completes_the_campaign(app, campaign):
+    error = smtplib.SMTPAuthenticationError(535, b'Authentication failed')
+    with mock.patch.object(MailDeliveryService, 'deliver', side_effect=error):
+        with pytest.raises(smtplib.SMTPAuthenticationError):
+            send_email_batch.run(messages(3), campaign_id=campaign)
+
+    progress = CampaignService.progress(campaign)
+    assert progress['failed'] == 3
+    assert progress['status'] == 'completed'
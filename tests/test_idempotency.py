@@ -0,0 +1,43 @@
+from unittest import mock
+import pytest
+from kombu.exceptions import OperationalError
+from app.celery.tasks.email_tasks import send_email_notification
+from app.utils.idempotency import SUBMIT_KEY, submit_once
+
+EMAIL = {'recipient_email': 'user@example.com', 'subject': 'Hello', 'template_name': 'mail/event_update.html', 'context': {}}
+
+
+def test_duplicate_submission_gets_first_task(app, redis):
+    with mock.patch.object(send_email_notification, 'apply_async', side_effect=lambda **kw: kw['task_id']) as publish:
+        first = submit_once(send_email_notification, 'booking-1', **EMAIL)
+        second = submit_once(send_email_notification, 'booking-1', **EMAIL)
+
+    assert publish.call_count == 1
+    assert second.id == first
+
+
+def test_failed_publish_frees_the_key(app, redis):
+    key = SUBMIT_KEY.format(task=send_email_notification.name, key='booking-1')
+    with mock.patch.object(send_email_notification, 'apply_async', side_effect=OperationalError('broker down')):
+        with pytest.raises(OperationalError):
+            submit_once(send_email_notification, 'booking-1', **EMAIL)
+    assert redis.get(key) is None
+
+    with mock.patch.object(send_email_notification, 'apply_async', side_effect=lambda **kw: kw['task_id']) as publish:
+        task_id = submit_once(send_email_notification, 'booking-1', **EMAIL)
+    assert publish.call_count == 1
+    assert redis.get(key).decode() == task_id
+
+
+def test_failed_publish_keeps_a_key_taken_over_meanwhile(app, redis):
+    key = SUBMIT_KEY.format(task=send_email_notification.name, key='booking-1')
+
+    def publish(**kwargs):
+        # The key expired and another submission took it before the publish failed
+        redis.set(key, 'other-task')
+        raise OperationalError('broker down')
+
+    with mock.patch.object(send_email_notification, 'apply_async', side_effect=publish):
+        with pytest.raises(OperationalError):
+            submit_once(send_email_notification, 'booking-1', **EMAIL)
+    assert redis.get(key) == b'other-task'
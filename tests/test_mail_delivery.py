@@ -0,0 +1,51 @@
+import pytest
+from app.extensions import mail
+from app.services.mail_delivery_service import MailDeliveryService, mail_pool
+from app.utils.fake_smtp import FakeSMTPServer
+
+
+@pytest.fixture
+def smtp(app):
+    """Point Flask-Mail at a local fake SMTP server instead of suppressing sends"""
+    server = FakeSMTPServer().start()
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=server.port, MAIL_USE_TLS=False,
+                      MAIL_USE_SSL=False, MAIL_USERNAME=None, MAIL_SUPPRESS_SEND=False)
+    mail.init_app(app)
+    yield server
+    mail_pool.close_all()
+    server.stop()
+
+
+def messages(count):
+    return [
+        {
+            'recipient_email': f'user{i}@example.com',
+            'subject': 'Hello',
+            'template_name': 'mail/event_update.html',
+            'context': {'user': {'email': f'user{i}@example.com'}}
+        }
+        for i in range(count)
+    ]
+
+
+def test_batches_reuse_one_session(smtp):
+    for _ in range(3):
+        result = MailDeliveryService.deliver(messages(5), shared_context={'event': {'title': 'Show'}})
+        assert result['sent'] == 5 and not result['pending']
+
+    assert len(smtp.messages) == 15
+    assert smtp.sessions == 1
+
+
+def test_dropped_session_is_not_reused(smtp):
+    smtp.drop_after = 2
+    result = MailDeliveryService.deliver(messages(5), shared_context={'event': {'title': 'Show'}})
+
+    assert result['sent'] == 2
+    assert [spec['recipient_email'] for spec in result['pending']] == [f'user{i}@example.com' for i in range(2, 5)]
+    assert mail_pool._idle == []
+
+    smtp.drop_after = None
+    result = MailDeliveryService.deliver(result['pending'], shared_context={'event': {'title': 'Show'}})
+    assert result['sent'] == 3
+    assert smtp.sessions == 2
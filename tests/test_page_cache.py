@@ -0,0 +1,36 @@
+import re
+from datetime import datetime, timedelta
+import pytest
+from app.models.event import Event
+
+CSRF_TOKEN = re.compile(rb'name="csrf_token" value="([^"]+)"')
+
+
+@pytest.fixture
+def event(db):
+    event = Event(title='Concert', description='Live music', venue='Hanoi Opera House',
+                  event_date=datetime.utcnow() + timedelta(days=7), total_tickets=100,
+                  price=25.0, status='active', category='Music')
+    db.session.add(event)
+    db.session.commit()
+    return event
+
+
+def test_cached_detail_page_shares_no_csrf_token(app, redis, event):
+    url = f'/events/{event.id}'
+    tokens = []
+    for _ in range(2):
+        response = app.test_client().get(url)
+        assert response.status_code == 200
+        tokens += CSRF_TOKEN.findall(response.data)
+
+    assert redis.keys('cache:page:*')
+    assert len(tokens) == len(set(tokens))
+
+
+def test_logged_in_detail_page_has_own_csrf_token(client, login, make_user, redis, event):
+    make_user('user@example.com')
+    login('user@example.com')
+
+    response = client.get(f'/events/{event.id}')
+    assert len(CSRF_TOKEN.findall(response.data)) == 1
@@ -0,0 +1,32 @@
+from datetime import datetime
+import pytest
+from app.models.booking import Booking
+from app.utils.pagination import decode_cursor, encode_cursor
+
+COLUMNS = (Booking.created_at, Booking.id)
+
+
+def test_cursor_round_trip():
+    values = [datetime(2026, 1, 2, 3, 4, 5), 42]
+    assert decode_cursor(encode_cursor(values), COLUMNS) == values
+
+
+@pytest.mark.parametrize('values', [
+    [42, 42],                        # timestamp column given a number
+    ['2026-01-02T03:04:05', '42'],   # integer column given a string
+    ['2026-01-02T03:04:05', True],   # booleans are not integers
+    ['2026-01-02T03:04:05', None],
+    ['not a date', 42],
+    ['2026-01-02T03:04:05'],         # wrong length
+])
+def test_cursor_with_wrong_types_is_rejected(values):
+    assert decode_cursor(encode_cursor(values), COLUMNS) is None
+
+
+def test_invalid_cursor_is_a_bad_request(client, login, make_user):
+    make_user('admin@example.com')
+    login('admin@example.com')
+
+    assert client.get('/admin/users?after=' + encode_cursor([1, 'x'])).status_code == 400
+    assert client.get('/admin/users?before=garbage').status_code == 400
+    assert client.get('/admin/users').status_code == 200
@@ -0,0 +1,43 @@
+"""
+Views decorated with @query_budget stay within it, and within a fixed
+number of statements per request however many rows they list.
+
+TestingConfig sets SQL_QUERY_BUDGET_STRICT, so a view over its budget
+raises QueryBudgetExceeded instead of logging a warning.
+"""
+import pytest
+
+BUDGETED_VIEWS = {
+    # booking.all_bookings is left out: its template has never existed
+    'my bookings': ('user@example.com', '/booking/my-bookings'),
+    'admin dashboard': ('admin@example.com', '/admin/dashboard'),
+    'admin bookings': ('admin@example.com', '/admin/bookings'),
+    'admin users': ('admin@example.com', '/admin/users'),
+}
+
+
+@pytest.fixture
+def users(make_user):
+    return make_user('user@example.com'), make_user('admin@example.com')
+
+
+def request_statements(client, count_queries, url):
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('name', BUDGETED_VIEWS)
+def test_view_stays_within_budget(app, client, login, count_queries, users, make_bookings, name):
+    email, url = BUDGETED_VIEWS[name]
+    login(email)
+
+    make_bookings(users[0], 1)
+    few = request_statements(client, count_queries, url)
+
+    make_bookings(users[0], 20)
+    many = request_statements(client, count_queries, url)
+
+    # Loading the user and its role is the only work outside the view
+    assert many == few
@@ -0,0 +1,100 @@
+"""
+The hot queries must be answered from the indexes added for them.
+
+Runs against the in-memory SQLite database with EXPLAIN QUERY PLAN, and
+against PostgreSQL with EXPLAIN when TEST_POSTGRES_URL points at a
+scratch database (sequential scans are disabled there, since the planner
+would rightly scan tables this small).
+"""
+import os
+from datetime import datetime, timedelta
+import pytest
+import sqlalchemy as sa
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.outbox import OutboxMessage
+from app.models.payment import Payment
+from app.models.ticket import Ticket
+
+NOW = datetime(2026, 1, 1)
+
+# (query, indexes that may answer it)
+HOT_QUERIES = {
+    'my bookings': (
+        sa.select(Booking).where(Booking.user_id == 1).order_by(Booking.created_at.desc()),
+        ('ix_bookings_user_created',),
+    ),
+    'expired holds': (
+        sa.select(Booking.id).where(
+            Booking.status == 'pending', Booking.payment_status == 'pending',
+            Booking.created_at < NOW,
+        ).order_by(Booking.created_at, Booking.id),
+        # SQLite prefers the composite index; both avoid a table scan
+        ('ix_bookings_pending_created', 'ix_bookings_status_payment_created'),
+    ),
+    'event bookings by status': (
+        sa.select(Booking.id).where(Booking.event_id == 1, Booking.status == 'confirmed'),
+        ('ix_bookings_event_status',),
+    ),
+    'reminders due': (
+        sa.select(Booking.id).where(
+            Booking.event_id == 1, Booking.status == 'confirmed', Booking.reminder_sent_at.is_(None),
+        ),
+        ('ix_bookings_reminder_due', 'ix_bookings_event_status'),
+    ),
+    'upcoming events': (
+        sa.select(Event).where(
+            Event.event_date >= NOW, Event.event_date < NOW + timedelta(days=30), Event.is_active.is_(True),
+        ).order_by(Event.event_date),
+        ('ix_events_date_active',),
+    ),
+    'booking payments': (
+        sa.select(Payment).where(Payment.booking_id == 1),
+        ('ix_payments_booking_id', 'ix_payments_booking_pending'),
+    ),
+    'booking tickets': (
+        sa.select(Ticket).where(Ticket.booking_id == 1),
+        ('ix_tickets_booking_id',),
+    ),
+    'pending outbox': (
+        sa.select(OutboxMessage).where(
+            OutboxMessage.published_at.is_(None), OutboxMessage.dead_at.is_(None),
+        ).order_by(OutboxMessage.id).limit(100),
+        ('ix_outbox_messages_pending',),
+    ),
+}
+
+
+def explain(connection, query, prefix):
+    sql = str(query.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    return '\n'.join(str(row[-1]) for row in connection.execute(sa.text(f'{prefix} {sql}')))
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_sqlite_uses_index(db, name):
+    query, indexes = HOT_QUERIES[name]
+    with db.engine.connect() as connection:
+        plan = explain(connection, query, 'EXPLAIN QUERY PLAN')
+    assert any(index in plan for index in indexes), plan
+
+
+@pytest.fixture(scope='module')
+def postgres():
+    url = os.getenv('TEST_POSTGRES_URL')
+    if not url:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    from app.extensions import db
+    engine = sa.create_engine(url)
+    db.metadata.create_all(engine)
+    yield engine
+    db.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_postgres_uses_index(postgres, name):
+    query, indexes = HOT_QUERIES[name]
+    with postgres.connect() as connection:
+        connection.execute(sa.text('SET enable_seqscan = off'))
+        plan = explain(connection, query, 'EXPLAIN')
+    assert any(index in plan for index in indexes), plan
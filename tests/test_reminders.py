@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from unittest import mock
+import pytest
+from app.models.booking import Booking
+from app.services.mail_delivery_service import MailDeliveryService
+from app.services.reminder_service import ReminderService
+
+
+@pytest.fixture
+def claimed(db, make_user, make_bookings):
+    event = make_bookings(make_user('user@example.com'), 3)
+    event.event_date = datetime.utcnow() + timedelta(hours=12)
+    db.session.commit()
+    due = ReminderService.claim_due()
+    assert len(due[event.id]) == 3
+    return event.id, due[event.id]
+
+
+def test_failed_batch_is_released(db, claimed):
+    event_id, booking_ids = claimed
+    with mock.patch.object(MailDeliveryService, 'deliver', side_effect=RuntimeError('mail sender not configured')):
+        with pytest.raises(RuntimeError):
+            ReminderService.deliver(event_id, booking_ids)
+
+    assert Booking.query.filter(Booking.reminder_sent_at.isnot(None)).count() == 0
+    assert ReminderService.claim_due()[event_id] == booking_ids
+
+
+def test_sent_batch_stays_claimed(db, claimed):
+    event_id, booking_ids = claimed
+    result = ReminderService.deliver(event_id, booking_ids)
+
+    assert result['sent'] == 3 and not result['pending']
+    assert ReminderService.claim_due() == {}
+
+
+def test_failed_publish_releases_claimed_bookings(app, db, claimed):
+    from kombu.exceptions import OperationalError
+    from app.celery.tasks.email_tasks import send_event_reminders
+    event_id, booking_ids = claimed
+    ReminderService.release(booking_ids)
+
+    with mock.patch('app.celery.tasks.email_tasks.group') as group:
+        group.return_value.apply_async.side_effect = OperationalError('broker down')
+        with pytest.raises(OperationalError):
+            send_event_reminders.run()
+
+    assert ReminderService.claim_due()[event_id] == booking_ids